@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Benchmark ordering dependency trees of 10k nodes: a single chain, a
+wide tree where every node depends on one root, and a random tree where
+every node depends on up to five earlier nodes.
+
+usage: python scripts/benchmark_dependencytree.py [nodes]
+"""
+from __future__ import print_function, unicode_literals
+import random
+import sys
+import time
+
+from sprinter.lib.dependencytree import DependencyTree
+
+NODES = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+
+def shuffled(node_dict):
+    """return the node dict in a random order, as manifests are not ordered"""
+    items = list(node_dict.items())
+    random.shuffle(items)
+    return dict(items)
+
+
+def main():
+    random.seed(0)
+    trees = {
+        "chain": dict(
+            ("n%s" % i, ["n%s" % (i - 1)] if i else []) for i in range(NODES)
+        ),
+        "wide": dict(("n%s" % i, ["n0"] if i else []) for i in range(NODES)),
+        "random": dict(
+            (
+                "n%s" % i,
+                ["n%s" % random.randrange(i) for _ in range(random.randint(0, 5))]
+                if i
+                else [],
+            )
+            for i in range(NODES)
+        ),
+    }
+    for name, node_dict in sorted(trees.items()):
+        node_dict = shuffled(node_dict)
+        start = time.time()
+        tree = DependencyTree(node_dict)
+        print(
+            "%-6s %s nodes in %s levels: %.3fs"
+            % (name, len(tree.order), len(tree.levels), time.time() - start)
+        )
+
+
+if __name__ == "__main__":
+    main()
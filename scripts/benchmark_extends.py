@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+"""
+Benchmark loading a manifest through a five level 'extends' chain,
+served by a local http server with simulated latency.
+
+every level extends the level below it and a shared org-wide base
+manifest, so the base is referenced five times but should be
+fetched once, and each level's parents fetched concurrently.
+
+usage: python scripts/benchmark_extends.py [latency_in_seconds]
+"""
+from __future__ import print_function, unicode_literals
+import sys
+import threading
+import time
+
+from six.moves import BaseHTTPServer, socketserver
+
+from sprinter.core.manifest import load_manifest, shared_manifest_cache
+
+LEVELS = 5
+LATENCY = float(sys.argv[1]) if len(sys.argv) > 1 else 0.05
+MANIFESTS = {
+    "/base.cfg": "[config]\nnamespace = benchmark\n\n[base]\nlevel = base\n",
+    "/level0.cfg": "[level0]\nformula = sprinter.formula.base\n",
+}
+request_count = [0]
+
+
+class ManifestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    def do_GET(self):
+        request_count[0] += 1
+        time.sleep(LATENCY)
+        body = MANIFESTS.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ThreadedServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+
+def main():
+    server = ThreadedServer(("127.0.0.1", 0), ManifestHandler)
+    url = "http://127.0.0.1:%s" % server.server_address[1]
+    for level in range(1, LEVELS + 1):
+        MANIFESTS["/level%s.cfg" % level] = (
+            "[config]\nextends = %s/level%s.cfg\n  %s/base.cfg\n\n"
+            "[level%s]\nformula = sprinter.formula.base\n"
+            % (url, level - 1, url, level)
+        )
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    start = time.time()
+    manifest = load_manifest("%s/level%s.cfg" % (url, LEVELS))
+    duration = time.time() - start
+    print(
+        "loaded %s sections with %s requests in %.3fs (%.3fs latency per request)"
+        % (len(manifest.sections()), request_count[0], duration, LATENCY)
+    )
+
+    request_count[0] = 0
+    start = time.time()
+    with shared_manifest_cache():
+        for _ in range(10):
+            load_manifest("%s/level%s.cfg" % (url, LEVELS))
+    print(
+        "loaded 10 times in a shared cache with %s requests in %.3fs"
+        % (request_count[0], time.time() - start)
+    )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
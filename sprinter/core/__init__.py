@@ -1,7 +1,8 @@
 from .core import PHASE
 from .directory import Directory
-from .globals import load_global_config
-from ..next.environment.injections import Injections
+from .globals import load_global_config, read_global_config
+from ..next.environment.injections import Injections, commit_injections
 from .manifest import Manifest, ManifestException, load_manifest
+from .manifestdiff import ManifestDiff
 from .featuredict import FeatureDict
 from .featureconfig import FeatureConfig
@@ -0,0 +1,278 @@
+"""
+analyzer.py checks a manifest for problems without instantiating it's
+formulas or touching the network (beyond loading manifests it
+extends):
+
+* features without a formula
+* references to values that are not defined
+* cyclic or too deeply nested references
+* depends on features that do not exist, and cyclic depends
+* inputs that are never referenced
+* options a formula does not know, and required options that are missing
+
+the options of a formula are read from a SchemaIndex, which caches the
+valid and required options of every formula it has imported, so
+formulas are only imported once.
+"""
+from __future__ import unicode_literals
+import inspect
+import json
+import logging
+import os
+import re
+import sys
+from collections import namedtuple
+
+import sprinter.lib as lib
+from sprinter.exceptions import SprinterException
+from .featuredict import LEGACY_MAPPINGS
+from .inputs import Inputs
+from .interpolation import InterpolationException, check_references, references
+from .manifest import FEATURE_RESERVED
+
+logger = logging.getLogger(__name__)
+
+ERROR = "error"
+WARNING = "warning"
+
+# values added when the environment is specialized, see Environment._specialize
+RUNTIME_CONFIG_KEYS = ["config:root_dir", "config:node"]
+
+Problem = namedtuple("Problem", ["level", "feature", "message"])
+
+
+def analyze_manifest(raw_manifest, schema_index=None):
+    """
+    return a list of Problems with the RawConfigParser raw_manifest. if
+    a schema_index is passed, the options of each feature are checked
+    against it's formula.
+    """
+    problems = []
+    features = [s for s in raw_manifest.sections() if s != "config"]
+    values = dict(
+        ("%s:%s" % (s, k), v)
+        for s in raw_manifest.sections()
+        for k, v in raw_manifest.items(s)
+    )
+    inputs = _parse_inputs(raw_manifest)
+
+    known_keys = set(values) | set(RUNTIME_CONFIG_KEYS)
+    known_keys.update("config:%s" % k for k in inputs)
+    known_keys.update("%s:root_dir" % s for s in features)
+    referenced = set()
+    for key, value in sorted(values.items()):
+        for reference in references(value):
+            reference = reference.split("|", 1)[0]
+            referenced.add(reference)
+            if reference not in known_keys:
+                problems.append(
+                    Problem(
+                        ERROR,
+                        key.split(":", 1)[0],
+                        "%s references %%(%s)s, which is not defined"
+                        % (key, reference),
+                    )
+                )
+    try:
+        check_references(values)
+    except InterpolationException:
+        problems.append(Problem(ERROR, None, str(sys.exc_info()[1])))
+
+    for key in sorted(inputs):
+        if "config:%s" % key not in referenced:
+            problems.append(
+                Problem(WARNING, "config", "input %s is never referenced" % key)
+            )
+
+    dependencies = dict((s, _parse_depends(raw_manifest, s)) for s in features)
+    for feature in features:
+        for dependency in dependencies[feature]:
+            if dependency not in dependencies:
+                problems.append(
+                    Problem(
+                        ERROR,
+                        feature,
+                        "depends on %s, which is not a feature" % dependency,
+                    )
+                )
+    for cycle in _find_cycles(dependencies):
+        problems.append(
+            Problem(ERROR, cycle[0], "depends are cyclic: %s" % " -> ".join(cycle))
+        )
+
+    for feature in features:
+        if not raw_manifest.has_option(feature, "formula"):
+            problems.append(Problem(ERROR, feature, "has no formula"))
+        elif schema_index is not None:
+            problems += _check_options(
+                raw_manifest,
+                feature,
+                raw_manifest.get(feature, "formula"),
+                schema_index,
+            )
+    return problems
+
+
+class SchemaIndex(object):
+    """
+    The valid and required options of formulas, cached at path.
+
+    a formula is imported the first time it is looked up, and again
+    only if it's module has been modified since. formulas that are not
+    installed are not downloaded, and have no schema.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._schemas = {}
+        self._current = set()  # formulas whose schema is known to be current
+        self._missing = set()
+        self._changed = False
+        if path and os.path.exists(path):
+            try:
+                with open(path) as fh:
+                    self._schemas = json.load(fh)
+            except ValueError:
+                logger.debug("Unable to parse the formula schema index at %s" % path)
+
+    def get(self, formula):
+        """
+        return a dictionary of the formula's valid_options and
+        required_options, or None if the formula is not installed
+        """
+        formula = LEGACY_MAPPINGS.get(formula, formula).split(":", 1)[0]
+        schema = self._schemas.get(formula)
+        if formula in self._current:
+            return schema
+        if schema is not None and _is_current(schema):
+            self._current.add(formula)
+            return schema
+        if formula in self._missing:
+            return None
+        schema = _load_schema(formula)
+        if schema is None:
+            self._missing.add(formula)
+            return None
+        self._schemas[formula] = schema
+        self._current.add(formula)
+        self._changed = True
+        return schema
+
+    def save(self):
+        """write any schemas that were imported to the index"""
+        if not (self.path and self._changed):
+            return
+        parent_directory = os.path.dirname(self.path)
+        if not os.path.exists(parent_directory):
+            os.makedirs(parent_directory)
+        temp_path = "%s.%s.tmp" % (self.path, os.getpid())
+        with open(temp_path, "w") as fh:
+            json.dump(self._schemas, fh, sort_keys=True, indent=2)
+        os.rename(temp_path, self.path)
+        self._changed = False
+
+
+def _load_schema(formula):
+    # recursive import otherwise
+    from sprinter.formula.base import FormulaBase
+
+    try:
+        formula_class = lib.get_subclass_from_module(formula, FormulaBase)
+    except (ImportError, SprinterException):
+        logger.debug("Unable to import formula %s" % formula, exc_info=True)
+        return None
+    module_path = inspect.getfile(formula_class)
+    return {
+        "valid_options": list(formula_class.valid_options),
+        "required_options": list(formula_class.required_options),
+        "path": module_path,
+        "mtime": os.path.getmtime(module_path),
+    }
+
+
+def _is_current(schema):
+    """return true if the module the schema was read from has not changed"""
+    path = schema.get("path")
+    return bool(path) and (
+        os.path.exists(path) and os.path.getmtime(path) == schema.get("mtime")
+    )
+
+
+def _check_options(raw_manifest, feature, formula, schema_index):
+    schema = schema_index.get(formula)
+    if schema is None:
+        return [
+            Problem(
+                WARNING,
+                feature,
+                "formula %s is not installed, it's options were not checked" % formula,
+            )
+        ]
+    problems = []
+    valid_options = set(schema["valid_options"] + schema["required_options"])
+    if "*" not in valid_options:
+        valid_options.update(FEATURE_RESERVED)
+        for option in raw_manifest.options(feature):
+            if option not in valid_options:
+                problems.append(
+                    Problem(
+                        WARNING,
+                        feature,
+                        "option %s is not used by %s" % (option, formula),
+                    )
+                )
+    for option in schema["required_options"]:
+        if not raw_manifest.has_option(feature, option):
+            problems.append(
+                Problem(
+                    ERROR,
+                    feature,
+                    "required option %s of %s is missing" % (option, formula),
+                )
+            )
+    return problems
+
+
+def _parse_inputs(raw_manifest):
+    inputs = Inputs()
+    for s in raw_manifest.sections():
+        if raw_manifest.has_option(s, "inputs"):
+            inputs.add_inputs_from_inputstring(raw_manifest.get(s, "inputs"))
+    return set(inputs.keys())
+
+
+def _parse_depends(raw_manifest, feature):
+    if not raw_manifest.has_option(feature, "depends"):
+        return []
+    return [
+        d.strip()
+        for d in re.split("\n|,", raw_manifest.get(feature, "depends"))
+        if d.strip()
+    ]
+
+
+def _find_cycles(dependencies):
+    """return each cycle in the dependencies, as a list of the features in it"""
+    cycles = []
+    visited = set()
+    for start in sorted(dependencies):
+        if start in visited:
+            continue
+        # an iterative depth first search, as chains may be long
+        path, on_path = [start], set([start])
+        stack = [iter(dependencies[start])]
+        while stack:
+            dependency = next(stack[-1], None)
+            if dependency is None:
+                stack.pop()
+                finished = path.pop()
+                on_path.discard(finished)
+                visited.add(finished)
+                continue
+            if dependency in on_path:
+                cycles.append(path[path.index(dependency) :] + [dependency])
+            elif dependency in dependencies and dependency not in visited:
+                path.append(dependency)
+                on_path.add(dependency)
+                stack.append(iter(dependencies[dependency]))
+    return cycles
@@ -0,0 +1,121 @@
+"""
+compiledmanifest.py stores an installed manifest in a form that can be
+loaded without parsing it: it's sections, the resolved order of it's
+features, and it's parsed input schemas.
+
+the compiled manifest is written next to the manifest, and is only used
+while the manifest's modification time and hash still match:
+
+{"version": 1, "mtime": 1400000000.0, "hash": "...",
+ "sections": [["config", [["namespace", "myenv"], ...]], ...],
+ "dependencies": {"git": [], ...}, "order": ["git", ...],
+ "inputs": {"username": {"prompt": "..."}, ...},
+ "target_digest": "..."}
+
+target_digest is the digest of the manifest the installed manifest was
+last successfully installed or updated from, so an update from an
+unchanged manifest can be skipped.
+"""
+from __future__ import unicode_literals
+import hashlib
+import json
+import logging
+import os
+
+from sprinter.lib.dependencytree import DependencyTree
+from .inputs import EMPTY, Input, Inputs
+
+logger = logging.getLogger(__name__)
+
+COMPILED_VERSION = 1
+
+
+def compiled_path(manifest_path):
+    """return the path of the compiled form of the manifest at manifest_path"""
+    return os.path.splitext(manifest_path)[0] + ".compiled"
+
+
+def write_compiled_manifest(manifest, manifest_path, target_digest=None):
+    """
+    write the compiled form of the manifest, which should be parsed
+    from manifest_path
+    """
+    compiled = {
+        "version": COMPILED_VERSION,
+        "mtime": os.path.getmtime(manifest_path),
+        "hash": _file_hash(manifest_path),
+        "sections": [[s, manifest.manifest.items(s)] for s in manifest.sections()],
+        # input values are read from the sections, only the schemas are kept
+        "dependencies": manifest.dtree.dependencies,
+        "order": manifest.dtree.order,
+        "inputs": dict(
+            (
+                key,
+                dict(
+                    (k, v)
+                    for k, v in vars(manifest.inputs._inputs[key]).items()
+                    if k != "value" and v is not EMPTY
+                ),
+            )
+            for key in manifest.inputs.keys()
+        ),
+        "target_digest": target_digest,
+    }
+    temp_path = compiled_path(manifest_path) + ".tmp"
+    with open(temp_path, "w") as fh:
+        json.dump(compiled, fh)
+    os.rename(temp_path, compiled_path(manifest_path))
+
+
+def load_compiled_manifest(manifest_path):
+    """
+    return the compiled form of the manifest at manifest_path, or None
+    if it has not been compiled or has changed since.
+    """
+    path = compiled_path(manifest_path)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as fh:
+            compiled = json.load(fh)
+    except ValueError:
+        logger.debug("Unable to parse compiled manifest %s" % path)
+        return None
+    if (
+        compiled.get("version") != COMPILED_VERSION
+        or compiled.get("mtime") != os.path.getmtime(manifest_path)
+        or compiled.get("hash") != _file_hash(manifest_path)
+    ):
+        return None
+    return compiled
+
+
+def build_raw_manifest(compiled, raw_manifest):
+    """add the sections of the compiled manifest to raw_manifest"""
+    for section, items in compiled["sections"]:
+        if not raw_manifest.has_section(section):
+            raw_manifest.add_section(section)
+        for k, v in items:
+            raw_manifest.set(section, k, v)
+    return raw_manifest
+
+
+def build_inputs(compiled):
+    """return the Inputs of the compiled manifest"""
+    inputs = Inputs()
+    for key, attributes in compiled["inputs"].items():
+        input_instance = Input()
+        for k, v in attributes.items():
+            setattr(input_instance, k, v)
+        inputs.add_input(key, input_instance)
+    return inputs
+
+
+def build_dependency_tree(compiled):
+    """return the DependencyTree of the compiled manifest, without recalculating it's order"""
+    return DependencyTree.from_order(compiled["dependencies"], compiled["order"])
+
+
+def _file_hash(path):
+    with open(path, "rb") as fh:
+        return hashlib.sha1(fh.read()).hexdigest()
@@ -2,23 +2,55 @@
 directory.py stores methodology to install various files and
 packages to different locations.
 
+the symlinks in bin, lib and include are recorded in an index in the
+namespace directory, links.json, with the feature that owns each one:
+
+{"bin/git": {"feature": "git", "path": "/.../features/git/bin/git"}, ...}
+
+so a link that is already correct is left alone, and the links of a
+feature are removed without looking at the links of any other feature.
+
+the rc, env and gui scripts are kept in memory until finalize, which
+replaces each script whose content changed in a single rename, so a
+shell never sources a half written script. lines added within a
+feature_scope are kept by feature, and finalize writes them in the run
+order it is given, so features that run concurrently write the same
+scripts as features that run one at a time.
 """
 from __future__ import unicode_literals
+import hashlib
+import json
 import logging
 import os
 import shutil
 import stat
 import tempfile
+import threading
+from contextlib import contextmanager
 
+from .generations import Generations
 from .templates import source_template
 
 logger = logging.getLogger(__name__)
 
+# the feature the lines added to the scripts on this thread belong to
+_scope = threading.local()
+
 
 class DirectoryException(Exception):
     """An exception to specify it's a directory"""
 
 
+@contextmanager
+def feature_scope(feature):
+    """attribute the lines added to the rc/env/gui scripts on this thread to feature"""
+    previous, _scope.feature = getattr(_scope, "feature", None), feature
+    try:
+        yield
+    finally:
+        _scope.feature = previous
+
+
 class Directory(object):
 
     root_dir = None  # path to the root directory
@@ -26,8 +58,6 @@ class Directory(object):
     new = False  # determines if the directory is for a new environment or not
     rewrite_config = True  # if set to false, the existing rc and env files will be
     # preserved, and will not be modifiable
-    rc_file = None  # file handler for rc file
-    env_file = None  # file handler for env file
     shell_util_path = None  # the path to the shell utils file
     logger = logger
 
@@ -38,12 +68,15 @@ class Directory(object):
         self.manifest_path = os.path.join(self.root_dir, "manifest.cfg")
         self.rewrite_config = rewrite_config
         self.shell_util_path = shell_util_path
-
-    def __del__(self):
-        if self.rc_file:
-            self.rc_file.close()
-        if self.env_file:
-            self.env_file.close()
+        # the (feature, line) of the rc/env/gui scripts, until they are written
+        self._scripts = {}
+        # features may run concurrently, and share the rc/env/gui scripts
+        self._write_lock = threading.Lock()
+        # and the link index, loaded when first used
+        self._link_lock = threading.RLock()
+        self._links = None  # the entry of each link, by it's path relative to root_dir
+        self._feature_links = None  # the links of each feature
+        self._links_changed = False
 
     def initialize(self):
         """Generate the root directory root if it doesn't already exist"""
@@ -60,36 +93,71 @@ class Directory(object):
             open(self.manifest_path, "w+").close()
         self.new = False
 
-    def finalize(self):
-        """finalize any open file handles"""
-        if self.rc_file:
-            self.rc_file.close()
-        if self.env_file:
-            self.env_file.close()
+    def finalize(self, order=None):
+        """
+        write the rc/env/gui scripts whose content has changed. the
+        lines of each feature are written in order, after the lines
+        added before any feature's.
+        """
+        with self._write_lock:
+            # .rc is written last, as it sources the others
+            for name in (".gui", ".env", ".rc"):
+                if name in self._scripts:
+                    self.__write_if_changed(
+                        os.path.join(self.root_dir, name),
+                        self.__script_header(name)
+                        + "".join(_ordered_lines(self._scripts[name], order or [])),
+                    )
+            self._scripts = {}
 
     def remove(self):
         """Removes the sprinter directory, if it exists"""
-        if self.rc_file:
-            self.rc_file.close()
-        if self.env_file:
-            self.env_file.close()
-        shutil.rmtree(self.root_dir)
-
-    def symlink_to_bin(self, name, path):
+        self._scripts = {}
+        if os.path.islink(self.root_dir):
+            Generations(self.root_dir).remove()
+        else:
+            shutil.rmtree(self.root_dir)
+        self._links = None
+        self.new = True
+
+    def symlink_to_bin(self, name, path, feature_name=None):
         """Symlink an object at path to name in the bin folder."""
-        self.__symlink_dir("bin", name, path)
-        os.chmod(
-            os.path.join(self.root_dir, "bin", name),
-            os.stat(path).st_mode | stat.S_IXUSR | stat.S_IRUSR,
-        )
+        with self._link_lock:
+            self.__symlink_dir("bin", name, path, feature_name)
+            self.__save_link_index()
 
     def remove_from_bin(self, name):
         """Remove an object from the bin folder."""
         self.__remove_path(os.path.join(self.root_dir, "bin", name))
+        self.__unindex_link("bin", name)
 
     def remove_from_lib(self, name):
         """Remove an object from the bin folder."""
         self.__remove_path(os.path.join(self.root_dir, "lib", name))
+        self.__unindex_link("lib", name)
+
+    def sync_links(self, feature_name, dir_name, links):
+        """
+        Make the links of a feature in the dir_name folder the
+        dictionary of names to paths links: links that are missing or
+        point elsewhere are created, and links the feature no longer
+        wants are removed. links that are already correct are left alone.
+        """
+        with self._link_lock:
+            self.__load_link_index()
+            prefix = dir_name + "/"
+            for key in list(self._feature_links.get(feature_name, [])):
+                if key.startswith(prefix) and key[len(prefix) :] not in links:
+                    self.__unlink(key)
+            for name, path in links.items():
+                self.__symlink_dir(dir_name, name, path, feature_name)
+            self.__save_link_index()
+
+    def feature_links(self, feature_name):
+        """return the links owned by a feature, relative to the root directory"""
+        with self._link_lock:
+            self.__load_link_index()
+            return sorted(self._feature_links.get(feature_name, []))
 
     def remove_feature(self, feature_name):
         """Remove an feature from the environment root folder."""
@@ -97,13 +165,17 @@ class Directory(object):
         if os.path.exists(self.install_directory(feature_name)):
             self.__remove_path(self.install_directory(feature_name))
 
-    def symlink_to_lib(self, name, path):
+    def symlink_to_lib(self, name, path, feature_name=None):
         """Symlink an object at path to name in the lib folder."""
-        self.__symlink_dir("lib", name, path)
+        with self._link_lock:
+            self.__symlink_dir("lib", name, path, feature_name)
+            self.__save_link_index()
 
-    def symlink_to_include(self, name, path):
+    def symlink_to_include(self, name, path, feature_name=None):
         """Symlink an object at path to name in the lib folder."""
-        self.__symlink_dir("include", name, path)
+        with self._link_lock:
+            self.__symlink_dir("include", name, path, feature_name)
+            self.__save_link_index()
 
     def bin_path(self):
         """return the bin directory path"""
@@ -120,13 +192,11 @@ class Directory(object):
     def clear_feature_symlinks(self, feature_name):
         """Clear the symlinks for a feature in the symlinked path"""
         logger.debug("Clearing feature symlinks for %s" % feature_name)
-        feature_path = self.install_directory(feature_name)
-        for d in ("bin", "lib"):
-            if os.path.exists(os.path.join(self.root_dir, d)):
-                for link in os.listdir(os.path.join(self.root_dir, d)):
-                    path = os.path.join(self.root_dir, d, link)
-                    if feature_path in os.path.realpath(path):
-                        getattr(self, "remove_from_%s" % d)(link)
+        with self._link_lock:
+            self.__load_link_index()
+            for key in list(self._feature_links.get(feature_name, [])):
+                self.__unlink(key)
+            self.__save_link_index()
 
     def install_directory(self, feature_name):
         """
@@ -138,37 +208,24 @@ class Directory(object):
         """
         add content to the env script.
         """
-        if not self.rewrite_config:
-            raise DirectoryException(
-                "Error! Directory was not intialized w/ rewrite_config."
-            )
-        if not self.env_file:
-            self.env_path, self.env_file = self.__get_env_handle(self.root_dir)
-        self.env_file.write(content + "\n")
+        self.__add_to_script(".env", content)
 
     def add_to_rc(self, content):
         """
         add content to the rc script.
         """
-        if not self.rewrite_config:
-            raise DirectoryException(
-                "Error! Directory was not intialized w/ rewrite_config."
-            )
-        if not self.rc_file:
-            self.rc_path, self.rc_file = self.__get_rc_handle(self.root_dir)
-        self.rc_file.write(content + "\n")
+        self.__add_to_script(".rc", content)
 
     def add_to_gui(self, content):
         """
         add content to the gui script.
         """
-        if not self.rewrite_config:
-            raise DirectoryException(
-                "Error! Directory was not intialized w/ rewrite_config."
-            )
-        if not self.gui_file:
-            self.gui_path, self.gui_file = self.__get_gui_handle(self.root_dir)
-        self.gui_file.write(content + "\n")
+        self.__add_to_script(".gui", content)
+
+    def script_content(self, name):
+        """return the content added to the script name (.rc, .env or .gui) so far"""
+        with self._write_lock:
+            return "".join(line for _, line in self._scripts.get(name, []))
 
     def __remove_path(self, path):
         """Remove an object"""
@@ -193,46 +250,182 @@ class Directory(object):
             logger.error("Unable to remove object at path %s" % path)
             raise DirectoryException("Unable to remove object at path %s" % path)
 
-    def __get_env_handle(self, root_dir):
-        """get the filepath and filehandle to the .env file for the environment"""
-        env_path = os.path.join(root_dir, ".env")
-        gui_path = os.path.join(root_dir, ".gui")
-        fh = open(env_path, "w+")
-        # .env will source utils.sh if it hasn't already
-        fh.write(source_template % (gui_path, gui_path))
-        fh.write(source_template % (self.shell_util_path, self.shell_util_path))
-        return (env_path, fh)
-
-    def __get_rc_handle(self, root_dir):
-        """get the filepath and filehandle to the rc file for the environment"""
-        rc_path = os.path.join(root_dir, ".rc")
-        env_path = os.path.join(root_dir, ".env")
-        fh = open(rc_path, "w+")
-        # .rc will always source .env
-        fh.write(source_template % (env_path, env_path))
-        return (rc_path, fh)
-
-    def __get_gui_handle(self, root_dir):
-        """get the filepath and filehandle to the .env file for the environment"""
-        gui_path = os.path.join(root_dir, ".gui")
-        fh = open(gui_path, "w+")
-        return (gui_path, fh)
-
-    def __symlink_dir(self, dir_name, name, path):
-        """
-        Symlink an object at path to name in the dir_name folder. remove it if it already exists.
+    def __add_to_script(self, name, content):
+        if not self.rewrite_config:
+            raise DirectoryException(
+                "Error! Directory was not intialized w/ rewrite_config."
+            )
+        with self._write_lock:
+            self._scripts.setdefault(name, []).append(
+                (getattr(_scope, "feature", None), content + "\n")
+            )
+
+    def __script_header(self, name):
+        env_path = os.path.join(self.root_dir, ".env")
+        gui_path = os.path.join(self.root_dir, ".gui")
+        if name == ".env":
+            # .env will source utils.sh if it hasn't already
+            return source_template % (gui_path, gui_path) + source_template % (
+                self.shell_util_path,
+                self.shell_util_path,
+            )
+        if name == ".rc":
+            # .rc will always source .env
+            return source_template % (env_path, env_path)
+        return ""
+
+    def __write_if_changed(self, path, content):
+        """replace the file at path with content, unless it already has it"""
+        content = content.encode("utf-8")
+        if os.path.exists(path):
+            with open(path, "rb") as fh:
+                if hashlib.sha1(fh.read()).digest() == hashlib.sha1(content).digest():
+                    logger.debug("%s is unchanged" % path)
+                    return
+        temp_path = "%s.%s.tmp" % (path, os.getpid())
+        with open(temp_path, "wb") as fh:
+            fh.write(content)
+        os.rename(temp_path, path)
+
+    def __symlink_dir(self, dir_name, name, path, feature_name=None):
+        """
+        Symlink an object at path to name in the dir_name folder, and
+        record the feature that owns it. a link to a different path is
+        replaced, and a link to the same path is left alone. Call with
+        the link lock held, and save the link index after.
         """
+        self.__load_link_index()
         target_dir = os.path.join(self.root_dir, dir_name)
         if not os.path.exists(target_dir):
             os.makedirs(target_dir)
         target_path = os.path.join(self.root_dir, dir_name, name)
-        logger.debug("Attempting to symlink %s to %s..." % (path, target_path))
-        if os.path.exists(target_path):
-            if os.path.islink(target_path):
-                os.remove(target_path)
-            else:
-                logger.warn(
-                    "%s is not a symlink! please remove it manually." % target_path
-                )
-                return
-        os.symlink(path, target_path)
+        key = "%s/%s" % (dir_name, name)
+        feature_name = feature_name or self.__feature_of(path)
+        owner = self._links.get(key, {}).get("feature")
+        if owner and owner != feature_name:
+            logger.warn(
+                "%s is linked by %s, and is now linked by %s!"
+                % (key, owner, feature_name)
+            )
+        if os.path.islink(target_path) and os.readlink(target_path) == path:
+            logger.debug("%s is already linked to %s" % (target_path, path))
+        else:
+            logger.debug("Attempting to symlink %s to %s..." % (path, target_path))
+            if os.path.lexists(target_path):
+                if os.path.islink(target_path):
+                    os.remove(target_path)
+                else:
+                    logger.warn(
+                        "%s is not a symlink! please remove it manually." % target_path
+                    )
+                    return
+            os.symlink(path, target_path)
+        if dir_name == "bin":
+            os.chmod(target_path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IRUSR)
+        self.__index_link(key, feature_name, path)
+
+    def __feature_of(self, path):
+        """return the feature whose install directory path is in, if any"""
+        features_path = os.path.realpath(os.path.join(self.root_dir, "features"))
+        path = os.path.realpath(path)
+        if not path.startswith(features_path + os.sep):
+            return None
+        return path[len(features_path) + 1 :].split(os.sep)[0]
+
+    def __link_index_path(self):
+        return os.path.join(self.root_dir, "links.json")
+
+    def __load_link_index(self):
+        """
+        load the link index. a namespace installed before the index
+        existed is indexed from the links in it's directories.
+        """
+        if self._links is not None:
+            return
+        self._links, self._feature_links = {}, {}
+        self._links_changed = False
+        try:
+            with open(self.__link_index_path()) as fh:
+                links = json.load(fh)
+        except (IOError, OSError, ValueError):
+            links = self.__scan_links()
+            self._links_changed = bool(links)
+        for key, entry in links.items():
+            self.__index_link(key, entry.get("feature"), entry.get("path"))
+
+    def __scan_links(self):
+        links = {}
+        for dir_name in ("bin", "lib", "include"):
+            dir_path = os.path.join(self.root_dir, dir_name)
+            if not os.path.isdir(dir_path):
+                continue
+            for name in os.listdir(dir_path):
+                path = os.path.join(dir_path, name)
+                if os.path.islink(path):
+                    links["%s/%s" % (dir_name, name)] = {
+                        "feature": self.__feature_of(path),
+                        "path": os.readlink(path),
+                    }
+        return links
+
+    def __save_link_index(self):
+        if not self._links_changed or not os.path.isdir(self.root_dir):
+            return
+        temp_path = self.__link_index_path() + ".tmp"
+        with open(temp_path, "w") as fh:
+            json.dump(self._links, fh, sort_keys=True, indent=2)
+        os.rename(temp_path, self.__link_index_path())
+        self._links_changed = False
+
+    def __index_link(self, key, feature_name, path):
+        entry = {"feature": feature_name, "path": path}
+        if self._links.get(key) == entry:
+            return
+        self.__drop_link(key)
+        self._links[key] = entry
+        self._feature_links.setdefault(feature_name, set()).add(key)
+        self._links_changed = True
+
+    def __drop_link(self, key):
+        entry = self._links.pop(key, None)
+        if entry is not None:
+            self._feature_links.get(entry["feature"], set()).discard(key)
+            self._links_changed = True
+
+    def __unindex_link(self, dir_name, name):
+        with self._link_lock:
+            self.__load_link_index()
+            self.__drop_link("%s/%s" % (dir_name, name))
+            self.__save_link_index()
+
+    def __unlink(self, key):
+        """remove an indexed link, if it is still a link"""
+        path = os.path.join(self.root_dir, key)
+        if os.path.islink(path):
+            try:
+                os.unlink(path)
+            except OSError:
+                raise DirectoryException("Unable to remove link at path %s" % path)
+        self.__drop_link(key)
+
+
+def _ordered_lines(lines, order):
+    """
+    return the lines of a script from it's (feature, line) pairs: the
+    lines added before any feature's, then each feature's lines in
+    order, then the rest, each in the order they were added
+    """
+    first_feature = next(
+        (i for i, (f, _) in enumerate(lines) if f is not None), len(lines)
+    )
+    by_feature = {}
+    for feature, line in lines[first_feature:]:
+        by_feature.setdefault(feature, []).append(line)
+    features = [f for f in order if f in by_feature]
+    for feature, _ in lines[first_feature:]:
+        if feature is not None and feature not in features:
+            features.append(feature)
+    ordered = [line for _, line in lines[:first_feature]]
+    for feature in features:
+        ordered += by_feature.pop(feature)
+    return ordered + by_feature.pop(None, [])
@@ -1,7 +1,6 @@
 from __future__ import unicode_literals
 from six.moves import configparser
 import logging
-import copy
 import sys
 
 import sprinter.lib as lib
@@ -35,39 +34,31 @@ class FeatureConfig(object):
             if default is not EMPTY:
                 return default
             raise ParamNotFoundException("value for %s not found" % param)
-        context_dict = copy.deepcopy(self.manifest.get_context_dict())
-        for k, v in self.raw_dict.items():
-            context_dict["%s:%s" % (self.feature_name, k)] = v
-        cur_value = self.raw_dict[param]
-        prev_value = None
-        max_depth = 5
-        # apply the context until doing so does not change the value
-        while cur_value != prev_value and max_depth > 0:
-            prev_value = cur_value
-            try:
-                cur_value = str(prev_value) % context_dict
-            except KeyError:
-                e = sys.exc_info()[1]
-                key = e.args[0]
-                if key.startswith("config:"):
-                    missing_key = key.split(":")[1]
-                    if self.manifest.inputs.is_input(missing_key):
-                        val = self.manifest.inputs.get_input(missing_key)
-                        context_dict[key] = val
-                else:
-                    logger.warn(
-                        "Could not specialize %s! Error: %s" % (self.raw_dict[param], e)
-                    )
-                    return self.raw_dict[param]
-            except ValueError:
-                # this is an esoteric error, and this implementation
-                # forces a terrible solution. Sorry.
-                # using the standard escaping syntax in python is a mistake.
-                # if a value has a "%" inside (e.g. a password), a ValueError
-                # is raised, causing an issue
-                return cur_value
-            max_depth -= 1
-        return cur_value
+        key = "%s:%s" % (self.feature_name, param)
+        raw_value = self.raw_dict[param]
+        prompted = set()
+        while True:
+            table = self.manifest.get_interpolation_table()
+            if table.values.get(key) == raw_value:
+                value, missing = table.resolved[key], table.missing.get(key)
+            else:
+                # the manifest was changed underneath this config
+                value, missing = table.substitute(raw_value)
+            if missing is None:
+                return value
+            # inputs are prompted for when they are first needed
+            input_key = (
+                missing.split(":", 1)[1] if missing.startswith("config:") else None
+            )
+            if (
+                input_key is None
+                or input_key in prompted
+                or not self.manifest.inputs.is_input(input_key)
+            ):
+                logger.warn("Could not specialize %s! Error: %s" % (raw_value, missing))
+                return raw_value
+            prompted.add(input_key)
+            self.manifest.inputs.get_input(input_key)
 
     def has(self, param):
         """return true if the param exists"""
@@ -1,7 +1,6 @@
 from __future__ import unicode_literals
 from sprinter import lib
 from sprinter.exceptions import SprinterException, FormulaException
-from sprinter.external.pippuppet import Pip, PipException
 from sprinter.feature import Feature
 import sys
 import logging
@@ -28,31 +27,42 @@ class FeatureDict(dict):
         """generate a feature dict from Manifests <source_manifest> and <target_manifest>"""
         self._environment = environment
         self._run_order = []  # the order with which these features should run
+        self._keys_by_name = {}  # the keys of each feature name, in run order
         self._formula_dict = formula_dict or {}  # a dictionary to hold formula classes
-        self._pip = Pip(pip_install_path)
+        self._pip_install_path = pip_install_path
+        self.__pip = None
         # TODO: have a better way of detecting exists eggs are installed
-        self._pip.delete_all_eggs()
+        # read only commands leave the eggs, and pip, alone
+        if not environment.read_only:
+            self._pip.delete_all_eggs()
 
+        # features run in the order of the manifest's dependency tree
         if target_manifest:
-            for feature in target_manifest.sections():
+            for feature in target_manifest.formula_sections():
                 feature_key = self._instantiate_feature(
                     feature, target_manifest, "target"
                 )
                 if feature_key:
                     self._run_order.append(feature_key)
+                    self._keys_by_name.setdefault(feature, []).append(feature_key)
 
         if source_manifest:
-            for feature in source_manifest.sections():
+            for feature in source_manifest.formula_sections():
                 feature_key = self._instantiate_feature(
                     feature, source_manifest, "source"
                 )
                 if feature_key:
                     self._run_order.append(feature_key)
+                    self._keys_by_name.setdefault(feature, []).append(feature_key)
 
     @property
     def run_order(self):
         return self._run_order
 
+    def keys_for(self, feature_name):
+        """return the keys of the features named feature_name, in run order"""
+        return list(self._keys_by_name.get(feature_name, []))
+
     def _instantiate_feature(self, feature, manifest, kind):
         if feature == "config":
             return None
@@ -97,6 +107,16 @@ formula = sprinter.formula.env
             )
         return None
 
+    @property
+    def _pip(self):
+        """the pip that installs formula eggs, created when first needed"""
+        if self.__pip is None:
+            # pip is slow to import, so it is only imported by commands that need it
+            from sprinter.external.pippuppet import Pip
+
+            self.__pip = Pip(self._pip_install_path)
+        return self.__pip
+
     def _get_formula_class(self, formula):
         """
         get a formula class object if it exists, else
@@ -117,6 +137,8 @@ formula = sprinter.formula.env
                 )
             except (SprinterException, ImportError):
                 logger.info("Downloading %s..." % formula_class)
+                from sprinter.external.pippuppet import PipException
+
                 try:
                     self._pip.install_egg(formula_url or formula_class)
                     try:
@@ -0,0 +1,81 @@
+"""
+fingerprints.py records a hash of each feature's fully resolved
+configuration, to determine which features have changed since the
+last successful run.
+
+fingerprints are stored as json next to the namespace's manifest.cfg:
+
+{"git": "5d41402abc4b2a76b9719d911017c592", ...}
+"""
+from __future__ import unicode_literals
+import hashlib
+import json
+import logging
+import os
+import sys
+
+
+logger = logging.getLogger(__name__)
+
+# a cache of formula classes to their version
+_formula_versions = {}
+
+
+def load_fingerprints(path):
+    """return the dictionary of feature names to fingerprints stored at path"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except ValueError:
+        logger.debug("Unable to parse fingerprints at %s" % path, exc_info=True)
+        return {}
+
+
+def write_fingerprints(path, fingerprints):
+    """write the dictionary of feature names to fingerprints to path"""
+    with open(path, "w+") as fh:
+        json.dump(fingerprints, fh, indent=2, sort_keys=True)
+
+
+def feature_fingerprint(feature_config, formula_class):
+    """
+    return a hash of the feature config, fully specialized, and the
+    class and version of the formula that acts on it.
+    """
+    return config_fingerprint(feature_config.to_dict(), formula_class)
+
+
+def config_fingerprint(config_dict, formula_class):
+    """
+    return the fingerprint of a feature config given as a dictionary of
+    its fully specialized values, see feature_fingerprint
+    """
+    content = {
+        "config": config_dict,
+        "formula": "%s.%s" % (formula_class.__module__, formula_class.__name__),
+        "version": formula_version(formula_class),
+    }
+    return hashlib.md5(json.dumps(content, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def formula_version(formula_class):
+    """
+    return the version of a formula class: the module's __version__ if
+    it is set, or the version of the distribution providing it.
+    """
+    if formula_class not in _formula_versions:
+        module = sys.modules.get(formula_class.__module__)
+        version = getattr(module, "__version__", None)
+        if version is None:
+            import pkg_resources
+
+            try:
+                version = pkg_resources.get_distribution(
+                    formula_class.__module__.split(".")[0]
+                ).version
+            except pkg_resources.DistributionNotFound:
+                version = ""
+        _formula_versions[formula_class] = str(version)
+    return _formula_versions[formula_class]
@@ -0,0 +1,191 @@
+"""
+generations.py keeps the previous states of a namespace directory, so
+an update can be undone without installing anything again.
+
+with generations, the namespace directory is a symlink to the current
+generation, a numbered directory under the .generations directory of
+the sprinter root:
+
+~/.sprinter/myenv -> .generations/myenv/3
+~/.sprinter/.generations/myenv/{1,2,3}
+
+paths written into the environment go through the namespace directory,
+so they stay valid in every generation. a new generation is a copy of
+the current one, in which the features that are not going to change
+are hardlinked rather than copied. switching generations replaces the
+symlink in a single rename.
+
+as features write through the namespace directory, an update switches
+to it's new generation before it syncs them, and switches back if it
+fails or is interrupted.
+"""
+from __future__ import unicode_literals
+import logging
+import os
+import shutil
+
+from sprinter.exceptions import SprinterException
+
+logger = logging.getLogger(__name__)
+
+GENERATIONS_DIRECTORY = ".generations"
+# the generations gc keeps before the current one
+KEEP_GENERATIONS = 2
+
+
+class Generations(object):
+    """The generations of the namespace directory at path"""
+
+    def __init__(self, path):
+        self.path = path
+        self.root, self.namespace = os.path.split(os.path.normpath(path))
+        self.generations_path = os.path.join(
+            self.root, GENERATIONS_DIRECTORY, self.namespace
+        )
+
+    @property
+    def enabled(self):
+        """return true if the namespace directory is a generation"""
+        return os.path.islink(self.path)
+
+    def list(self):
+        """return the numbers of the generations, oldest first"""
+        if not os.path.isdir(self.generations_path):
+            return []
+        return sorted(int(g) for g in os.listdir(self.generations_path) if g.isdigit())
+
+    def current(self):
+        """return the number of the current generation, or None without generations"""
+        if not self.enabled:
+            return None
+        return int(os.path.basename(os.readlink(self.path)))
+
+    def generation_path(self, generation):
+        return os.path.join(self.generations_path, str(generation))
+
+    def adopt(self):
+        """
+        make the namespace directory the first generation. the directory
+        is hardlinked into the generation, then moved aside for the
+        symlink, and moved back if the symlink can't take it's place. a
+        directory can't be atomically replaced by a symlink, so the
+        namespace directory is missing between the two renames.
+        """
+        if self.enabled:
+            return self.current()
+        generation = max(self.list() or [0]) + 1
+        generation_path = self.generation_path(generation)
+        logger.debug("Moving %s to generation %s..." % (self.path, generation))
+        try:
+            _copy_tree(self.path, generation_path, hardlink=True)
+        except BaseException:
+            if os.path.exists(generation_path):
+                shutil.rmtree(generation_path)
+            raise
+        backup_path = "%s.%s.bak" % (self.generations_path, os.getpid())
+        os.rename(self.path, backup_path)
+        try:
+            self.switch(generation)
+        except BaseException:
+            os.rename(backup_path, self.path)
+            shutil.rmtree(generation_path)
+            raise
+        shutil.rmtree(backup_path)
+        return generation
+
+    def create(self, changing_features=()):
+        """
+        create a new generation from the current one, and return it's
+        number. the features in changing_features are copied, and the
+        others are hardlinked.
+        """
+        current = self.current()
+        if current is None:
+            raise SprinterException("%s has no generations!" % self.namespace)
+        generation = max(self.list()) + 1
+        source, target = self.generation_path(current), self.generation_path(generation)
+        features_path = os.path.join(source, "features")
+        os.makedirs(target)
+        for name in os.listdir(source):
+            if name == "features":
+                continue
+            _copy_tree(os.path.join(source, name), os.path.join(target, name))
+        if os.path.isdir(features_path):
+            os.makedirs(os.path.join(target, "features"))
+            for feature in os.listdir(features_path):
+                _copy_tree(
+                    os.path.join(features_path, feature),
+                    os.path.join(target, "features", feature),
+                    hardlink=feature not in changing_features,
+                )
+        return generation
+
+    def switch(self, generation):
+        """make generation the current generation"""
+        if not os.path.isdir(self.generation_path(generation)):
+            raise SprinterException(
+                "%s has no generation %s!" % (self.namespace, generation)
+            )
+        temp_path = "%s.%s.tmp" % (self.path, os.getpid())
+        os.symlink(
+            os.path.join(GENERATIONS_DIRECTORY, self.namespace, str(generation)),
+            temp_path,
+        )
+        os.rename(temp_path, self.path)
+
+    def rollback(self):
+        """switch to the generation before the current one, and return it"""
+        current = self.current()
+        previous = [g for g in self.list() if current is not None and g < current]
+        if not previous:
+            raise SprinterException(
+                "%s has no generation to roll back to!" % self.namespace
+            )
+        self.switch(previous[-1])
+        return previous[-1]
+
+    def gc(self, keep=KEEP_GENERATIONS):
+        """
+        remove the generations before the current one, but the <keep>
+        latest of them. the generations after the current one, left by
+        a rollback, are kept. return the generations removed.
+        """
+        current = self.current()
+        if current is None:
+            return []
+        previous = [g for g in self.list() if g < current]
+        removed = previous[:-keep] if keep else previous
+        for generation in removed:
+            logger.debug("Removing generation %s of %s" % (generation, self.namespace))
+            shutil.rmtree(self.generation_path(generation))
+        return removed
+
+    def remove(self):
+        """remove the namespace directory, and every generation"""
+        if self.enabled:
+            os.unlink(self.path)
+        if os.path.exists(self.generations_path):
+            shutil.rmtree(self.generations_path)
+
+
+def _copy_tree(source, target, hardlink=False):
+    """copy source to target, keeping symlinks, and hardlinking files if hardlink is true"""
+    if os.path.islink(source):
+        os.symlink(os.readlink(source), target)
+    elif os.path.isdir(source):
+        os.makedirs(target)
+        shutil.copymode(source, target)
+        for name in os.listdir(source):
+            _copy_tree(os.path.join(source, name), os.path.join(target, name), hardlink)
+    else:
+        _copy_file(source, target, hardlink)
+
+
+def _copy_file(source, target, hardlink):
+    if hardlink:
+        try:
+            os.link(source, target)
+            return
+        except OSError:
+            logger.debug("Unable to hardlink %s, copying it" % source)
+    shutil.copy2(source, target)
@@ -46,6 +46,19 @@ def load_global_config(config_path):
     return config
 
 
+def read_global_config(config_path):
+    """
+    Read the global configuration object without querying for, or
+    writing, missing variables. Used by commands that do not modify state.
+    """
+    config = configparser.RawConfigParser()
+    if os.path.exists(config_path):
+        config.read(config_path)
+    if not config.has_section("global"):
+        config.add_section("global")
+    return config
+
+
 def configure_config(config, reconfigure=False):
     if not config.has_section("shell") or reconfigure:
         _configure_shell(config)
@@ -0,0 +1,87 @@
+"""
+index.py keeps a summary of every installed namespace, so it can be
+reported on without loading each namespace's manifest.
+
+the index is a json file in the global directory:
+
+{"myenv": {"source": "http://example.com/myenv.cfg", "updated": 1400000000.0,
+           "features": 12, "command": "update", "status": "success"}, ...}
+
+updates lock the index.json.lock file next to it while they read,
+merge and write the index, so concurrent sprinter processes don't lose
+each other's entries.
+"""
+from __future__ import unicode_literals
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not on posix, only threads are locked out
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# namespaces may be updated concurrently, see update --all. flock
+# doesn't exclude threads sharing a process, so they take this first.
+_lock = threading.Lock()
+
+
+def load_index(path):
+    """return the index at path, as a dictionary of namespace to entry"""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except ValueError:
+        logger.debug("Unable to parse the namespace index at %s" % path)
+        return {}
+
+
+def update_index(path, namespace, **entry):
+    """
+    update the entry for the namespace, keeping any values not
+    passed in. the time of the update is recorded as 'updated'.
+    """
+    with _locked(path):
+        index = load_index(path)
+        index.setdefault(namespace, {}).update(entry, updated=time.time())
+        _write_index(path, index)
+
+
+def remove_from_index(path, namespace):
+    """remove the entry for the namespace, if one exists"""
+    with _locked(path):
+        index = load_index(path)
+        if index.pop(namespace, None) is not None:
+            _write_index(path, index)
+
+
+@contextmanager
+def _locked(path):
+    """hold the lock on the index at path, against threads and other processes"""
+    with _lock:
+        parent_directory = os.path.dirname(path)
+        if not os.path.exists(parent_directory):
+            os.makedirs(parent_directory)
+        with open(path + ".lock", "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _write_index(path, index):
+    """write the index, replacing the old one atomically so readers never see a partial file"""
+    temp_path = "%s.%s.tmp" % (path, os.getpid())
+    with open(temp_path, "w") as fh:
+        json.dump(index, fh, sort_keys=True, indent=2)
+    os.rename(temp_path, path)
@@ -80,10 +80,13 @@ class Inputs(object):
 
     def __init__(self):
         self._inputs = {}
+        # incremented on every change, so dependent caches can be invalidated
+        self.version = 0
 
     def add_input(self, key, input_instance=None):
         """Add an input <input> with a possible <value>, and <is_secret>"""
         self._inputs[key] = input_instance or Input()
+        self.version += 1
 
     def is_input(self, key):
         """Returns true if <key> is a key"""
@@ -99,6 +102,7 @@ class Inputs(object):
         if key not in self._inputs:
             raise InputException("Key {0} is not a valid input!".format(key))
         self._inputs[key].value = value
+        self.version += 1
 
     def get_input(self, key, force=False):
         """Get the value of <key> if it already exists, or prompt for it if not"""
@@ -134,6 +138,7 @@ class Inputs(object):
                     secret=self._inputs[key].is_secret,
                 )
             self._inputs[key].value = input_value
+            self.version += 1
 
         return self._inputs[key].value
 
@@ -0,0 +1,187 @@
+"""
+interpolation.py resolves the %(section:key)s references between the
+values of a manifest.
+
+every value is parsed once into the references it makes, and resolved
+after the values it references, so each value is substituted exactly
+once. a value that references a key which doesn't exist (e.g. an input
+that has not been entered yet) is left as is, and the missing key is
+recorded so the caller can fill it in and try again.
+"""
+from __future__ import unicode_literals
+import re
+
+from six import string_types
+from sprinter.next.compat import Mapping
+
+# matches an escaped %, or a reference to a key
+REFERENCE_REGEX = re.compile(r"%(?:%|\(([^)]*)\))")
+ESCAPED_SUFFIX = "|escaped"
+# the longest chain of references that can be resolved
+MAX_DEPTH = 5
+
+
+class InterpolationException(Exception):
+    """Returned if the references between values are invalid"""
+
+
+def references(value):
+    """return the keys referenced by the value, in order"""
+    if not isinstance(value, string_types) or "%" not in value:
+        return []
+    return [m.group(1) for m in REFERENCE_REGEX.finditer(value) if m.group(1)]
+
+
+def check_references(values):
+    """
+    raise an InterpolationException if the references between the
+    values are cyclic, or form a chain deeper than MAX_DEPTH.
+    references to keys that are not in values are ignored.
+    """
+    depths = {}
+    for key in values:
+        _reference_depth(values, key, depths, [])
+
+
+def _reference_depth(values, key, depths, path):
+    if key in depths:
+        return depths[key]
+    if key in path:
+        cycle = path[path.index(key) :] + [key]
+        raise InterpolationException(
+            "The references %s are cyclic!" % " -> ".join(cycle)
+        )
+    path.append(key)
+    depth = 0
+    for reference in references(values[key]):
+        reference = _base_key(reference)
+        if reference in values:
+            depth = max(depth, _reference_depth(values, reference, depths, path) + 1)
+    path.pop()
+    if depth > MAX_DEPTH:
+        raise InterpolationException(
+            "The references from %s are more than %s deep!" % (key, MAX_DEPTH)
+        )
+    depths[key] = depth
+    return depth
+
+
+class InterpolationTable(object):
+    """
+    The resolved values of a dictionary of raw values.
+
+    resolved holds the substituted value of every key, and missing the
+    first missing key that kept a value from being substituted.
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self.resolved = {}
+        self.missing = {}
+        for key in values:
+            self._resolve(key, [])
+        self.context_dict = ContextView(self.resolved)
+
+    def substitute(self, value):
+        """
+        substitute a value against the resolved values. returns a tuple
+        of the value, and the missing key that kept it from being
+        substituted, if any.
+        """
+        if not isinstance(value, string_types):
+            return value, None
+        lookup = {}
+        for reference in references(value):
+            base = _base_key(reference)
+            if base not in self.resolved:
+                return value, base
+            if base in self.missing:
+                return value, self.missing[base]
+            if reference == base:
+                lookup[reference] = self.resolved[base]
+            else:
+                lookup[reference] = re.escape(str(self.resolved[base]) or "")
+        if not lookup and "%%" not in value:
+            return value, None
+        try:
+            return value % lookup, None
+        except (ValueError, TypeError):
+            # a % that isn't part of a reference, e.g. in a password
+            return value, None
+
+    def _resolve(self, key, path):
+        if key in self.resolved:
+            return
+        if key in path:
+            # cyclic: leave the value as is
+            self.resolved[key], self.missing[key] = self.values[key], key
+            return
+        path.append(key)
+        for reference in references(self.values[key]):
+            reference = _base_key(reference)
+            if reference in self.values:
+                self._resolve(reference, path)
+        path.pop()
+        if key not in self.resolved:
+            value, missing = self.substitute(self.values[key])
+            self.resolved[key] = value
+            if missing is not None:
+                self.missing[key] = missing
+
+
+class ContextView(Mapping):
+    """
+    A read only view of resolved values, which also contains the
+    escaped form of each value. escaped values are computed on lookup,
+    rather than copied.
+    """
+
+    def __init__(self, resolved):
+        self._resolved = resolved
+
+    def __getitem__(self, key):
+        if key in self._resolved:
+            return self._resolved[key]
+        base = _base_key(key)
+        if base != key and base in self._resolved:
+            return re.escape(str(self._resolved[base]) or "")
+        raise KeyError(key)
+
+    def __iter__(self):
+        for key in self._resolved:
+            yield key
+            yield key + ESCAPED_SUFFIX
+
+    def __len__(self):
+        return len(self._resolved) * 2
+
+
+class SectionView(Mapping):
+    """
+    A read only view of the values of a single section of a context,
+    by their name in the section, e.g. 'url' for 'git:url'
+    """
+
+    def __init__(self, context, section):
+        self._context = context
+        self._prefix = section + ":"
+
+    def __getitem__(self, key):
+        if ":" in key:
+            raise KeyError(key)
+        return self._context[self._prefix + key]
+
+    def __iter__(self):
+        for key in self._context:
+            if key.startswith(self._prefix):
+                yield key[len(self._prefix) :]
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def _base_key(reference):
+    """return the key a reference refers to, without any filter"""
+    if reference.endswith(ESCAPED_SUFFIX):
+        return reference[: -len(ESCAPED_SUFFIX)]
+    return reference
@@ -0,0 +1,57 @@
+"""
+journal.py records the features that have finished syncing during an
+install, so that a failed install can be resumed without redoing them.
+
+the journal is a file in the namespace directory, with one completed
+feature per line, and the fingerprint of the configuration it was
+installed with:
+
+git	sprinter.formula.git	3f786850e387550fdab836ed7e6dc881de23001b
+"""
+from __future__ import unicode_literals
+import io
+import os
+import threading
+
+
+class Journal(object):
+    """A journal of the features that finished syncing"""
+
+    path = None  # the path to the journal file
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def exists(self):
+        """return true if a journal has been written"""
+        return os.path.exists(self.path)
+
+    def completed(self):
+        """
+        return a dictionary of the feature keys that finished syncing, to
+        the fingerprints they were recorded with
+        """
+        completed = {}
+        if not self.exists():
+            return completed
+        with io.open(self.path, encoding="utf-8") as fh:
+            for line in fh:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) >= 2:
+                    fingerprint = fields[2] if len(fields) > 2 else None
+                    completed[(fields[0], fields[1])] = fingerprint
+        return completed
+
+    def record(self, feature, fingerprint=None):
+        """record the feature key as finished with fingerprint, durably"""
+        with self._lock:
+            with io.open(self.path, "a", encoding="utf-8") as fh:
+                fh.write("%s\t%s\t%s\n" % (feature[0], feature[1], fingerprint or ""))
+                fh.flush()
+                os.fsync(fh.fileno())
+
+    def clear(self):
+        """remove the journal"""
+        if self.exists():
+            os.unlink(self.path)
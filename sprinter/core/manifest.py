@@ -10,19 +10,29 @@ The manifest can take a source and/or a target manifest
 """
 from __future__ import unicode_literals
 
+import hashlib
+import json
 import logging
 import os
 import re
 import sys
+import threading
+from contextlib import contextmanager
 from io import StringIO
 
 from six.moves import configparser
-from six import string_types
-import requests
+from six import reraise, string_types
 import sprinter.lib as lib
-from sprinter.next.compat import create_configparser
+from sprinter.next.compat import ChainMap, create_configparser
 from sprinter.lib.dependencytree import DependencyTree, DependencyTreeException
+from . import compiledmanifest
 from .featureconfig import FeatureConfig
+from .interpolation import (
+    InterpolationException,
+    InterpolationTable,
+    SectionView,
+    check_references,
+)
 from .inputs import Inputs
 
 CONFIG_RESERVED = ["source", "inputs"]
@@ -30,6 +40,10 @@ FEATURE_RESERVED = ["rc", "command", "phase"]
 NAMESPACE_REGEX = re.compile("([a-zA-Z0-9_]+)(\.[a-zA-Z0-9_]+)?$")
 MANIFEST_NULL_KEY = object()
 
+_shared_manifest_cache = (
+    None  # parent manifests shared between loads, see shared_manifest_cache()
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,13 +52,34 @@ def load_manifest(raw_manifest, namespace=None, **kwargs):
     if isinstance(raw_manifest, configparser.RawConfigParser):
         return Manifest(raw_manifest)
 
-    manifest = create_configparser()
+    compiled = _load_compiled_manifest(raw_manifest, **kwargs)
+    if compiled is not None:
+        installed_manifest = Manifest(
+            compiledmanifest.build_raw_manifest(compiled, _empty_raw_manifest()),
+            namespace=namespace,
+            inputs=compiledmanifest.build_inputs(compiled),
+            dtree=compiledmanifest.build_dependency_tree(compiled),
+        )
+        installed_manifest.target_digest = compiled.get("target_digest")
+        return installed_manifest
+
+    return Manifest(load_raw_manifest(raw_manifest, **kwargs), namespace=namespace)
+
+
+def load_raw_manifest(source, **kwargs):
+    """
+    return the RawConfigParser of the manifest at <source>, with it's
+    parents, without interpreting it
+    """
+    manifest = _empty_raw_manifest()
+    _load_manifest_interpret_source(manifest, source, **kwargs)
+    return manifest
 
-    if not manifest.has_section("config"):
-        manifest.add_section("config")
 
-    _load_manifest_interpret_source(manifest, raw_manifest, **kwargs)
-    return Manifest(manifest, namespace=namespace)
+def _empty_raw_manifest():
+    manifest = create_configparser()
+    manifest.add_section("config")
+    return manifest
 
 
 def _load_manifest_interpret_source(
@@ -57,35 +92,29 @@ def _load_manifest_interpret_source(
 ):
     """Interpret the <source>, and load the results into <manifest>"""
     try:
-        if isinstance(source, string_types):
-            if source.startswith("http"):
-                # if manifest is a url
-                _load_manifest_from_url(
-                    manifest,
-                    source,
-                    verify_certificate=verify_certificate,
-                    username=username,
-                    password=password,
-                )
-            else:
-                _load_manifest_from_file(manifest, source)
-            if not manifest.has_option("config", "source"):
-                manifest.set("config", "source", str(source))
-        else:
-            # assume source is a file pointer
-            manifest.readfp(source)
+        _load_manifest_source(
+            manifest,
+            source,
+            username=username,
+            password=password,
+            verify_certificate=verify_certificate,
+        )
         if manifest.has_option("config", "extends") and do_inherit:
-            parent_manifest = configparser.RawConfigParser()
-            _load_manifest_interpret_source(
-                parent_manifest,
+            chain = [source] if isinstance(source, string_types) else []
+            parents = _load_parents(
                 manifest.get("config", "extends"),
+                chain,
+                _shared_manifest_cache or _ManifestCache(),
                 username=username,
                 password=password,
                 verify_certificate=verify_certificate,
             )
-            for s in parent_manifest.sections():
-                for k, v in parent_manifest.items(s):
-                    if not manifest.has_option(s, k):
+            for s, options in _inherited_sections(parents).items():
+                if not manifest.has_section(s):
+                    manifest.add_section(s)
+                own_options = set(manifest.options(s))
+                for k, v in options.items():
+                    if k not in own_options:
                         manifest.set(s, k, v)
 
     except configparser.Error:
@@ -94,10 +123,156 @@ def _load_manifest_interpret_source(
         raise ManifestException("Unable to parse manifest!: {0}".format(error_message))
 
 
+def _load_compiled_manifest(source, do_inherit=True, **kwargs):
+    """
+    return the compiled form of the manifest file at <source>, if it is
+    still up to date. manifests that extend others are compiled without
+    their parents, so are only used if they won't be inherited.
+    """
+    if not isinstance(source, string_types) or source.startswith("http"):
+        return None
+    path = os.path.abspath(os.path.expanduser(source))
+    if not os.path.exists(path):
+        return None
+    compiled = compiledmanifest.load_compiled_manifest(path)
+    if compiled is None or (
+        do_inherit
+        and any(
+            s == "config" and "extends" in dict(items)
+            for s, items in compiled["sections"]
+        )
+    ):
+        return None
+    return compiled
+
+
+def _load_manifest_source(manifest, source, **kwargs):
+    """load the <source> into <manifest>, without it's parents"""
+    if isinstance(source, string_types):
+        if source.startswith("http"):
+            # if manifest is a url
+            _load_manifest_from_url(manifest, source, **kwargs)
+        else:
+            _load_manifest_from_file(manifest, source)
+        if not manifest.has_option("config", "source"):
+            manifest.set("config", "source", str(source))
+    else:
+        # assume source is a file pointer
+        manifest.readfp(source)
+
+
+@contextmanager
+def shared_manifest_cache():
+    """
+    Share the parent manifests loaded through 'extends' between the
+    manifests loaded within the block, so each is only loaded once
+    """
+    global _shared_manifest_cache
+    _shared_manifest_cache = _ManifestCache()
+    try:
+        yield _shared_manifest_cache
+    finally:
+        _shared_manifest_cache = None
+
+
+class _ManifestCache(object):
+    """
+    The sections of loaded parent manifests, without their own parents.
+    A source being loaded by one thread is waited for by the others.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, load):
+        with self._lock:
+            entry = self._entries.get(key)
+            is_loader = entry is None
+            if is_loader:
+                entry = self._entries[key] = {"done": threading.Event()}
+        if is_loader:
+            try:
+                entry["value"] = load()
+            except Exception:
+                entry["error"] = sys.exc_info()
+                with self._lock:
+                    del self._entries[key]
+            entry["done"].set()
+        else:
+            entry["done"].wait()
+        if "error" in entry:
+            reraise(*entry["error"])
+        return entry["value"]
+
+
+def _load_parents(extends, chain, cache, **kwargs):
+    """
+    return the sections of every manifest in <extends>, with their own
+    parents applied, in the order they are listed. multiple parents are
+    loaded concurrently.
+    """
+    sources = [e.strip() for e in re.split("\n|,", extends) if e.strip()]
+    for source in sources:
+        if source in chain:
+            raise ManifestException(
+                "Manifest inheritance is cyclic! %s"
+                % " -> ".join(chain[chain.index(source) :] + [source])
+            )
+
+    def load_parent(source):
+        return _load_parent(source, chain + [source], cache, **kwargs)
+
+    if len(sources) <= 1:
+        return [load_parent(source) for source in sources]
+    from multiprocessing.pool import ThreadPool
+
+    pool = ThreadPool(len(sources))
+    try:
+        return pool.map(load_parent, sources)
+    finally:
+        pool.close()
+
+
+def _load_parent(source, chain, cache, **kwargs):
+    """return the sections of the parent manifest <source>, with it's parents applied"""
+
+    def load():
+        parent_manifest = configparser.RawConfigParser()
+        parent_manifest.add_section("config")
+        _load_manifest_source(parent_manifest, source, **kwargs)
+        return dict(
+            (s, dict(parent_manifest.items(s))) for s in parent_manifest.sections()
+        )
+
+    sections = cache.get(
+        (source, kwargs.get("username"), kwargs.get("verify_certificate")), load
+    )
+    extends = sections.get("config", {}).get("extends")
+    if not extends:
+        return sections
+    inherited = _inherited_sections(_load_parents(extends, chain, cache, **kwargs))
+    for s, options in sections.items():
+        inherited[s] = dict(inherited.get(s, {}), **options)
+    return inherited
+
+
+def _inherited_sections(parents):
+    """merge the sections of the parents, with earlier parents taking precedence"""
+    inherited = {}
+    for parent in reversed(parents):
+        for s, options in parent.items():
+            inherited.setdefault(s, {}).update(options)
+    return inherited
+
+
 def _load_manifest_from_url(
     manifest, url, verify_certificate=True, username=None, password=None
 ):
     """load a url body into a manifest"""
+    # requests is slow to import, so it is only imported when a url is loaded
+    import requests
+
     try:
         if username and password:
             manifest_file_handler = StringIO(
@@ -105,12 +280,16 @@ def _load_manifest_from_url(
                     username, password, url, verify=verify_certificate
                 ).decode("utf-8")
             )
+        elif lib.request.http_cache_enabled():
+            manifest_file_handler = StringIO(
+                lib.request.cached_get(url, verify=verify_certificate).decode("utf-8")
+            )
         else:
             manifest_file_handler = StringIO(
                 lib.cleaned_request("get", url, verify=verify_certificate).text
             )
         manifest.readfp(manifest_file_handler)
-    except requests.exceptions.RequestException:
+    except (requests.exceptions.RequestException, lib.OfflineException):
         logger.debug("", exc_info=True)
         error_message = sys.exc_info()[1]
         raise ManifestException(
@@ -146,17 +325,35 @@ class Manifest(object):
     """
 
     dtree = None  # dependency tree object to ascertain order
-    additional_context_variables = (
-        {}
-    )  # a list of the additional context variables available
-
-    def __init__(self, raw_manifest, namespace=None):
+    _interpolation_table = (
+        None  # the cached resolved values, see get_interpolation_table
+    )
+    _context_inputs_version = None  # the version of the inputs it was built with
+    _digest = None  # the cached digest, see digest
+    target_digest = None  # the digest of the manifest this was installed from, if known
+    _section_digests = {}  # the cached digest of each section
+    _sections_context = None  # the cached raw values of every section
+    # the runtime variables, e.g. root_dir, layered over the inputs and sections
+    additional_context_variables = None
+
+    def __init__(self, raw_manifest, namespace=None, inputs=None, dtree=None):
+        """
+        inputs and dtree can be passed if they have already been
+        parsed from the raw_manifest, e.g. by a compiled manifest
+        """
         self.manifest = raw_manifest
+        # per manifest, so environments in the same process don't share context
+        self.additional_context_variables = {}
+        self._section_digests = {}
         if not self.manifest.has_section("config"):
             self.manifest.add_section("config")
-        self.inputs = self.__setup_inputs()
+        self.inputs = inputs if inputs is not None else self.__setup_inputs()
         self.namespace = namespace or self.__parse_namespace()
-        self.dtree = self.__generate_dependency_tree()
+        if dtree is not None:
+            self.dtree = dtree
+        else:
+            self.dtree = self.__generate_dependency_tree()
+            self.__check_references()
 
     @staticmethod
     def from_dict(d):
@@ -199,7 +396,46 @@ class Manifest(object):
             self.get(section, option)
         )
 
+    def set(self, section, option, value):
+        self.__invalidate(section)
+        self.manifest.set(section, option, value)
+
+    def remove_option(self, section, option):
+        self.__invalidate(section)
+        return self.manifest.remove_option(section, option)
+
+    def add_section(self, section):
+        self.__invalidate(section)
+        return self.manifest.add_section(section)
+
+    def remove_section(self, section):
+        self.__invalidate(section)
+        return self.manifest.remove_section(section)
+
+    def refresh_dependency_tree(self):
+        """regenerate the dependency tree, once sections have been added or removed"""
+        self.dtree = self.__generate_dependency_tree()
+
+    def digest(self):
+        """
+        return a digest of the manifest's sections and options, which
+        is the same for manifests with the same content regardless of
+        their order. the source of the manifest is not included, as it
+        is where the manifest was loaded from rather than it's content.
+
+        the digest of each section is cached until the section changes.
+        """
+        if self._digest is None:
+            sha = hashlib.sha1()
+            for s in sorted(self.manifest.sections()):
+                if s not in self._section_digests:
+                    self._section_digests[s] = self.__section_digest(s)
+                sha.update(self._section_digests[s].encode("utf-8"))
+            self._digest = sha.hexdigest()
+        return self._digest
+
     def set_input(self, key, value):
+        self._interpolation_table = None
         if self.inputs.is_input(key):
             self.inputs.set_input(key, value)
         self.set("config", key, value)
@@ -218,27 +454,71 @@ class Manifest(object):
         """Return a FeatureConfig for the feature name provided"""
         return FeatureConfig(self, feature_name)
 
-    def get_context_dict(self):
-        """return a context dict of the desired state"""
-        context_dict = {}
-        for s in self.sections():
-            for k, v in self.manifest.items(s):
-                context_dict["%s:%s" % (s, k)] = v
-        for k, v in self.inputs.values().items():
-            context_dict["config:{0}".format(k)] = v
-        context_dict.update(self.additional_context_variables.items())
-        context_dict.update(
-            dict(
-                [
-                    ("%s|escaped" % k, re.escape(str(v) or ""))
-                    for k, v in context_dict.items()
-                ]
+    def get_context_dict(self, feature_name=None):
+        """
+        return a context dict of the desired state, with references
+        between values resolved.
+
+        if a feature_name is passed, the feature's own values are also
+        available by their name in the feature, e.g. 'url' for
+        'git:url'.
+
+        the dict is a view of values cached until the manifest or it's
+        inputs change: it can not be modified.
+        """
+        context = self.get_interpolation_table().context_dict
+        if feature_name is None:
+            return context
+        return ChainMap(SectionView(context, feature_name), context)
+
+    def get_interpolation_table(self):
+        """
+        return the InterpolationTable of every value in the manifest,
+        cached until the manifest or it's inputs change.
+        """
+        if (
+            self._interpolation_table is None
+            or self._context_inputs_version != self.inputs.version
+        ):
+            self._context_inputs_version = self.inputs.version
+            self._interpolation_table = InterpolationTable(self.__raw_context_values())
+        return self._interpolation_table
+
+    def __raw_context_values(self):
+        """
+        return the raw values of the manifest, as layers of the runtime
+        variables, over the inputs, over the sections
+        """
+        if self._sections_context is None:
+            self._sections_context = dict(
+                ("%s:%s" % (s, k), v)
+                for s in self.sections()
+                for k, v in self.manifest.items(s)
             )
+        inputs_context = dict(
+            ("config:%s" % k, v) for k, v in self.inputs.values().items()
+        )
+        return ChainMap(
+            self.additional_context_variables, inputs_context, self._sections_context
         )
-        return context_dict
+
+    def __invalidate(self, section):
+        self._interpolation_table = None
+        self._sections_context = None
+        self._digest = None
+        self._section_digests.pop(section, None)
+
+    def __section_digest(self, section):
+        options = sorted(
+            (k, v)
+            for k, v in self.manifest.items(section)
+            if not (section == "config" and k == "source")
+        )
+        return hashlib.sha1(json.dumps([section, options]).encode("utf-8")).hexdigest()
 
     def add_additional_context(self, additional_context):
         """Add additional context variable"""
+        self._interpolation_table = None
         self.additional_context_variables.update(additional_context)
 
     def get(self, section, key, default=MANIFEST_NULL_KEY):
@@ -275,6 +555,7 @@ class Manifest(object):
                     dependency_list = [
                         d.strip()
                         for d in re.split("\n|,", self.manifest.get(s, "depends"))
+                        if d.strip()
                     ]
                     dependency_dict[s] = dependency_list
                 else:
@@ -287,6 +568,17 @@ class Manifest(object):
                 "Dependency tree for manifest is invalid! %s" % str(dte)
             )
 
+    def __check_references(self):
+        """
+        Check the references between values are not cyclic, or too deep
+        to resolve
+        """
+        try:
+            check_references(self.__raw_context_values())
+        except InterpolationException:
+            ie = sys.exc_info()[1]
+            raise ManifestException("Manifest references are invalid! %s" % str(ie))
+
     def __substitute_objects(self, value, context_dict):
         """
         recursively substitute value with the context_dict
@@ -323,17 +615,10 @@ class Manifest(object):
 
     # custom equality method
     def __eq__(self, other):
-        if not isinstance(other, Manifest):
-            return False
-        for s in self.manifest.sections():
-            if s not in other.manifest.sections():
-                return False
-            for option in self.manifest.options(s):
-                if not other.manifest.has_option(s, option) or self.manifest.get(
-                    s, option
-                ) != other.manifest.get(s, option):
-                    return False
-        return True
+        return isinstance(other, Manifest) and self.digest() == other.digest()
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
 
     # act like a configparser if asking for a non-existent method.
     def __getattr__(self, name):
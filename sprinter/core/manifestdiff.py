@@ -0,0 +1,128 @@
+"""
+manifestdiff.py computes the differences between a source and a target
+manifest: the features added, removed and changed, and for a changed
+feature the value of each changed option before and after.
+
+values are compared after references between them are resolved, so a
+feature whose options reference a changed input is changed as well.
+"""
+from __future__ import unicode_literals
+
+
+class FeatureChanges(object):
+    """
+    The changes to a single feature. options is a dictionary of every
+    option that differs, to a tuple of it's value before and after. an
+    option that does not exist on one side has the value None.
+    """
+
+    def __init__(self, feature, before=None, after=None):
+        self.feature = feature
+        self.added = before is None and after is not None
+        self.removed = after is None and before is not None
+        before, after = before or {}, after or {}
+        self.options = dict(
+            (k, (before.get(k), after.get(k)))
+            for k in set(before) | set(after)
+            if before.get(k) != after.get(k)
+        )
+
+    @classmethod
+    def from_configs(cls, feature, source, target):
+        """return the changes between two FeatureConfigs"""
+        return cls(
+            feature,
+            dict((k, source.get(k)) for k in source.keys()) if source else None,
+            dict((k, target.get(k)) for k in target.keys()) if target else None,
+        )
+
+    def changed(self, *options):
+        """
+        return true if any of the options changed, or if any option
+        changed if none are passed
+        """
+        if not options:
+            return bool(self.options)
+        return any(o in self.options for o in options)
+
+    def __contains__(self, option):
+        return option in self.options
+
+    def __bool__(self):
+        return bool(self.options)
+
+    __nonzero__ = __bool__
+
+    def __repr__(self):
+        return "<FeatureChanges for '{0}': {1}>".format(
+            self.feature, sorted(self.options)
+        )
+
+
+class ManifestDiff(object):
+    """
+    The differences between a source and target manifest. either can
+    be None, e.g. the source of an install.
+
+    added and removed are the names of the features only in the
+    target or the source, and changed is a dictionary of the names of
+    features in both that differ, to their FeatureChanges.
+    """
+
+    def __init__(self, source, target):
+        self.added = []
+        self.removed = []
+        self.changed = {}
+        source_sections = _resolved_sections(source)
+        target_sections = _resolved_sections(target)
+        for name in _names(target, source):
+            changes = FeatureChanges(
+                name, source_sections.get(name), target_sections.get(name)
+            )
+            if changes.added:
+                self.added.append(name)
+            elif changes.removed:
+                self.removed.append(name)
+            elif changes:
+                self.changed[name] = changes
+
+    def __getitem__(self, feature):
+        """return the FeatureChanges of a feature, which are empty if it is unchanged"""
+        if feature in self.changed:
+            return self.changed[feature]
+        if feature in self.added:
+            return FeatureChanges(feature, None, {})
+        if feature in self.removed:
+            return FeatureChanges(feature, {}, None)
+        return FeatureChanges(feature, {}, {})
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    __nonzero__ = __bool__
+
+
+def _names(*manifests):
+    """return the names of the features of the manifests, in order"""
+    names = []
+    for manifest in manifests:
+        if manifest:
+            names += [s for s in manifest.formula_sections() if s not in names]
+    return names
+
+
+def _resolved_sections(manifest):
+    """
+    return a dictionary of each feature of the manifest to it's
+    resolved options, from a single pass over it's resolved values
+    """
+    sections = {}
+    if not manifest:
+        return sections
+    for s in manifest.formula_sections():
+        sections[s] = {}
+    resolved = manifest.get_interpolation_table().resolved
+    for s in sections:
+        for k in manifest.manifest.options(s):
+            sections[s][k] = resolved.get("%s:%s" % (s, k))
+    return sections
@@ -0,0 +1,196 @@
+"""
+plan.py computes the action each feature would take to move from a
+source manifest to a target manifest, without instantiating formulas
+or touching the file system.
+
+given the fingerprints of the last install or update, a feature is
+skipped exactly when an update would skip it: when its fingerprint is
+unchanged, or when the target is the manifest the source was
+installed from.
+"""
+from __future__ import unicode_literals
+from collections import namedtuple
+
+import sprinter.lib as lib
+from sprinter.exceptions import SprinterException
+from sprinter.feature import _get_phase
+from sprinter.formula.base import FormulaBase
+from sprinter.lib import system
+from .core import PHASE
+from .fingerprints import config_fingerprint
+
+SKIP = "skip"
+UNCHANGED = "configuration is unchanged"
+ALWAYS_UPDATE = "always_update is set"
+
+PlannedAction = namedtuple("PlannedAction", ["feature", "formula", "action", "reason"])
+
+_FeatureConfigs = namedtuple("_FeatureConfigs", ["source", "target"])
+
+
+def plan_features(source, target, fingerprints=None):
+    """
+    return a list of PlannedActions, one for each feature in the source
+    and target manifests, in the order they would be run: the target's
+    features in dependency order, then the features only in the source.
+
+    the action is the name of the phase (install, update or remove),
+    or 'skip' if the feature would not change. fingerprints are the
+    fingerprints of the features the last install or update synced.
+    """
+    source_context = _context_dict(source)
+    target_context = _context_dict(target)
+    names = []
+    for manifest in (target, source):
+        if manifest:
+            names += [s for s in manifest.formula_sections() if s not in names]
+    target_unchanged = fingerprints is not None and _is_target_unchanged(source, target)
+
+    planned_actions = []
+    for name in names:
+        source_config = _resolved_section(source, name, source_context)
+        target_config = _resolved_section(target, name, target_context)
+        source_formula = (source_config or {}).get("formula")
+        target_formula = (target_config or {}).get("formula")
+        if source_config and target_config and source_formula != target_formula:
+            planned_actions.append(
+                _plan_feature(
+                    name,
+                    source_config,
+                    None,
+                    "formula changed to %s" % target_formula,
+                )
+            )
+            planned_actions.append(
+                _plan_feature(
+                    name,
+                    None,
+                    target_config,
+                    "formula changed from %s" % source_formula,
+                )
+            )
+        else:
+            planned = _plan_feature(name, source_config, target_config)
+            if planned.action == PHASE.UPDATE.name and target_unchanged:
+                planned = planned._replace(
+                    action=SKIP,
+                    reason="the manifest is unchanged since the last update",
+                )
+            elif fingerprints is not None and (
+                planned.action == PHASE.UPDATE.name or planned.reason == UNCHANGED
+            ):
+                planned = _plan_fingerprinted_feature(
+                    planned, source_config, target_config, fingerprints
+                )
+            planned_actions.append(planned)
+    return planned_actions
+
+
+def _plan_fingerprinted_feature(planned, source_config, target_config, fingerprints):
+    """
+    return the planned update of a feature, skipped if and only if its
+    fingerprint is the one recorded by the last install or update
+    """
+    if planned.reason == ALWAYS_UPDATE:
+        return planned
+    try:
+        formula_class = lib.get_subclass_from_module(planned.formula, FormulaBase)
+    except (SprinterException, ImportError):
+        # the formula isn't installed yet, so its fingerprint is unknown
+        return planned
+    # the options the formula's resolve carries over from the source
+    config = dict(target_config)
+    for k, v in source_config.items():
+        if k not in formula_class.dont_carry_over_options and k not in config:
+            config[k] = v
+    fingerprint = config_fingerprint(
+        dict((k, str(v)) for k, v in config.items()), formula_class
+    )
+    if fingerprints.get(planned.feature) == fingerprint:
+        return planned._replace(action=SKIP, reason="unchanged since the last update")
+    if planned.action == SKIP:
+        reason = (
+            "changed since the last update"
+            if planned.feature in fingerprints
+            else "not synced by the last update"
+        )
+        return planned._replace(action=PHASE.UPDATE.name, reason=reason)
+    return planned
+
+
+def _is_target_unchanged(source, target):
+    """
+    return true if the target is the manifest the source was installed
+    from, so an update would skip every feature
+    """
+    if not (source and target) or source.target_digest is None:
+        return False
+    if any(
+        lib.is_affirmative(target.get(s, "always_update", default="false"))
+        for s in target.formula_sections()
+    ):
+        return False
+    return target.digest() == source.target_digest
+
+
+def _plan_feature(name, source_config, target_config, reason=None):
+    config = target_config or source_config
+    formula = config.get("formula")
+    if not formula:
+        return PlannedAction(name, None, SKIP, "no formula is specified")
+    if "systems" in config and not system.is_in_systems(config["systems"]):
+        return PlannedAction(name, formula, SKIP, "only runs on %s" % config["systems"])
+    phase = _get_phase(_FeatureConfigs(source_config, target_config))
+    if phase is PHASE.INSTALL:
+        return PlannedAction(
+            name, formula, phase.name, reason or "not in the installed manifest"
+        )
+    if phase is PHASE.REMOVE:
+        return PlannedAction(
+            name, formula, phase.name, reason or "not in the target manifest"
+        )
+    if "always_update" in target_config and lib.is_affirmative(
+        target_config["always_update"]
+    ):
+        return PlannedAction(name, formula, phase.name, ALWAYS_UPDATE)
+    changed = _changed_options(source_config, target_config)
+    if changed:
+        return PlannedAction(
+            name, formula, phase.name, "changed %s" % ", ".join(changed)
+        )
+    return PlannedAction(name, formula, SKIP, UNCHANGED)
+
+
+def _changed_options(source_config, target_config):
+    """
+    return the sorted options that differ between the source and
+    target, accounting for options that carry over from the source.
+    """
+    changed = []
+    for k in set(source_config) | set(target_config):
+        if k not in target_config and k not in FormulaBase.dont_carry_over_options:
+            continue
+        if source_config.get(k) != target_config.get(k):
+            changed.append(k)
+    return sorted(changed)
+
+
+def _resolved_section(manifest, name, context_dict):
+    """
+    return the options of a section, substituted against the context
+    dict. values that can not be substituted (e.g. they reference
+    inputs that have not been entered yet) are left as is.
+    """
+    if not manifest or not manifest.has_section(name):
+        return None
+    resolved = {}
+    for k, v in manifest.items(name):
+        try:
+            resolved[k] = v % context_dict
+        except (KeyError, ValueError, TypeError):
+            resolved[k] = v
+    return resolved
+
+
+def _context_dict(manifest):
+    return manifest.get_context_dict() if manifest else {}
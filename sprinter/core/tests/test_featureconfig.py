@@ -0,0 +1,67 @@
+from __future__ import unicode_literals
+from io import StringIO
+
+from mock import patch
+from nose.tools import eq_, raises
+
+from sprinter.core.manifest import ManifestException, load_manifest
+
+manifest_featureconfig = """
+[config]
+inputs = user==me
+
+[feature]
+formula = sprinter.formula.base
+root = /home/%(config:user)s
+bin = %(feature:root)s/bin
+"""
+
+
+manifest_unset_input = """
+[config]
+inputs = user
+
+[feature]
+root = /home/%(config:user)s
+"""
+
+manifest_cyclic = """
+[feature]
+a = %(feature:b)s
+b = %(feature:a)s
+"""
+
+
+class TestFeatureConfig(object):
+    """Tests for the feature config"""
+
+    def setup(self):
+        self.manifest = load_manifest(StringIO(manifest_featureconfig))
+        self.feature_config = self.manifest.get_feature_config("feature")
+
+    def test_get(self):
+        """values should be substituted against the feature and the manifest"""
+        eq_(self.feature_config.get("bin"), "/home/me/bin")
+
+    def test_get_after_change(self):
+        """changes to the feature or manifest should be reflected in substitution"""
+        self.feature_config.get("bin")
+        self.feature_config.set("root", "/opt")
+        eq_(self.feature_config.get("bin"), "/opt/bin")
+        self.feature_config.set("root", "/home/%(config:user)s")
+        self.manifest.set_input("user", "you")
+        eq_(self.feature_config.get("bin"), "/home/you/bin")
+
+    def test_get_prompts_for_input(self):
+        """an unset input should be prompted for when a value needs it"""
+        manifest = load_manifest(StringIO(manifest_unset_input))
+        feature_config = manifest.get_feature_config("feature")
+        with patch("sprinter.lib.prompt") as prompt:
+            prompt.return_value = "you"
+            eq_(feature_config.get("root"), "/home/you")
+            eq_(prompt.call_count, 1)
+
+    @raises(ManifestException)
+    def test_cyclic_references(self):
+        """a manifest with cyclic references should fail to load"""
+        load_manifest(StringIO(manifest_cyclic))
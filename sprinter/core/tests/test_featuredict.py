@@ -1,6 +1,6 @@
 from __future__ import unicode_literals
 from nose.tools import ok_, eq_
-from mock import Mock
+from mock import Mock, patch
 from io import StringIO
 from six.moves import configparser
 from sprinter.core.featuredict import FeatureDict
@@ -62,3 +62,21 @@ class TestFeatureDict:
                 ]
             ),
         )
+
+    def test_read_only_keeps_eggs(self):
+        """a read only environment should not delete the formula eggs"""
+        with patch("sprinter.external.pippuppet.Pip") as pip:
+            FeatureDict(
+                Mock(read_only=True),
+                self.source_manifest,
+                self.target_manifest,
+                "dummy_path",
+            )
+            ok_(not pip.return_value.delete_all_eggs.called)
+            FeatureDict(
+                Mock(read_only=False),
+                self.source_manifest,
+                self.target_manifest,
+                "dummy_path",
+            )
+            ok_(pip.return_value.delete_all_eggs.called)
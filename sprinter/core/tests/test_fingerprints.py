@@ -0,0 +1,71 @@
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+
+from nose.tools import eq_, ok_
+
+from sprinter.core.fingerprints import (
+    feature_fingerprint,
+    load_fingerprints,
+    write_fingerprints,
+)
+from sprinter.core.manifest import Manifest
+from sprinter.formula.base import FormulaBase
+
+
+class OtherFormula(FormulaBase):
+    pass
+
+
+class TestFingerprints(object):
+    """Tests for feature fingerprints"""
+
+    def setup(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.manifest = Manifest.from_dict(
+            {"config": {"user": "foo"}, "git": {"url": "%(config:user)s/git"}}
+        )
+
+    def teardown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_fingerprint_is_stable(self):
+        """the same configuration should produce the same fingerprint"""
+        eq_(
+            feature_fingerprint(self.manifest.get_feature_config("git"), FormulaBase),
+            feature_fingerprint(self.manifest.get_feature_config("git"), FormulaBase),
+        )
+
+    def test_fingerprint_uses_resolved_values(self):
+        """a change to a referenced value should change the fingerprint"""
+        before = feature_fingerprint(
+            self.manifest.get_feature_config("git"), FormulaBase
+        )
+        self.manifest.set("config", "user", "bar")
+        after = feature_fingerprint(
+            self.manifest.get_feature_config("git"), FormulaBase
+        )
+        ok_(before != after)
+
+    def test_fingerprint_includes_formula(self):
+        """a different formula class should change the fingerprint"""
+        config = self.manifest.get_feature_config("git")
+        ok_(
+            feature_fingerprint(config, FormulaBase)
+            != feature_fingerprint(config, OtherFormula)
+        )
+
+    def test_write_and_load(self):
+        """fingerprints should round trip through the file"""
+        path = os.path.join(self.temp_dir, "fingerprints.json")
+        write_fingerprints(path, {"git": "abc"})
+        eq_(load_fingerprints(path), {"git": "abc"})
+
+    def test_load_missing_file(self):
+        """a missing or corrupt file should return no fingerprints"""
+        path = os.path.join(self.temp_dir, "fingerprints.json")
+        eq_(load_fingerprints(path), {})
+        with open(path, "w+") as fh:
+            fh.write("{not json")
+        eq_(load_fingerprints(path), {})
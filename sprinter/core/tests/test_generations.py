@@ -0,0 +1,104 @@
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+
+from mock import patch
+from nose.tools import eq_, ok_, raises
+
+from sprinter.core.directory import Directory
+from sprinter.core.generations import Generations
+from sprinter.exceptions import SprinterException
+
+
+class TestGenerations(object):
+    """Tests for the generations of a namespace directory"""
+
+    def setup(self):
+        self.root = tempfile.mkdtemp()
+        self.path = os.path.join(self.root, "myenv")
+        for feature in ("kept", "changed"):
+            os.makedirs(os.path.join(self.path, "features", feature))
+            with open(os.path.join(self.path, "features", feature, "file"), "w") as fh:
+                fh.write(feature)
+        os.makedirs(os.path.join(self.path, "bin"))
+        os.symlink(
+            os.path.join(self.path, "features", "kept", "file"),
+            os.path.join(self.path, "bin", "kept"),
+        )
+        self.generations = Generations(self.path)
+
+    def teardown(self):
+        shutil.rmtree(self.root)
+
+    def test_adopt(self):
+        """adopting a namespace directory should make it the first generation"""
+        ok_(not self.generations.enabled)
+        eq_(self.generations.adopt(), 1)
+        ok_(os.path.islink(self.path))
+        eq_(self.generations.current(), 1)
+        ok_(os.path.exists(os.path.join(self.path, "features", "kept", "file")))
+        eq_(self.generations.adopt(), 1)
+
+    def test_failed_adopt_keeps_directory(self):
+        """if the symlink can't replace the namespace directory, it should be put back"""
+        with patch.object(Generations, "switch", side_effect=OSError("failed")):
+            try:
+                self.generations.adopt()
+            except OSError:
+                pass
+            else:
+                raise AssertionError("the failure was not raised!")
+        ok_(not os.path.islink(self.path))
+        ok_(os.path.exists(os.path.join(self.path, "features", "kept", "file")))
+        eq_(self.generations.list(), [])
+        eq_(os.listdir(os.path.dirname(self.generations.generations_path)), ["myenv"])
+
+    def test_create(self):
+        """a new generation should hardlink the features that are not changing"""
+        self.generations.adopt()
+        eq_(self.generations.create(["changed"]), 2)
+        first, second = (self.generations.generation_path(g) for g in (1, 2))
+        for feature, shared in (("kept", True), ("changed", False)):
+            path = os.path.join("features", feature, "file")
+            eq_(
+                os.stat(os.path.join(first, path)).st_ino
+                == os.stat(os.path.join(second, path)).st_ino,
+                shared,
+            )
+        eq_(
+            os.readlink(os.path.join(second, "bin", "kept")),
+            os.path.join(self.path, "features", "kept", "file"),
+        )
+        eq_(self.generations.current(), 1)
+
+    def test_switch_and_rollback(self):
+        """rolling back should switch to the generation before the current one"""
+        self.generations.adopt()
+        self.generations.switch(self.generations.create())
+        eq_(self.generations.current(), 2)
+        eq_(self.generations.rollback(), 1)
+        eq_(self.generations.current(), 1)
+
+    @raises(SprinterException)
+    def test_rollback_without_previous_generation(self):
+        """rolling back the first generation should fail"""
+        self.generations.adopt()
+        self.generations.rollback()
+
+    def test_gc(self):
+        """gc should keep the current generation, the last before it, and later ones"""
+        self.generations.adopt()
+        for _ in range(4):
+            self.generations.switch(self.generations.create())
+        self.generations.switch(3)
+        eq_(self.generations.gc(keep=1), [1])
+        eq_(self.generations.list(), [2, 3, 4, 5])
+        eq_(self.generations.gc(keep=0), [2])
+
+    def test_directory_remove(self):
+        """removing the directory should remove every generation"""
+        self.generations.adopt()
+        Directory(self.path).remove()
+        ok_(not os.path.lexists(self.path))
+        ok_(not os.path.exists(self.generations.generations_path))
@@ -1,5 +1,14 @@
+import os
+import shutil
+import tempfile
+
 from mock import patch
-from sprinter.core.globals import create_default_config, _configure_shell
+from sprinter.core.globals import (
+    create_default_config,
+    read_global_config,
+    write_config,
+    _configure_shell,
+)
 
 
 class TestGlobalConfig(object):
@@ -29,3 +38,19 @@ class TestGlobalConfig(object):
 
     def test_write_globals_no_root(self):
         """globals should create the root directory before writing the config, if one doesn't exist"""
+
+    def test_read_global_config(self):
+        """read_global_config should read the config without prompting or writing"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            config_path = os.path.join(temp_dir, "config.cfg")
+            with patch("sprinter.lib.prompt") as prompt:
+                config = read_global_config(config_path)
+                assert config.has_section("global")
+                assert not os.path.exists(config_path)
+                write_config(self.config, config_path)
+                config = read_global_config(config_path)
+                assert config.get("shell", "zsh") == "true"
+                assert not prompt.called
+        finally:
+            shutil.rmtree(temp_dir)
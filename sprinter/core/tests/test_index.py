@@ -0,0 +1,65 @@
+from __future__ import unicode_literals
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+from nose.tools import eq_, ok_
+
+from sprinter.core.index import load_index, update_index, remove_from_index
+
+
+class TestIndex(object):
+    """Tests for the namespace index"""
+
+    def setup(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, ".global", "index.json")
+
+    def teardown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_update_index(self):
+        """updates should be merged into the namespace's entry"""
+        eq_(load_index(self.path), {})
+        update_index(self.path, "myenv", source="http://example.com", features=2)
+        update_index(self.path, "myenv", status="failure")
+        entry = load_index(self.path)["myenv"]
+        eq_(entry["source"], "http://example.com")
+        eq_(entry["features"], 2)
+        eq_(entry["status"], "failure")
+        ok_("updated" in entry)
+
+    def test_remove_from_index(self):
+        """removing a namespace should leave the others"""
+        update_index(self.path, "one", status="success")
+        update_index(self.path, "two", status="success")
+        remove_from_index(self.path, "one")
+        remove_from_index(self.path, "three")
+        eq_(list(load_index(self.path)), ["two"])
+
+    def test_unparseable_index(self):
+        """an unparseable index should be treated as empty"""
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as fh:
+            fh.write("{")
+        eq_(load_index(self.path), {})
+
+    def test_concurrent_processes(self):
+        """updates from several processes at once should all be kept"""
+        processes = [
+            multiprocessing.Process(
+                target=_update_namespaces, args=(self.path, "process%s" % i)
+            )
+            for i in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        eq_(len(load_index(self.path)), 4 * 10)
+
+
+def _update_namespaces(path, prefix):
+    for i in range(10):
+        update_index(path, "%s-%s" % (prefix, i), status="success")
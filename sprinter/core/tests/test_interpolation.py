@@ -0,0 +1,85 @@
+from __future__ import unicode_literals
+
+from nose.tools import eq_, ok_, raises
+
+from sprinter.core.interpolation import (
+    InterpolationException,
+    InterpolationTable,
+    SectionView,
+    check_references,
+    references,
+)
+
+
+class TestInterpolation(object):
+    """Tests for the interpolation of manifest values"""
+
+    def test_references(self):
+        """references should skip escaped %s"""
+        eq_(
+            references("%(a:b)s %%(c:d)s 100%% %(e:f|escaped)s"),
+            ["a:b", "e:f|escaped"],
+        )
+
+    def test_resolve_chain(self):
+        """values should be resolved through a chain of references"""
+        table = InterpolationTable(
+            {
+                "a:path": "%(b:path)s/a",
+                "b:path": "%(c:path)s/b",
+                "c:path": "/c",
+                "a:escaped": "%(d:value|escaped)s",
+                "d:value": "a.b",
+            }
+        )
+        eq_(table.resolved["a:path"], "/c/b/a")
+        eq_(table.resolved["a:escaped"], "a\\.b")
+        eq_(table.context_dict["d:value|escaped"], "a\\.b")
+        eq_(table.missing, {})
+
+    def test_missing_reference(self):
+        """a missing reference should leave the value, and everything that references it, as is"""
+        table = InterpolationTable(
+            {"a:path": "%(config:root)s/a", "b:path": "%(a:path)s/b", "c:pct": "100%"}
+        )
+        eq_(table.resolved["b:path"], "%(a:path)s/b")
+        eq_(table.missing, {"a:path": "config:root", "b:path": "config:root"})
+        eq_(table.resolved["c:pct"], "100%")
+        eq_(table.substitute("%(a:path)s"), ("%(a:path)s", "config:root"))
+
+    def test_views(self):
+        """the context dict and section views should look up values without copying them"""
+        table = InterpolationTable({"a:host": "a.com", "b:host": "b.com"})
+        eq_(
+            dict(table.context_dict),
+            {
+                "a:host": "a.com",
+                "a:host|escaped": "a\\.com",
+                "b:host": "b.com",
+                "b:host|escaped": "b\\.com",
+            },
+        )
+        ok_("c:host|escaped" not in table.context_dict)
+        section = SectionView(table.context_dict, "a")
+        eq_(section["host"], "a.com")
+        eq_(sorted(section), ["host", "host|escaped"])
+        ok_("a:host" not in section)
+
+    @raises(InterpolationException)
+    def test_cycle(self):
+        """cyclic references should be reported"""
+        check_references({"a:b": "%(c:d)s", "c:d": "%(e:f)s", "e:f": "%(a:b)s"})
+
+    def test_depth(self):
+        """chains deeper than five should be reported"""
+        values = dict(("k:%s" % i, "%%(k:%s)s" % (i + 1)) for i in range(5))
+        values["k:5"] = "end"
+        check_references(values)
+        values["k:5"] = "%(k:6)s"
+        values["k:6"] = "end"
+        try:
+            check_references(values)
+        except InterpolationException as e:
+            ok_("k:0" in str(e))
+        else:
+            raise AssertionError("a chain deeper than five should be reported")
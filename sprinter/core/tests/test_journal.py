@@ -0,0 +1,41 @@
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+
+from nose.tools import eq_, ok_
+
+from sprinter.core.journal import Journal
+
+
+class TestJournal(object):
+    """Tests for the install journal"""
+
+    def setup(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.journal = Journal(os.path.join(self.temp_dir, "install.journal"))
+
+    def teardown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_record_and_complete(self):
+        """recorded features should be returned as completed"""
+        ok_(not self.journal.exists())
+        eq_(self.journal.completed(), {})
+        self.journal.record(("git", "sprinter.formula.git"), "abc")
+        self.journal.record(("pkg", "myformula:http://example.com/egg"), "def")
+        ok_(self.journal.exists())
+        eq_(
+            self.journal.completed(),
+            {
+                ("git", "sprinter.formula.git"): "abc",
+                ("pkg", "myformula:http://example.com/egg"): "def",
+            },
+        )
+
+    def test_clear(self):
+        """clear should remove the journal"""
+        self.journal.record(("git", "sprinter.formula.git"))
+        self.journal.clear()
+        ok_(not self.journal.exists())
+        self.journal.clear()
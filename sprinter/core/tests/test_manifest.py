@@ -2,6 +2,7 @@ from __future__ import unicode_literals
 from six import StringIO
 
 import os
+import shutil
 import httpretty
 import tempfile
 from nose import tools
@@ -98,6 +99,52 @@ class TestManifest(object):
             manifest.get("parent_section", "parent") == "not me"
         ), "child value should override parent value!"
 
+    @httpretty.activate
+    def test_load_manifest_inheritance_chain(self):
+        """
+        Parents should be loaded through a chain, and from multiple
+        parents, with each parent loaded only once
+        """
+        httpretty.register_uri(
+            httpretty.GET,
+            "http://testme.com/base.cfg",
+            body="[config]\nnamespace = base\n\n[base]\nlevel = base\nbase = base\n",
+        )
+        for level, extends in (
+            ("one", "http://testme.com/base.cfg"),
+            ("two", "http://testme.com/one.cfg"),
+            ("three", "http://testme.com/two.cfg\n  http://testme.com/base.cfg"),
+        ):
+            httpretty.register_uri(
+                httpretty.GET,
+                "http://testme.com/%s.cfg" % level,
+                body="[config]\nextends = %s\n\n[base]\nlevel = %s\n"
+                % (extends, level),
+            )
+        manifest = load_manifest("http://testme.com/three.cfg")
+        tools.eq_(manifest.get("base", "level"), "three")
+        tools.eq_(manifest.get("base", "base"), "base")
+        tools.eq_(manifest.get("config", "namespace"), "base")
+        tools.eq_(
+            sorted(r.path for r in httpretty.latest_requests()),
+            ["/base.cfg", "/one.cfg", "/three.cfg", "/two.cfg"],
+        )
+
+    @tools.raises(ManifestException)
+    def test_load_manifest_inheritance_cycle(self):
+        """A manifest that inherits from itself should fail to load"""
+        temp_directory = tempfile.mkdtemp()
+        try:
+            first_path = os.path.join(temp_directory, "first.cfg")
+            second_path = os.path.join(temp_directory, "second.cfg")
+            with open(first_path, "w") as fh:
+                fh.write("[config]\nextends = %s\n" % second_path)
+            with open(second_path, "w") as fh:
+                fh.write("[config]\nextends = %s\n" % first_path)
+            load_manifest(first_path)
+        finally:
+            shutil.rmtree(temp_directory)
+
     def test_load_manifest_no_inheritance(self):
         """load_manifest should not load ancestors with inherit=False"""
         temp_directory = tempfile.mkdtemp()
@@ -129,6 +176,30 @@ class TestManifest(object):
         """Manifest object should be equal to itself"""
         tools.eq_(self.old_manifest, load_manifest(StringIO(old_manifest)))
 
+    def test_equality_is_symmetric(self):
+        """A manifest with extra sections should not be equal to one without them"""
+        manifest = load_manifest(StringIO(old_manifest))
+        manifest.add_section("extra")
+        tools.ok_(manifest != self.old_manifest)
+        tools.ok_(self.old_manifest != manifest)
+
+    def test_digest(self):
+        """The digest should change with the content, and not the source or order"""
+        digest = self.old_manifest.digest()
+        reordered = Manifest.from_dict(
+            dict(
+                (s, dict(reversed(self.old_manifest.items(s))))
+                for s in reversed(self.old_manifest.sections())
+            )
+        )
+        tools.eq_(reordered.digest(), digest)
+        self.old_manifest.set_source("http://example.com/moved.cfg")
+        tools.eq_(self.old_manifest.digest(), digest)
+        self.old_manifest.set("maven", "extra_option", "2.11")
+        tools.ok_(self.old_manifest.digest() != digest)
+        self.old_manifest.remove_option("maven", "extra_option")
+        tools.eq_(self.old_manifest.digest(), digest)
+
     def test_get_feature_config(self):
         """get_feature_config should return a dictionary with the attributes"""
         tools.eq_(
@@ -182,6 +253,33 @@ class TestManifest(object):
             "\!\@\#\$\%\^\&\*\(\)\\\"\\'\~\`\/\?\<\>",
         )
 
+    def test_get_context_dict_cached(self):
+        """The context dict should be cached until the manifest changes"""
+        context_dict = self.old_manifest.get_context_dict()
+        assert self.old_manifest.get_context_dict() is context_dict
+        self.old_manifest.set("maven", "specific_version", "2.11")
+        tools.eq_(
+            self.old_manifest.get_context_dict()["maven:specific_version"], "2.11"
+        )
+        self.old_manifest.remove_option("maven", "specific_version")
+        assert "maven:specific_version" not in self.old_manifest.get_context_dict()
+        self.old_manifest.inputs.set_input("sourceonly", "value")
+        tools.eq_(self.old_manifest.get_context_dict()["config:sourceonly"], "value")
+        self.old_manifest.add_additional_context({"config:test": "testing this"})
+        assert "config:test" in self.old_manifest.get_context_dict()
+
+    def test_context_is_per_manifest(self):
+        """additional context should only be layered over it's own manifest"""
+        self.old_manifest.add_additional_context({"config:root_dir": "/old"})
+        tools.eq_(self.old_manifest.get_context_dict()["config:root_dir"], "/old")
+        assert "config:root_dir" not in self.new_manifest.get_context_dict()
+
+    def test_get_context_dict_for_feature(self):
+        """a feature's values should be available by their name in the feature"""
+        context_dict = self.old_manifest.get_context_dict("maven")
+        tools.eq_(context_dict["specific_version"], "2.10")
+        tools.eq_(context_dict["ant:specific_version"], "1.8.4")
+
     def test_add_additional_context(self):
         """Test the add additonal context method"""
         self.old_manifest.add_additional_context({"testme": "testyou"})
@@ -0,0 +1,84 @@
+from __future__ import unicode_literals
+from six import StringIO
+
+from nose.tools import eq_, ok_
+
+from sprinter.core.manifest import load_manifest
+from sprinter.core.manifestdiff import FeatureChanges, ManifestDiff
+
+source_manifest = """
+[config]
+namespace = test
+user = foo
+
+[unchanged]
+formula = sprinter.formula.git
+url = git://example.com/unchanged.git
+
+[changed]
+formula = sprinter.formula.git
+branch = master
+url = git://example.com/%(config:user)s.git
+
+[removed]
+formula = sprinter.formula.command
+"""
+
+target_manifest = """
+[config]
+namespace = test
+user = bar
+
+[unchanged]
+formula = sprinter.formula.git
+url = git://example.com/unchanged.git
+
+[changed]
+formula = sprinter.formula.git
+url = git://example.com/%(config:user)s.git
+depends = unchanged
+
+[added]
+formula = sprinter.formula.env
+"""
+
+
+class TestManifestDiff(object):
+    """Tests for the differences between manifests"""
+
+    def setup(self):
+        self.source = load_manifest(StringIO(source_manifest))
+        self.target = load_manifest(StringIO(target_manifest))
+
+    def test_diff(self):
+        """features should be added, removed or changed, with their resolved values"""
+        diff = ManifestDiff(self.source, self.target)
+        eq_(diff.added, ["added"])
+        eq_(diff.removed, ["removed"])
+        eq_(list(diff.changed), ["changed"])
+        eq_(
+            diff["changed"].options,
+            {
+                "branch": ("master", None),
+                "url": ("git://example.com/foo.git", "git://example.com/bar.git"),
+                "depends": (None, "unchanged"),
+            },
+        )
+        ok_(not diff["unchanged"])
+        ok_(diff["added"].added)
+        ok_(diff["removed"].removed)
+
+    def test_diff_without_source(self):
+        """every feature of an install should be added"""
+        diff = ManifestDiff(None, self.target)
+        eq_(sorted(diff.added), ["added", "changed", "unchanged"])
+        eq_(diff.removed, [])
+        ok_(not ManifestDiff(self.target, self.target))
+
+    def test_changed(self):
+        """changed should be true if any of the options passed changed"""
+        changes = FeatureChanges("git", {"url": "a", "branch": "b"}, {"url": "a"})
+        ok_(changes.changed())
+        ok_(changes.changed("url", "branch"))
+        ok_(not changes.changed("url"))
+        ok_("branch" in changes)
@@ -0,0 +1,152 @@
+from __future__ import unicode_literals
+from six import StringIO
+
+from nose.tools import eq_
+
+import sprinter.lib as lib
+
+from sprinter.core.fingerprints import config_fingerprint
+from sprinter.core.manifest import load_manifest
+from sprinter.core.plan import PlannedAction, plan_features
+from sprinter.formula.base import FormulaBase
+from sprinter.testtools import set_os_types
+
+source_manifest = """
+[config]
+namespace = test
+user = foo
+
+[unchanged]
+formula = sprinter.formula.git
+url = git://example.com/%(config:user)s.git
+
+[changed]
+formula = sprinter.formula.git
+branch = master
+
+[removed]
+formula = sprinter.formula.command
+
+[reformulated]
+formula = sprinter.formula.command
+"""
+
+target_manifest = """
+[config]
+namespace = test
+user = foo
+
+[unchanged]
+formula = sprinter.formula.git
+url = git://example.com/%(config:user)s.git
+
+[changed]
+formula = sprinter.formula.git
+branch = develop
+
+[added]
+formula = sprinter.formula.env
+
+[reformulated]
+formula = sprinter.formula.env
+
+[osx_only]
+formula = sprinter.formula.env
+systems = osx
+"""
+
+
+class TestPlan(object):
+    """Tests for planning the actions of features"""
+
+    def setup(self):
+        self.source = load_manifest(StringIO(source_manifest))
+        self.target = load_manifest(StringIO(target_manifest))
+
+    def _plan(self, source, target, fingerprints=None):
+        with set_os_types(debian=True):
+            return dict(
+                ((p.feature, p.action), p)
+                for p in plan_features(source, target, fingerprints=fingerprints)
+            )
+
+    def test_plan(self):
+        """each feature should be planned with the action it would take"""
+        plan = self._plan(self.source, self.target)
+        eq_(
+            set(plan.keys()),
+            set(
+                [
+                    ("unchanged", "skip"),
+                    ("changed", "update"),
+                    ("removed", "remove"),
+                    ("added", "install"),
+                    ("reformulated", "remove"),
+                    ("reformulated", "install"),
+                    ("osx_only", "skip"),
+                ]
+            ),
+        )
+        eq_(
+            plan[("changed", "update")],
+            PlannedAction(
+                "changed", "sprinter.formula.git", "update", "changed branch"
+            ),
+        )
+        eq_(
+            plan[("reformulated", "install")].reason,
+            "formula changed from sprinter.formula.command",
+        )
+
+    def test_plan_no_source(self):
+        """without a source, every feature should be installed"""
+        plan = self._plan(None, self.target)
+        eq_(
+            sorted(k for k in plan if k[1] == "install"),
+            [
+                ("added", "install"),
+                ("changed", "install"),
+                ("reformulated", "install"),
+                ("unchanged", "install"),
+            ],
+        )
+
+    def test_plan_referenced_value_changed(self):
+        """a change to a referenced config value should plan an update"""
+        self.target.set("config", "user", "bar")
+        plan = self._plan(self.source, self.target)
+        eq_(plan[("unchanged", "update")].reason, "changed url")
+
+    def test_plan_always_update(self):
+        """always_update should always plan an update"""
+        self.target.set("unchanged", "always_update", "true")
+        plan = self._plan(self.source, self.target)
+        eq_(plan[("unchanged", "update")].reason, "always_update is set")
+
+    def test_plan_fingerprints(self):
+        """a feature should be skipped if and only if its fingerprint is unchanged"""
+        # fingerprinted with the formula class as features load it
+        git_formula = lib.get_subclass_from_module("sprinter.formula.git", FormulaBase)
+        fingerprints = {
+            "changed": config_fingerprint(
+                {"formula": "sprinter.formula.git", "branch": "develop"}, git_formula
+            ),
+            "unchanged": "stale",
+        }
+        plan = self._plan(self.source, self.target, fingerprints=fingerprints)
+        eq_(plan[("changed", "skip")].reason, "unchanged since the last update")
+        eq_(plan[("unchanged", "update")].reason, "changed since the last update")
+
+    def test_plan_not_synced(self):
+        """a feature without a fingerprint should be planned as an update"""
+        plan = self._plan(self.source, self.target, fingerprints={})
+        eq_(plan[("unchanged", "update")].reason, "not synced by the last update")
+
+    def test_plan_target_digest(self):
+        """every update should be skipped if the target is the installed one"""
+        self.source.target_digest = self.target.digest()
+        plan = self._plan(self.source, self.target, fingerprints={})
+        eq_(
+            plan[("changed", "skip")].reason,
+            "the manifest is unchanged since the last update",
+        )
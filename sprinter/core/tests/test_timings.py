@@ -0,0 +1,113 @@
+from __future__ import unicode_literals
+import os
+import shutil
+import tempfile
+
+from nose.tools import eq_, ok_
+
+from sprinter.core import timings
+
+
+class TestTimings(object):
+    """Tests for the timing history"""
+
+    def setup(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.history_path = os.path.join(self.temp_dir, ".global", "timings.jsonl")
+
+    def teardown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_timer_records_phases_and_features(self):
+        """the timer should accumulate durations per phase and feature action"""
+        timer = timings.Timer()
+        timer.start()
+        ok_(timer.running)
+        with timer.time_phase("warmup"):
+            pass
+        with timer.time_feature(("git", "sprinter.formula.git"), "sync"):
+            pass
+        timer.stop()
+        ok_(not timer.running)
+        record = timer.to_dict("test", "install", "success")
+        ok_("warmup" in record["phases"])
+        eq_(record["features"][0]["feature"], "git")
+        eq_(record["features"][0]["formula"], "sprinter.formula.git")
+        ok_(record["features"][0]["sync"] >= 0)
+
+    def test_timer_keys_features_by_formula(self):
+        """durations of a feature under different formulas should not be mixed"""
+        timer = timings.Timer()
+        timer.start()
+        with timer.time_feature(("git", "sprinter.formula.git"), "sync"):
+            pass
+        with timer.time_feature(("git", "sprinter.formula.package"), "sync"):
+            pass
+        timer.stop()
+        record = timer.to_dict("test", "update", "success")
+        eq_(
+            sorted(key for key, _ in timings.feature_timings(record)),
+            [("git", "sprinter.formula.git"), ("git", "sprinter.formula.package")],
+        )
+        eq_(
+            [name for name, _, _ in timings.summarize([record])],
+            ["git (sprinter.formula.git)", "git (sprinter.formula.package)"],
+        )
+
+    def test_history_round_trip(self):
+        """records should be appended, and loaded filtered by namespace"""
+        timings.append_history(self.history_path, {"namespace": "a", "phases": {}})
+        timings.append_history(self.history_path, {"namespace": "b", "phases": {}})
+        eq_(len(timings.load_history(self.history_path)), 2)
+        eq_(
+            timings.load_history(self.history_path, namespace="a"),
+            [{"namespace": "a", "phases": {}}],
+        )
+
+    def test_summarize(self):
+        """summarize should group durations by feature and action, oldest first"""
+        records = [
+            {"phases": {"warmup": 1}, "features": {"git": {"formula": "f", "sync": 2}}},
+            {"phases": {"warmup": 3}, "features": {"git": {"formula": "f", "sync": 4}}},
+        ]
+        eq_(
+            timings.summarize(records),
+            [("environment", "warmup", [1, 3]), ("git", "sync", [2, 4])],
+        )
+
+    def test_percentile(self):
+        durations = list(range(1, 21))
+        eq_(timings.percentile(durations, 50), 10)
+        eq_(timings.percentile(durations, 95), 19)
+        eq_(timings.percentile([5], 95), 5)
+
+    def test_is_regression(self):
+        ok_(timings.is_regression([1.0, 5.0]))
+        ok_(not timings.is_regression([1.0, 1.2]))
+        ok_(not timings.is_regression([0.1, 0.5]))
+        ok_(not timings.is_regression([5.0]))
+
+    def test_estimate_durations(self):
+        """durations should be the median of recent runs, or the formula's default"""
+        records = [
+            {"features": {"git": {"formula": "sprinter.formula.git", "sync": s}}}
+            for s in (100, 3, 1, 2)
+        ]
+        records.append(
+            {"features": {"egg": {"formula": "sprinter.formula.base", "sync": 9}}}
+        )
+        eq_(
+            timings.estimate_durations(
+                records,
+                [
+                    ("git", "sprinter.formula.git"),
+                    ("egg", "sprinter.formula.eggscript"),
+                    ("other", "sprinter.formula.base"),
+                ],
+            ),
+            {
+                ("git", "sprinter.formula.git"): 2,
+                ("egg", "sprinter.formula.eggscript"): 60.0,
+                ("other", "sprinter.formula.base"): timings.DEFAULT_DURATION,
+            },
+        )
@@ -0,0 +1,207 @@
+"""
+timings.py records how long each lifecycle phase and feature action
+takes, and keeps a history of runs to report on, and to estimate how
+long features will take from.
+
+the history is a file with one json object per run:
+
+{"namespace": "myenv", "phase": "update", "status": "success", "started": 1400000000.0,
+ "duration": 12.1, "phases": {"warmup": 0.2, ...},
+ "features": [{"feature": "git", "formula": "sprinter.formula.git", "sync": 4.1}, ...]}
+
+feature timings are kept per feature and formula, the key features
+have in a FeatureDict, so a feature whose formula changed starts a new
+history. records written before this stored features as a dictionary of
+names to {"formula": ..., <action>: <duration>}.
+"""
+from __future__ import unicode_literals
+import json
+import logging
+import math
+import os
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# python 2 does not have a monotonic clock
+monotonic = getattr(time, "monotonic", time.time)
+
+# a run is a regression if it is this much slower than the previous run...
+REGRESSION_RATIO = 1.5
+# ...and at least this many seconds slower.
+REGRESSION_MINIMUM = 1.0
+
+# the number of recent runs a feature's duration is estimated from
+ESTIMATE_RUNS = 5
+# the seconds a feature is expected to sync in, before it has a history
+DEFAULT_DURATION = 1.0
+DEFAULT_FORMULA_DURATIONS = {
+    "sprinter.formula.eggscript": 60.0,
+    "sprinter.formula.package": 30.0,
+    "sprinter.formula.unpack": 20.0,
+    "sprinter.formula.git": 10.0,
+    "sprinter.formula.perforce": 10.0,
+}
+
+
+class Timer(object):
+    """records the durations of the phases and feature actions of a run"""
+
+    def __init__(self):
+        self.phases = {}
+        self.features = {}
+        self.started = None
+        self._start_clock = None
+        self.duration = None
+
+    @property
+    def running(self):
+        return self._start_clock is not None and self.duration is None
+
+    def start(self):
+        self.phases, self.features = {}, {}
+        self.started = time.time()
+        self._start_clock = monotonic()
+        self.duration = None
+
+    def stop(self):
+        self.duration = monotonic() - self._start_clock
+
+    @contextmanager
+    def time_phase(self, name):
+        """time the body, adding the duration to the phase <name>"""
+        start = monotonic()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0) + monotonic() - start
+
+    @contextmanager
+    def time_feature(self, feature, action):
+        """time the body, adding the duration to the action of the feature key"""
+        start = monotonic()
+        try:
+            yield
+        finally:
+            timings = self.features.setdefault(tuple(feature), {})
+            timings[action] = timings.get(action, 0) + monotonic() - start
+
+    def to_dict(self, namespace, phase, status):
+        return {
+            "namespace": namespace,
+            "phase": phase,
+            "status": status,
+            "started": self.started,
+            "duration": self.duration,
+            "phases": self.phases,
+            "features": [
+                dict(timings, feature=key[0], formula=key[1])
+                for key, timings in sorted(self.features.items())
+            ],
+        }
+
+
+def append_history(path, record):
+    """append the record of a run to the history file at path"""
+    parent_directory = os.path.dirname(path)
+    if not os.path.exists(parent_directory):
+        os.makedirs(parent_directory)
+    with open(path, "a") as fh:
+        fh.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def load_history(path, namespace=None):
+    """return the records in the history file, oldest first"""
+    records = []
+    if not os.path.exists(path):
+        return records
+    with open(path) as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.debug("Skipping unparseable timing record: %s" % line)
+                continue
+            if namespace is None or record.get("namespace") == namespace:
+                records.append(record)
+    return records
+
+
+def feature_timings(record):
+    """
+    return a list of ((feature, formula), {action: duration}) for every
+    feature in a record
+    """
+    features = record.get("features", [])
+    if isinstance(features, dict):
+        # the format of records written before timings were kept per formula
+        features = [dict(timings, feature=name) for name, timings in features.items()]
+    return [
+        (
+            (timings["feature"], timings.get("formula")),
+            dict((k, v) for k, v in timings.items() if k not in ("feature", "formula")),
+        )
+        for timings in features
+    ]
+
+
+def summarize(records):
+    """
+    return a list of (name, action, durations) for every phase and
+    feature action in the records, oldest duration first.
+    phases are returned with the name 'environment', and features whose
+    formula changed are returned once per formula, named 'feature (formula)'.
+    """
+    durations = {}
+    formulas = {}
+    for record in records:
+        for phase, duration in record.get("phases", {}).items():
+            durations.setdefault((("environment", None), phase), []).append(duration)
+        for key, timings in feature_timings(record):
+            formulas.setdefault(key[0], set()).add(key[1])
+            for action, duration in timings.items():
+                durations.setdefault((key, action), []).append(duration)
+
+    def name(key):
+        if len(formulas.get(key[0], ())) > 1:
+            return "%s (%s)" % key
+        return key[0]
+
+    return sorted((name(k[0]), k[1], v) for k, v in durations.items())
+
+
+def percentile(durations, percent):
+    """return the nearest-rank percentile of the durations"""
+    ordered = sorted(durations)
+    rank = int(math.ceil(percent / 100.0 * len(ordered)))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def is_regression(durations):
+    """return true if the last duration is a regression of the one before it"""
+    if len(durations) < 2:
+        return False
+    previous, last = durations[-2], durations[-1]
+    return last > previous * REGRESSION_RATIO and last - previous > REGRESSION_MINIMUM
+
+
+def estimate_durations(records, feature_keys, action="sync"):
+    """
+    return a dictionary of each feature key to the seconds it's action
+    is expected to take: the median of it's last runs with the same
+    formula, or the default duration of it's formula.
+    """
+    durations = dict((key, []) for key in feature_keys)
+    for record in records:
+        for key, timings in feature_timings(record):
+            if key in durations and action in timings:
+                durations[key].append(timings[action])
+    estimates = {}
+    for key, history in durations.items():
+        if history:
+            estimates[key] = percentile(history[-ESTIMATE_RUNS:], 50)
+        else:
+            formula = (key[1] or "").split(":", 1)[0]
+            estimates[key] = DEFAULT_FORMULA_DURATIONS.get(formula, DEFAULT_DURATION)
+    return estimates
@@ -4,7 +4,6 @@ import os
 import sys
 import getpass
 from six import reraise
-from io import StringIO
 from functools import wraps
 from collections import defaultdict
 
@@ -12,9 +11,11 @@ import sprinter.lib as lib
 from sprinter.core import (
     PHASE,
     load_global_config,
+    read_global_config,
     Directory,
     Injections,
     Manifest,
+    ManifestDiff,
     load_manifest,
     FeatureDict,
 )
@@ -24,7 +25,26 @@ from sprinter.core.templates import (
     warning_template,
 )
 from sprinter.core.messages import REMOVE_WARNING, INVALID_MANIFEST
-from sprinter.lib import system
+from sprinter.core.plan import plan_features
+from sprinter.core.timings import (
+    Timer,
+    append_history,
+    estimate_durations,
+    load_history,
+)
+from sprinter.core.journal import Journal
+from sprinter.core.index import update_index, remove_from_index
+from sprinter.core.compiledmanifest import write_compiled_manifest
+from sprinter.core.directory import feature_scope
+from sprinter.core.generations import Generations
+from sprinter.core.fingerprints import (
+    feature_fingerprint,
+    load_fingerprints,
+    write_fingerprints,
+)
+from sprinter.lib import events, system
+from sprinter.lib.logbuffer import SpillingLogBuffer
+from sprinter.lib.scheduler import DependencyScheduler
 from sprinter.exceptions import SprinterException, FormulaException
 from sprinter.external import brew
 
@@ -41,6 +61,41 @@ def warmup(f):
     return wrapped
 
 
+def timed(f):
+    """Decorator to record the duration of a lifecycle phase"""
+
+    @wraps(f)
+    def wrapped(self, *args, **kwargs):
+        with self.timer.time_phase(f.__name__), events.span(
+            "phase", namespace=self.namespace, phase=f.__name__
+        ):
+            return f(self, *args, **kwargs)
+
+    return wrapped
+
+
+def record_timings(f):
+    """Decorator to append the timings of a command to the timing history"""
+
+    @wraps(f)
+    def wrapped(self, *args, **kwargs):
+        if self.timer.running:
+            return f(self, *args, **kwargs)
+        self.timer.start()
+        status = "failure"
+        try:
+            result = f(self, *args, **kwargs)
+            status = "success"
+            return result
+        finally:
+            self.timer.stop()
+            self._write_timings(f.__name__, status)
+            if status == "failure":
+                self._update_index(status)
+
+    return wrapped
+
+
 def install_required(f):
     """Return an exception if the namespace is not already installed"""
 
@@ -100,8 +155,21 @@ class Environment(object):
     _errors = []  # list to keep all the errors
     sandboxes = []  # a list of package managers to sandbox (brew)
     # specifies where to get the global sprinter root
-    global_config = None  # configuration file, which defaults to loading from SPRINTER_ROOT/.global/config.cfg
+    _global_config = None  # configuration file, which defaults to loading from SPRINTER_ROOT/.global/config.cfg
     ignore_errors = False  # ignore errors in features
+    jobs = None  # the number of features to run at once. overrides the manifest's config:jobs
+    force = False  # update features, even if their configuration has not changed
+    resume = False  # continue a failed install, keeping the features it completed
+    commit_injections = True  # if false, injections are left for the caller to commit
+    debug_log_memory_size = (
+        None  # bytes of debug log to hold in memory before spilling to disk
+    )
+    debug_log_file_size = None  # bytes of debug log to hold on disk per spill file
+    read_only = False  # skip writing the global config, injections and PATH changes
+    changes = None  # the ManifestDiff between the source and target, once specialized
+    only = None  # the names of the features to update, with the features they depend on
+    with_dependents = False  # with only, also update the features that depend on them
+    _target_digest = None  # the digest of the target, before it is specialized
 
     def __init__(
         self,
@@ -111,8 +179,14 @@ class Environment(object):
         sprinter_namespace=None,
         global_config=None,
         ignore_errors=False,
+        debug_log_memory_size=None,
+        debug_log_file_size=None,
     ):
 
+        # the bounds of the debug log, written out on failure
+        self.debug_log_memory_size = debug_log_memory_size
+        self.debug_log_file_size = debug_log_file_size
+
         # base logging object to log instances
         self.logger = logger or self._build_logger(level=logging_level)
         if logging_level == logging.DEBUG:
@@ -131,9 +205,14 @@ class Environment(object):
         # path to the directory to install global files
         self.global_path = os.path.join(self.root, ".global")
         self.global_config_path = os.path.join(self.global_path, "config.cfg")
-        self.global_config = global_config or load_global_config(
-            self.global_config_path
+        self.timing_history_path = os.path.join(self.global_path, "timings.jsonl")
+        self.index_path = os.path.join(self.global_path, "index.json")
+        self.http_cache_path = os.path.join(self.global_path, "cache", "http")
+        self.formula_schema_path = os.path.join(
+            self.global_path, "cache", "formula_schemas.json"
         )
+        # loaded when first used, so commands that don't need it don't pay for it
+        self._global_config = global_config
 
         self.shell_util_path = os.path.join(self.global_path, "utils.sh")
         self.main_manifest = None
@@ -142,11 +221,59 @@ class Environment(object):
         # The key is a tuple of feature name and formula, while the value is an instance.
         self._error_dict = defaultdict(list)
 
+        # the fingerprints of feature configurations from the last successful run
+        self._fingerprints = {}
+
+        # the names of the features an update is limited to, see only
+        self._selected_features = None
+
+        # the generation an update switched from, see _begin_generation
+        self._previous_generation = None
+
+        # records the duration of the phases and feature actions of a command
+        self.timer = Timer()
+
+        # records the features that finished syncing, during an install
+        self._journal = None
+        # the features a resumed install completed, and their fingerprints
+        self._completed_features = {}
+        self._resuming = False
+
+    @property
+    def global_config(self):
+        if self._global_config is None:
+            if self.read_only:
+                self._global_config = read_global_config(self.global_config_path)
+            else:
+                self._global_config = load_global_config(self.global_config_path)
+        return self._global_config
+
+    @global_config.setter
+    def global_config(self, global_config):
+        self._global_config = global_config
+
+    @record_timings
     @warmup
     def install(self):
         """Install the environment"""
         self.phase = PHASE.INSTALL
-        if not self.directory.new:
+        self._journal = Journal(
+            os.path.join(self.directory.root_dir, "install.journal")
+        )
+        if not self.directory.new and self._journal.exists():
+            if not self.resume:
+                raise SprinterException(
+                    "A previous install of %s did not finish! " % self.namespace
+                    + "Install again with --resume to continue it, "
+                    + "or remove %s." % self.directory.root_dir
+                )
+            self._completed_features = self._journal.completed()
+            self._resuming = True
+            self.logger.info(
+                "Resuming install of %s, keeping %s completed feature(s)..."
+                % (self.namespace, len(self._completed_features))
+            )
+        elif not self.directory.new:
             self.logger.info("Namespace %s directory already exists!" % self.namespace)
             self.source = load_manifest(self.directory.manifest_path)
             return self.update()
@@ -157,26 +284,49 @@ class Environment(object):
             self.instantiate_features()
             self.grab_inputs()
             self._specialize()
-            for feature in self.features.run_order:
-                self.run_action(feature, "sync")
+            self._sync_features()
             self.inject_environment_config()
             self._finalize()
+            self._journal.clear()
         except Exception:
             self.logger.debug("", exc_info=sys.exc_info())
             self.logger.info("An error occured during installation!")
             if not self.ignore_errors:
-                self.clear_all()
-                self.logger.info("Removing installation %s..." % self.namespace)
-                self.directory.remove()
+                self.clear_failed_install()
                 et, ei, tb = sys.exc_info()
                 reraise(et, ei, tb)
 
+    def clear_failed_install(self):
+        """
+        clear an install that did not finish, removing the namespace
+        directory unless the journal has completed features to resume.
+        """
+        self.clear_all()
+        if self._journal and self._journal.completed():
+            self.logger.info(
+                "Keeping the completed features of %s. " % self.namespace
+                + "Install again with --resume to continue."
+            )
+        else:
+            self.logger.info("Removing installation %s..." % self.namespace)
+            self.directory.remove()
+
+    @record_timings
     @warmup
     @install_required
     def update(self, reconfigure=False):
         """update the environment"""
         try:
             self.phase = PHASE.UPDATE
+            if self.only:
+                self._selected_features = self._select_features()
+                self._keep_unselected_sections()
+            elif not reconfigure and self._is_target_unchanged():
+                self.logger.info(
+                    "%s is unchanged since the last update, skipping..."
+                    % self.namespace
+                )
+                return
             self.logger.info("Updating environment %s..." % self.namespace)
             self.install_sandboxes()
             self.instantiate_features()
@@ -188,15 +338,20 @@ class Environment(object):
             else:
                 self._copy_source_to_target()
             self._specialize(reconfigure=reconfigure)
-            for feature in self.features.run_order:
-                self.run_action(feature, "sync")
+            self._fingerprints = load_fingerprints(self._fingerprint_path())
+            self._begin_generation()
+            self._sync_features()
             self.inject_environment_config()
             self._finalize()
-        except Exception:
+        # including the SystemExit of an interrupt, which would otherwise
+        # leave the namespace on a half updated generation
+        except BaseException:
             self.logger.debug("", exc_info=sys.exc_info())
+            self._revert_generation()
             et, ei, tb = sys.exc_info()
             reraise(et, ei, tb)
 
+    @record_timings
     @warmup
     @install_required
     def remove(self):
@@ -215,6 +370,7 @@ class Environment(object):
             self.clear_all()
             self.directory.remove()
             self.injections.commit()
+            remove_from_index(self.index_path, self.namespace)
             if self.error_occured:
                 self.logger.error(warning_template)
                 self.logger.error(REMOVE_WARNING)
@@ -223,6 +379,7 @@ class Environment(object):
             et, ei, tb = sys.exc_info()
             reraise(et, ei, tb)
 
+    @record_timings
     @warmup
     @install_required
     def deactivate(self):
@@ -243,6 +400,7 @@ class Environment(object):
             et, ei, tb = sys.exc_info()
             reraise(et, ei, tb)
 
+    @record_timings
     @warmup
     @install_required
     def activate(self):
@@ -279,7 +437,36 @@ class Environment(object):
         for feature in self.features.run_order:
             self.run_action(feature, "validate", run_if_error=True)
 
+    def plan(self):
+        """
+        Return the action each feature would take to reach the target
+        environment from the source, without modifying anything.
+
+        If no source is set, the installed manifest of the namespace is used.
+        """
+        if not isinstance(self.target, Manifest) and self.target:
+            self.target = load_manifest(self.target)
+        namespace = self.namespace or (self.target and self.target.namespace)
+        fingerprints = None
+        if not self.source and namespace:
+            directory = Directory(
+                self.custom_directory_root or os.path.join(self.root, namespace)
+            )
+            if os.path.exists(directory.manifest_path):
+                # plan what an update of the installed namespace would do
+                self.source = load_manifest(directory.manifest_path, do_inherit=False)
+                fingerprints = load_fingerprints(
+                    os.path.join(directory.root_dir, "fingerprints.json")
+                )
+                for manifest in (self.source, self.target):
+                    if manifest:
+                        self._add_directory_context(manifest, directory)
+        if not isinstance(self.source, Manifest) and self.source:
+            self.source = load_manifest(self.source, do_inherit=False)
+        return plan_features(self.source, self.target, fingerprints=fingerprints)
+
     @warmup
+    @timed
     def inject_environment_config(self):
         if not self.do_inject_environment_config:
             return
@@ -369,23 +556,27 @@ class Environment(object):
                         )
                         brew.install_brew("/usr/local")
 
+    @timed
     def instantiate_features(self):
         if hasattr(self, "features") and self.features:
             return
-        self.features = FeatureDict(self, self.source, self.target, self.global_path)
+        self.features = FeatureDict(
+            self,
+            self.source,
+            self.target,
+            self.global_path,
+        )
 
     def run_feature(self, feature, action):
-        for k in self.features.run_order:
-            if feature in k:
-                self.run_action(k, action, run_if_error=True)
+        for k in self.features.keys_for(feature):
+            self.run_action(k, action, run_if_error=True)
 
     def write_debug_log(self, file_path):
         """Write the debug log to a file"""
         with open(file_path, "wb+") as fh:
             fh.write(system.get_system_info().encode("utf-8"))
             # writing to debug stream
-            self._debug_stream.seek(0)
-            fh.write(self._debug_stream.read().encode("utf-8"))
+            self._debug_stream.copy_to(fh)
             fh.write("The following errors occured:\n".encode("utf-8"))
             for error in self._errors:
                 fh.write((error + "\n").encode("utf-8"))
@@ -396,9 +587,39 @@ class Environment(object):
                         fh.write((error + "\n").encode("utf-8"))
 
     def write_manifest(self):
-        """Write the manifest to the file"""
+        """
+        Write the manifest, it's compiled form, and the fingerprints of
+        the features, to the file. only an install or update syncs the
+        features, so other commands keep the installed target digest
+        and fingerprints.
+        """
         if os.path.exists(self.directory.manifest_path):
-            self.main_manifest.write(open(self.directory.manifest_path, "w+"))
+            syncing = self.phase in (PHASE.INSTALL, PHASE.UPDATE)
+            with open(self.directory.manifest_path, "w+") as fh:
+                self.main_manifest.write(fh)
+            if not syncing:
+                target_digest = self.source.target_digest if self.source else None
+            elif self.error_occured or self._selected_features is not None:
+                # a partial update doesn't bring every feature up to the target
+                target_digest = None
+            else:
+                target_digest = self._target_digest
+            # compiled from the file, so it loads the same as parsing it would
+            write_compiled_manifest(
+                load_manifest(self.directory.manifest_path, do_inherit=False),
+                self.directory.manifest_path,
+                target_digest=target_digest,
+            )
+            if syncing and hasattr(self, "features") and self.features:
+                fingerprints = self._get_feature_fingerprints()
+                if self._selected_features is not None:
+                    fingerprints = dict(
+                        (k, v)
+                        for k, v in self._fingerprints.items()
+                        if k not in self._selected_features
+                    )
+                    fingerprints.update(self._get_feature_fingerprints())
+                write_fingerprints(self._fingerprint_path(), fingerprints)
 
     def message_failure(self):
         """return a failure message, if one exists"""
@@ -410,6 +631,7 @@ class Environment(object):
         """return a success message, if one exists"""
         return self.main_manifest.get("config", "message_success", default=None)
 
+    @timed
     def warmup(self):
         """initialize variables necessary to perform a sprinter action"""
         self.logger.debug("Warming up...")
@@ -420,6 +642,8 @@ class Environment(object):
             if not isinstance(self.target, Manifest) and self.target:
                 self.target = load_manifest(self.target)
             self.main_manifest = self.target or self.source
+            if self.target:
+                self._target_digest = self.target.digest()
         except lib.BadCredentialsException:
             e = sys.exc_info()[1]
             self.logger.error(str(e))
@@ -443,6 +667,13 @@ class Environment(object):
                 self.directory_root, shell_util_path=self.shell_util_path
             )
 
+        if self.read_only:
+            self.warmed_up = True
+            return
+
+        # load, and query for, the global configuration before any features run
+        self.global_config
+
         if not self.injections:
             self.injections = Injections(
                 wrapper="%s_%s" % (self.sprinter_namespace.upper(), self.namespace),
@@ -454,8 +685,11 @@ class Environment(object):
                 override="SPRINTER_OVERRIDES",
             )
         # append the bin, in the case sandboxes are necessary to
-        # execute commands further down the sprinter lifecycle
-        os.environ["PATH"] = self.directory.bin_path() + ":" + os.environ["PATH"]
+        # execute commands further down the sprinter lifecycle. the
+        # namespaces of update --all share os.environ, so they rely on
+        # the bin their installed rc already puts on the PATH
+        if self.commit_injections:
+            os.environ["PATH"] = self.directory.bin_path() + ":" + os.environ["PATH"]
         self.warmed_up = True
 
     def _inject_config_source(self, source_filename, files_to_inject):
@@ -486,6 +720,7 @@ class Environment(object):
 
         return (config_file, config_path)
 
+    @timed
     def _finalize(self):
         """command to run at the end of sprinter's run"""
         self.logger.info("Finalizing...")
@@ -511,10 +746,12 @@ class Environment(object):
                 '__sprinter_prepend_path "%s" C_INCLUDE_PATH'
                 % self.directory.include_path()
             )
-            self.directory.finalize()
+            # the lines of concurrent features are written in run order
+            self.directory.finalize(order=self._script_order())
 
-        self.injections.commit()
-        self.global_injections.commit()
+        if self.commit_injections:
+            self.injections.commit()
+            self.global_injections.commit()
 
         if not os.path.exists(os.path.join(self.root, ".global")):
             self.logger.debug("Global directory doesn't exist! creating...")
@@ -524,6 +761,16 @@ class Environment(object):
         with open(self.shell_util_path, "w+") as fh:
             fh.write(shell_utils_template)
 
+        if self.phase == PHASE.INSTALL and not self.error_occured:
+            if self._use_generations():
+                Generations(self.directory.root_dir).adopt()
+
+        self._update_index(
+            "failure" if self.error_occured else "success",
+            source=self.main_manifest.source(),
+            features=len(self.main_manifest.formula_sections()),
+        )
+
         if self.error_occured:
             raise SprinterException("Error occured!")
 
@@ -535,6 +782,12 @@ class Environment(object):
             "NOTE: Please remember to open new shells/terminals to use the modified environment"
         )
 
+    def _script_order(self):
+        """return the order of the features' lines in the rc, env and gui scripts"""
+        if not getattr(self, "features", None):
+            return None
+        return self.features.run_order
+
     def _install_sandbox(self, name, call, kwargs={}):
         if self.target.is_affirmative("config", name) and (
             not self.source or not self.source.is_affirmative("config", name)
@@ -544,7 +797,10 @@ class Environment(object):
 
     def _build_logger(self, level=logging.INFO):
         """return a logger. if logger is none, generate a logger from stdout"""
-        self._debug_stream = StringIO()
+        self._debug_stream = SpillingLogBuffer(
+            memory_size=self.debug_log_memory_size,
+            file_size=self.debug_log_file_size,
+        )
         logger = logging.getLogger("sprinter")
         # stdout log
         out_hdlr = logging.StreamHandler(sys.stdout)
@@ -569,6 +825,13 @@ class Environment(object):
             self._error_dict[feature] += [error_message]
         else:
             self._error_dict[feature] += error_message
+        events.emit(
+            "error",
+            namespace=self.namespace,
+            feature=feature[0],
+            formula=feature[1],
+            message=error_message,
+        )
         self.log_error(error_message)
 
     def get_error_value(self, feature):
@@ -584,7 +847,14 @@ class Environment(object):
         error = None
         instance = self.features[feature]
         try:
-            getattr(instance, action)()
+            with self.timer.time_feature(feature, action), events.span(
+                "feature",
+                namespace=self.namespace,
+                feature=feature[0],
+                formula=feature[1],
+                action=action,
+            ), feature_scope(feature):
+                getattr(instance, action)()
         # catch a generic exception within a feature
         except Exception as e:
             e = sys.exc_info()[1]
@@ -625,19 +895,13 @@ class Environment(object):
             self.log.error(message)
             raise SprinterException("invalid manifest!")
 
+    @timed
     def _specialize(self, reconfigure=False):
         """Add variables and specialize contexts"""
         # add in the 'root_dir' directories to the context dictionaries
         for manifest in [self.source, self.target]:
-            context_dict = {}
             if manifest:
-                for s in manifest.formula_sections():
-                    context_dict["%s:root_dir" % s] = self.directory.install_directory(
-                        s
-                    )
-                    context_dict["config:root_dir"] = self.directory.root_dir
-                    context_dict["config:node"] = system.NODE
-                manifest.add_additional_context(context_dict)
+                self._add_directory_context(manifest, self.directory)
         self._validate_manifest()
         for feature in self.features.run_order:
             if not reconfigure:
@@ -646,6 +910,295 @@ class Environment(object):
             instance = self.features[feature]
             if instance.target:
                 self.run_action(feature, "prompt")
+        # after resolving and prompting, as both can change the target
+        self.changes = ManifestDiff(self.source, self.target)
+
+    def _add_directory_context(self, manifest, directory):
+        """add the root_dir of the namespace, and of each feature, to the context of manifest"""
+        context_dict = {}
+        for s in manifest.formula_sections():
+            context_dict["%s:root_dir" % s] = directory.install_directory(s)
+            context_dict["config:root_dir"] = directory.root_dir
+            context_dict["config:node"] = system.NODE
+        manifest.add_additional_context(context_dict)
+
+    def _sync_features(self):
+        """
+        sync every feature. If more than one job is allowed, features
+        run concurrently as soon as the features they depend on finish,
+        the features with the longest expected path through the features
+        that depend on them first.
+        """
+        jobs = self._get_jobs()
+        if jobs <= 1:
+            for feature in self.features.run_order:
+                self._sync_feature(feature)
+            return
+        self.logger.info("Running up to %s features at once..." % jobs)
+        scheduler = DependencyScheduler(
+            self.features.run_order,
+            self._get_feature_dependencies(),
+            jobs=jobs,
+            durations=self._get_feature_durations(),
+        )
+        predicted = scheduler.predict()
+        try:
+            scheduler.run(self._sync_feature)
+        finally:
+            for feature in scheduler.cancelled:
+                self.logger.info("Skipped %s due to an earlier error." % feature[0])
+        self.logger.info(
+            "Synced features in %.1fs, %.1fs was predicted."
+            % (scheduler.makespan, predicted)
+        )
+
+    def _sync_feature(self, feature):
+        """
+        sync a feature. an update is skipped if the feature's
+        configuration is unchanged since the last successful run,
+        and an install is skipped if a resumed install completed it.
+        """
+        if self._is_completed(feature):
+            self.logger.info("%s was already installed, skipping..." % feature[0])
+            self.run_action(feature, "inject")
+        elif self._is_unselected(feature):
+            self.logger.debug("%s is not selected, skipping update..." % feature[0])
+            self.run_action(feature, "inject")
+        elif self._is_unchanged(feature):
+            self.logger.info("%s is unchanged, skipping update..." % feature[0])
+            self.run_action(feature, "inject")
+        else:
+            if self._resuming:
+                self._remove_partial_install(feature)
+            self.run_action(feature, "sync")
+            if self.phase == PHASE.INSTALL and not self._error_dict[feature]:
+                self._journal.record(feature, self._target_fingerprint(feature))
+
+    def _is_completed(self, feature):
+        """
+        return true if a resumed install completed the feature, with
+        the configuration it has now
+        """
+        if feature not in self._completed_features:
+            return False
+        return self._target_fingerprint(feature) == self._completed_features[feature]
+
+    def _target_fingerprint(self, feature):
+        """return the fingerprint of the feature's configuration in the target"""
+        return feature_fingerprint(
+            self.target.get_feature_config(feature[0]),
+            type(self.features[feature].instance),
+        )
+
+    def _remove_partial_install(self, feature):
+        """
+        remove what an interrupted install of the feature left behind,
+        so a resumed install doesn't install on top of it
+        """
+        if os.path.exists(self.directory.install_directory(feature[0])):
+            self.logger.info("Removing the partial install of %s..." % feature[0])
+            self.directory.remove_feature(feature[0])
+
+    def _select_features(self):
+        """
+        return the names of the features in only, with the features
+        they depend on (and with_dependents, the features that depend
+        on them), from the target, or the source for removed features
+        """
+        selected = set()
+        for name in self.only:
+            manifest = self.target
+            if not manifest or not manifest.has_section(name):
+                manifest = self.source
+            if name == "config" or not manifest or not manifest.has_section(name):
+                raise SprinterException(
+                    "No feature %s in environment %s!" % (name, self.namespace)
+                )
+            selected.update(
+                manifest.dtree.closure([name], with_dependants=self.with_dependents)
+            )
+        return selected
+
+    def _keep_unselected_sections(self):
+        """
+        keep the installed configuration of the features a partial
+        update skips, by writing their sections in the target from the
+        source. this is done before the target is specialized and
+        validated, so both see the manifest that will be installed.
+        """
+        for name in self.target.formula_sections():
+            if name not in self._selected_features:
+                self.target.remove_section(name)
+        for name in self.source.formula_sections():
+            if name in self._selected_features:
+                continue
+            if not self.target.has_section(name):
+                self.target.add_section(name)
+            for k, v in self.source.manifest.items(name):
+                self.target.set(name, k, v)
+        self.target.refresh_dependency_tree()
+
+    def _is_unselected(self, feature):
+        """return true if a partial update skips the feature, see only"""
+        return (
+            self._selected_features is not None
+            and feature[0] not in self._selected_features
+        )
+
+    def _use_generations(self):
+        """return true if the namespace should keep generations, see config:generations"""
+        return not self.custom_directory_root and self.main_manifest.is_affirmative(
+            "config", "generations"
+        )
+
+    def _begin_generation(self):
+        """
+        with generations, switch to a new generation to update. the
+        features that are skipped are hardlinked from the current
+        generation, and the rest are copied.
+        """
+        if not self._use_generations():
+            return
+        generations = Generations(self.directory.root_dir)
+        self._previous_generation = generations.adopt()
+        generation = generations.create(
+            [f[0] for f in self.features.run_order if not self._is_unchanged(f)]
+        )
+        generations.switch(generation)
+        self.logger.info(
+            "Updating %s as generation %s..." % (self.namespace, generation)
+        )
+
+    def _revert_generation(self):
+        """switch back to the generation an update started from"""
+        if self._previous_generation is None:
+            return
+        self.logger.info(
+            "Switching %s back to generation %s..."
+            % (self.namespace, self._previous_generation)
+        )
+        Generations(self.directory.root_dir).switch(self._previous_generation)
+        self._previous_generation = None
+
+    def _is_target_unchanged(self):
+        """
+        return true if the target is the same as the last successful
+        install or update, so there is nothing to update
+        """
+        if self.force or not self.target or not self.source:
+            return False
+        if any(
+            self.target.is_affirmative(s, "always_update")
+            for s in self.target.formula_sections()
+        ):
+            return False
+        return self._target_digest == self.source.target_digest
+
+    def _is_unchanged(self, feature):
+        """return true if an update of the feature can be skipped"""
+        if self._is_unselected(feature):
+            return True
+        if self.force or self.phase != PHASE.UPDATE:
+            return False
+        if feature[0] not in self._fingerprints:
+            return False
+        instance = self.features[feature]
+        if not (instance.source and instance.target):
+            return False
+        if instance.target.is_affirmative("always_update", False):
+            return False
+        fingerprint = feature_fingerprint(instance.target, type(instance.instance))
+        return fingerprint == self._fingerprints[feature[0]]
+
+    def _get_feature_fingerprints(self):
+        """return the fingerprints of every feature that was synced without error"""
+        fingerprints = {}
+        for feature in self.features.run_order:
+            instance = self.features[feature]
+            if self._is_unselected(feature):
+                continue
+            if instance.target and not self._error_dict[feature]:
+                fingerprints[feature[0]] = feature_fingerprint(
+                    instance.target, type(instance.instance)
+                )
+        return fingerprints
+
+    def _get_feature_durations(self):
+        """
+        return the seconds each feature is expected to sync in, from
+        the timing history of the namespace. features that will be
+        skipped are expected to take no time.
+        """
+        try:
+            records = load_history(self.timing_history_path, self.namespace)
+        except (IOError, OSError):
+            self.logger.debug("Unable to read timings", exc_info=sys.exc_info())
+            records = []
+        durations = estimate_durations(records, self.features.run_order)
+        for feature in self.features.run_order:
+            if self._is_completed(feature) or self._is_unchanged(feature):
+                durations[feature] = 0
+        return durations
+
+    def _write_timings(self, command, status):
+        """append the timings of the command to the timing history"""
+        if not self.namespace:
+            return
+        try:
+            append_history(
+                self.timing_history_path,
+                self.timer.to_dict(self.namespace, command, status),
+            )
+        except (IOError, OSError):
+            self.logger.debug("Unable to write timings", exc_info=sys.exc_info())
+
+    def _update_index(self, status, **entry):
+        """record the state of the namespace in the namespace index"""
+        # a failed install may have removed the namespace
+        if not self.namespace or self.directory is None or self.directory.new:
+            return
+        try:
+            update_index(
+                self.index_path,
+                self.namespace,
+                command=self.phase.name if self.phase else None,
+                status=status,
+                **entry
+            )
+        except (IOError, OSError):
+            self.logger.debug("Unable to update the index", exc_info=sys.exc_info())
+
+    def _fingerprint_path(self):
+        return os.path.join(self.directory.root_dir, "fingerprints.json")
+
+    def _get_jobs(self):
+        """return the number of features allowed to run at once"""
+        jobs = self.jobs
+        if jobs is None and self.main_manifest:
+            jobs = self.main_manifest.get("config", "jobs", default=1)
+        try:
+            return int(jobs or 1)
+        except ValueError:
+            raise SprinterException("jobs must be a number, got %s!" % jobs)
+
+    def _get_feature_dependencies(self):
+        """
+        return a dictionary of feature keys and the feature keys they
+        depend on, as declared by the 'depends' option of the manifests.
+        """
+        dependency_dict = {}
+        for key in self.features.run_order:
+            manifest = self.target
+            if not manifest or not manifest.has_section(key[0]):
+                manifest = self.source
+            dependencies = manifest.dtree.dependencies.get(key[0], [])
+            dependency_dict[key] = [
+                k
+                for name in dependencies
+                for k in self.features.keys_for(name)
+                if k != key
+            ]
+        return dependency_dict
 
     def _copy_source_to_target(self):
         """copy source user configuration to target"""
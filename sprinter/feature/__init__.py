@@ -1,5 +1,5 @@
 from ..core import PHASE
-from .common import execute_commmon_functionality
+from .common import execute_commmon_functionality, inject_common_configuration
 
 
 class Feature(object):
@@ -27,6 +27,13 @@ class Feature(object):
         execute_commmon_functionality(self._formula_instance)
         return result
 
+    def inject(self):
+        """
+        inject the feature's rc, env and gui configuration, without
+        installing or updating it.
+        """
+        inject_common_configuration(self._formula_instance)
+
     def remove(self):
         result = self._formula_instance.remove()
         self._formula_instance.directory.remove_feature(self.feature_name)
@@ -7,6 +7,7 @@ import logging
 import os
 
 from sprinter.core import PHASE
+from sprinter.core.manifestdiff import FeatureChanges
 from sprinter.exceptions import FormulaException
 from sprinter.lib import system
 import sprinter.lib as lib
@@ -31,11 +32,23 @@ class FormulaBase(object):
         in (no value means all systems)
     * depends (List[str], comma separated):
         a list of other formulas that must execute, before this formula.
+    * always_update (bool):
+        run update, even if the feature's configuration has not
+        changed since the last successful run.
 
     Those options are:
     """
 
-    valid_options = ["rc", "env", "gui", "command", "systems", "depends", "inputs"]
+    valid_options = [
+        "rc",
+        "env",
+        "gui",
+        "command",
+        "systems",
+        "depends",
+        "inputs",
+        "always_update",
+    ]
     required_options = ["formula"]
     deprecated_options = []
 
@@ -92,6 +105,20 @@ class FormulaBase(object):
         """
         return
 
+    def inject(self):
+        """
+        Inject is called after install and update, and instead of them
+        when a feature is skipped, as the rc, env and gui scripts are
+        written again on every run.
+
+        inject should add the lines the formula writes to those scripts,
+        other than it's rc, env and gui options, which are added for it:
+
+        * environment variables, with self.directory.add_to_env
+
+        errors should either be reported via self._log_error(), or raise an exception
+        """
+
     def remove(self):
         """
         Remove is called when a feature no longer exists.
@@ -165,15 +192,10 @@ class FormulaBase(object):
     # these methods are overwritten less often, and are not recommended to do so.
     def should_run(self):
         """Returns true if the feature should run"""
-        should_run = True
         config = self.target or self.source
         if config.has("systems"):
-            should_run = False
-            valid_systems = [s.lower() for s in config.get("systems").split(",")]
-            for system_type, param in [("is_osx", "osx"), ("is_debian", "debian")]:
-                if param in valid_systems and getattr(system, system_type)():
-                    should_run = True
-        return should_run
+            return system.is_in_systems(config.get("systems"))
+        return True
 
     def resolve(self):
         """Resolve differences between the target and the source configuration"""
@@ -207,6 +229,20 @@ class FormulaBase(object):
 
         main_manifest.set(key, lib.prompt(prompt_string, default=prompt_default))
 
+    @property
+    def changes(self):
+        """
+        the FeatureChanges of this feature between the source and the
+        target, so update can skip work if nothing it uses has changed
+        """
+        diff = getattr(self.environment, "changes", None)
+        if diff is None:
+            # the feature is run on it's own, e.g. in tests
+            return FeatureChanges.from_configs(
+                self.feature_name, self.source, self.target
+            )
+        return diff[self.feature_name]
+
     # utility methods
     def _install_directory(self):
         """
@@ -54,13 +54,8 @@ class EggscriptFormula(FormulaBase):
 
     def update(self):
         acted = False
-        if (
-            self.source.get("egg", "") != self.target.get("egg", "")
-            or self.source.get("eggs", "") != self.target.get("eggs", "")
-            or (
-                self.target.has("redownload")
-                and self.target.is_affirmative("redownload")
-            )
+        if self.changes.changed("egg", "eggs") or (
+            self.target.has("redownload") and self.target.is_affirmative("redownload")
         ):
             self.__install_eggs(self.target)
             acted = True
@@ -149,13 +144,15 @@ end pip install output ==============================================
             self.directory.install_directory(self.feature_name), "bin"
         )
         whitelist_executables = self._get_whitelisted_executables(config)
+        links = {}
         for f in os.listdir(bin_path):
             for pattern in BLACKLISTED_EXECUTABLES:
                 if re.match(pattern, f):
                     continue
             if whitelist_executables and f not in whitelist_executables:
                 continue
-            self.directory.symlink_to_bin(f, os.path.join(bin_path, f))
+            links[f] = os.path.join(bin_path, f)
+        self.directory.sync_links(self.feature_name, "bin", links)
 
     @staticmethod
     def _get_whitelisted_executables(config):
@@ -18,15 +18,10 @@ class EnvFormula(FormulaBase):
     # the keys that should be ignored during write loop (anything that has meaning elsewhere)
     ignored_keys = FormulaBase.valid_options + FormulaBase.required_options
 
-    def install(self):
+    def inject(self):
         for c in (c for c in self.target.keys() if c not in self.ignored_keys):
             self.directory.add_to_env("export %s=%s" % (c.upper(), self.target.get(c)))
-        FormulaBase.install(self)
-
-    def update(self):
-        for c in (c for c in self.target.keys() if c not in self.ignored_keys):
-            self.directory.add_to_env("export %s=%s" % (c.upper(), self.target.get(c)))
-        FormulaBase.update(self)
+        FormulaBase.inject(self)
 
     def validate(self):
         # all config values are valid
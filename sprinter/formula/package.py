@@ -32,12 +32,7 @@ class PackageFormula(FormulaBase):
         self.__get_package_manager()
         install_package = False
         if self.package_manager and self.target.has(self.package_manager):
-            if not self.source.has(self.package_manager):
-                install_package = True
-            if self.source.get(self.package_manager) != self.target.get(
-                self.package_manager
-            ):
-                install_package = True
+            install_package = self.changes.changed(self.package_manager)
         if install_package:
             self.__install_package(self.target)
         FormulaBase.update(self)
@@ -145,7 +145,6 @@ class PerforceFormula(FormulaBase):
             self.__write_p4settings(config)
         if config.is_affirmative("overwrite_client") and installed:
             self.__configure_client(config)
-        self.__add_p4_env(config)
         FormulaBase.install(self)
 
     def update(self):
@@ -156,10 +155,13 @@ class PerforceFormula(FormulaBase):
             )
             self.__install_perforce(self.target)
             acted = True
-        self.__add_p4_env(self.target)
         FormulaBase.update(self)
         return acted
 
+    def inject(self):
+        self.__add_p4_env(self.target)
+        FormulaBase.inject(self)
+
     def remove(self):
         if self.source.is_affirmative("remove_p4root", False):
             self.logger.info("Removing %s..." % self.source.get("root_path"))
@@ -194,7 +196,9 @@ class PerforceFormula(FormulaBase):
             fh.write(
                 lib.cleaned_request("get", url_prefix + perforce_packages["p4"]).content
             )
-        self.directory.symlink_to_bin("p4", os.path.join(d, "p4"))
+        self.directory.symlink_to_bin(
+            "p4", os.path.join(d, "p4"), feature_name=self.feature_name
+        )
         self.p4_command = os.path.join(d, "p4")
         self.logger.info("Installing p4v...")
         if system.is_osx():
@@ -227,7 +231,9 @@ class PerforceFormula(FormulaBase):
         )
         if os.path.exists(bin_path):
             for f in os.listdir(bin_path):
-                self.directory.symlink_to_bin(f, os.path.join(bin_path, f))
+                self.directory.symlink_to_bin(
+                    f, os.path.join(bin_path, f), feature_name=self.feature_name
+                )
         return True
 
     def __write_p4settings(self, config):
@@ -256,11 +262,9 @@ class PerforceFormula(FormulaBase):
         self.logger.info("Configuring p4 client...")
         client_dict = config.to_dict()
         client_dict["root_path"] = os.path.expanduser(config.get("root_path"))
-        os.chdir(client_dict["root_path"])
         client_dict["hostname"] = system.NODE
-        client_dict["p4view"] = (
-            config["p4view"] % self.environment.target.get_context_dict()
-        )
+        context_dict = self.environment.target.get_context_dict(self.feature_name)
+        client_dict["p4view"] = config["p4view"] % context_dict
         client = re.sub("//depot", "    //depot", p4client_template % client_dict)
         self.logger.info(
             lib.call(
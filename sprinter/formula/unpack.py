@@ -49,7 +49,7 @@ class UnpackFormula(FormulaBase):
             self.install()
             return True
 
-        if self.source.get("url") != self.target.get("url"):
+        if self.changes.changed("url"):
             acted = True
             if os.path.exists(self.directory.install_directory(self.feature_name)):
                 try:
@@ -136,7 +136,9 @@ class UnpackFormula(FormulaBase):
             "Symlinking executable at %s to bin/%s" % (source_path, target)
         )
         try:
-            self.directory.symlink_to_bin(target, source_path)
+            self.directory.symlink_to_bin(
+                target, source_path, feature_name=self.feature_name
+            )
         except OSError:
             self.logger.warn(
                 "Could not find source path, unable to symlink! %s" % source
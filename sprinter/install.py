@@ -1,10 +1,16 @@
 """Sprinter, an environment installation and management tool.
 Usage:
-  sprinter install <environment_source> [-avi -n <namespace> -u <username> -p <password> -l <local_path> --allow-bad-certificate]
-  sprinter update <environment_name> [-ravi -u <username> -p <password> --allow-bad-certificate]
-  sprinter (remove | deactivate | activate) <environment_name> [-v]
-  sprinter validate <environment_source> [-avi -u <username> -p <password> --allow-bad-certificate]
+  sprinter install <environment_source> [-avi -n <namespace> -u <username> -p <password> -l <local_path> -j <jobs> --resume --events <events> --offline --allow-bad-certificate]
+  sprinter update (<environment_name> | --all) [-ravif -u <username> -p <password> -j <jobs> --only <features> --with-dependents --events <events> --offline --allow-bad-certificate]
+  sprinter (remove | deactivate | activate) <environment_name> [-v --events <events>]
+  sprinter rollback <environment_name> [-v]
+  sprinter gc [<environment_name>] [-v --keep <generations>]
+  sprinter plan <environment_source> [-av -n <namespace> --from <installed_source> -u <username> -p <password> --offline --allow-bad-certificate]
+  sprinter validate <environment_source> [-avi -u <username> -p <password> --offline --allow-bad-certificate]
+  sprinter lint <manifest_sources>... [-v --json --offline --allow-bad-certificate]
   sprinter (list)
+  sprinter stats <environment_name>
+  sprinter status [<environment_name>] [--json]
   sprinter globals [-r]
   sprinter (-h | --help)
   sprinter (-V | --version)
@@ -14,28 +20,55 @@ Options:
   -v, --verbose                             Sprinter output is verbose
   -n <namespace>, --namespace <namespace>   Explicitely specify a namespace to name the environment, on install
   -r, --reconfigure                         During an update, ask the user again for customization parameters
+  -f, --force                               During an update, update features even if their configuration has not changed
   -a, --auth                                When pulling environment configurations, attempt basic authentication
   -u <username>, --username <username>      When using basic authentication, this is the username used
   -p <password>, --password <password>      When using basic authentication, this is the password used
   -l, --local <local_path>                  Intall the environment as a local. This installs objects relative to the local directory, and doesn't inject.
+  --all                                     With update, update every installed namespace, up to <jobs> namespaces at once
+  --only <features>                         With update of an environment, only update these comma separated features, and the features they depend on
+  --with-dependents                         With --only, also update the features that depend on them
+  --resume                                  With install, continue a failed install, keeping the features it completed
+  --keep <generations>                      With gc, the number of generations to keep before the current one
+  --from <installed_source>                 With plan, compare against this manifest instead of the installed one
   -i, --ignore-errors                       Ignore errors in a formula
+  -j <jobs>, --jobs <jobs>                  Run up to <jobs> features at once, once the features they depend on are finished
+  --events <events>                         Write a json line for each phase, feature action, command and download to <events>, a path or file descriptor
+  --offline                                 Use cached copies of manifests, without touching the network
+  --json                                    With status, print the namespace index as json. With lint, print the problems as json
   --allow-bad-certificate                   Do not verify ssl certificates when pulling environment configurations
   -V, --version                             Show version.
 """
 from __future__ import unicode_literals
+import json
 import logging
 import os
+import shutil
 import signal
 import sys
-import pkg_resources
+import tempfile
+import time
 from docopt import docopt
 
 import sprinter.lib as lib
-from sprinter.core import PHASE, Manifest, ManifestException, Directory, manifest
+from sprinter.core import (
+    PHASE,
+    Manifest,
+    ManifestException,
+    Directory,
+    commit_injections,
+    manifest,
+)
 from sprinter.environment import Environment
 from sprinter.exceptions import SprinterException
+from sprinter.lib import events
+from sprinter.lib.scheduler import DependencyScheduler
 from sprinter.lib.request import BadCredentialsException
 from sprinter.core.globals import print_global_config, configure_config, write_config
+from sprinter.core import analyzer, generations, index, timings
+
+# the number of namespaces updated at once by update --all
+UPDATE_ALL_JOBS = 4
 
 
 def signal_handler(signal, frame):
@@ -63,23 +96,43 @@ def error(message):
 
 
 def parse_args(argv, Environment=Environment):
-    options = docopt(
-        __doc__, argv=argv, version=pkg_resources.get_distribution("sprinter").version
-    )
+    options = docopt(__doc__, argv=argv)
+    if options["--version"]:
+        # pkg_resources is slow to import, so it is only imported when needed
+        import pkg_resources
+
+        print(pkg_resources.get_distribution("sprinter").version)
+        return
     logging_level = logging.DEBUG if options["--verbose"] else logging.INFO
     # start processing commands
     env = Environment(
         logging_level=logging_level, ignore_errors=options["--ignore-errors"]
     )
+    if options["--jobs"]:
+        env.jobs = options["--jobs"]
+    if (
+        options["list"]
+        or options["validate"]
+        or options["lint"]
+        or options["plan"]
+        or options["stats"]
+        or options["status"]
+        or options["rollback"]
+        or options["gc"]
+    ):
+        env.read_only = True
+    if options["globals"] and not options["--reconfigure"]:
+        env.read_only = True
+    if options["--events"]:
+        events.open_stream(options["--events"])
+    lib.request.enable_http_cache(env.http_cache_path, offline=options["--offline"])
     try:
         if options["install"]:
             target = options["<environment_source>"]
 
             def handle_install_shutdown(signal, frame):
                 if env.phase == PHASE.INSTALL:
-                    print("Removing install...")
-                    env.directory.remove()
-                    env.clear_all()
+                    env.clear_failed_install()
                 signal_handler(signal, frame)
 
             signal.signal(signal.SIGINT, handle_install_shutdown)
@@ -103,25 +156,24 @@ def parse_args(argv, Environment=Environment):
                 env.custom_directory_root = os.path.abspath(
                     os.path.expanduser(options["--local"])
                 )
+            env.resume = options["--resume"]
             env.install()
 
+        elif options["update"] and options["--all"]:
+            if options["--username"] or options["--auth"]:
+                options = get_credentials(options, "all namespaces")
+            update_all(env, options, Environment=Environment)
+
         elif options["update"]:
             target = options["<environment_name>"]
-            env.directory = Directory(
-                os.path.join(env.root, target), shell_util_path=env.shell_util_path
-            )
-            env.source = manifest.load_manifest(
-                env.directory.manifest_path, do_inherit=False
-            )
-            use_auth = options["--username"] or options["--auth"]
-            if use_auth:
+            if options["--username"] or options["--auth"]:
                 options = get_credentials(options, target)
-            env.target = manifest.load_manifest(
-                env.source.source(),
-                username=options["<username>"] if use_auth else None,
-                password=options["<password>"] if use_auth else None,
-                verify_certificate=(not options["--allow-bad-certificate"]),
-            )
+            prepare_update(env, target, options)
+            if options["--only"]:
+                env.only = [
+                    f.strip() for f in options["--only"].split(",") if f.strip()
+                ]
+                env.with_dependents = options["--with-dependents"]
             env.update(reconfigure=options["--reconfigure"])
 
         elif options["remove"]:
@@ -160,11 +212,66 @@ def parse_args(argv, Environment=Environment):
             )
             env.activate()
 
+        elif options["plan"]:
+            target = options["<environment_source>"]
+            if options["--username"] or options["--auth"]:
+                options = get_credentials(options, parse_domain(target))
+                target = manifest.load_manifest(
+                    target,
+                    username=options["<username>"],
+                    password=options["<password>"],
+                    verify_certificate=(not options["--allow-bad-certificate"]),
+                )
+            else:
+                target = manifest.load_manifest(
+                    target, verify_certificate=(not options["--allow-bad-certificate"])
+                )
+            env.target = target
+            if options["--namespace"]:
+                env.namespace = options["--namespace"]
+            if options["--from"]:
+                env.source = options["--from"]
+            print_plan(env.plan())
+
+        elif options["rollback"]:
+            namespace = options["<environment_name>"]
+            generation = generations.Generations(
+                os.path.join(env.root, namespace)
+            ).rollback()
+            index.update_index(
+                env.index_path, namespace, command="rollback", status="success"
+            )
+            env.logger.info(
+                "Rolled back %s to generation %s." % (namespace, generation)
+            )
+
+        elif options["gc"]:
+            gc_generations(env, options["<environment_name>"], options["--keep"])
+
         elif options["list"]:
             for _env in os.listdir(env.root):
-                if _env != ".global":
+                if _env not in (".global", generations.GENERATIONS_DIRECTORY):
                     print(_env)
 
+        elif options["stats"]:
+            print_stats(
+                timings.load_history(
+                    env.timing_history_path, namespace=options["<environment_name>"]
+                )
+            )
+
+        elif options["status"]:
+            namespace_index = index.load_index(env.index_path)
+            if options["<environment_name>"]:
+                namespace = options["<environment_name>"]
+                namespace_index = {
+                    k: v for k, v in namespace_index.items() if k == namespace
+                }
+            if options["--json"]:
+                print(json.dumps(namespace_index, sort_keys=True, indent=2))
+            else:
+                print_status(namespace_index)
+
         elif options["validate"]:
             if options["--username"] or options["--auth"]:
                 options = get_credentials(options, parse_domain(target))
@@ -180,6 +287,28 @@ def parse_args(argv, Environment=Environment):
                 print("No errors! Manifest is valid!")
             else:
                 "Manifest is invalid! Please see errors above."
+        elif options["lint"]:
+            schema_index = analyzer.SchemaIndex(env.formula_schema_path)
+            results = lint_manifests(
+                options["<manifest_sources>"],
+                schema_index,
+                verify_certificate=(not options["--allow-bad-certificate"]),
+            )
+            schema_index.save()
+            if options["--json"]:
+                print(
+                    json.dumps(
+                        dict(
+                            (source, [p._asdict() for p in problems])
+                            for source, problems in results
+                        ),
+                        sort_keys=True,
+                        indent=2,
+                    )
+                )
+            else:
+                print_lint(results)
+
         elif options["globals"]:
             if options["--reconfigure"]:
                 configure_config(env.global_config, reconfigure=True)
@@ -213,6 +342,235 @@ the sprinter action failed! Writing debug output to /tmp/sprinter.log
         """.strip()
         )
         raise
+    finally:
+        lib.request.disable_http_cache()
+        events.close_stream()
+
+
+def prepare_update(env, namespace, options):
+    """load the installed and target manifests of a namespace into env"""
+    env.directory = Directory(
+        os.path.join(env.root, namespace), shell_util_path=env.shell_util_path
+    )
+    env.source = manifest.load_manifest(env.directory.manifest_path, do_inherit=False)
+    use_auth = options["--username"] or options["--auth"]
+    env.target = manifest.load_manifest(
+        env.source.source(),
+        username=options["<username>"] if use_auth else None,
+        password=options["<password>"] if use_auth else None,
+        verify_certificate=(not options["--allow-bad-certificate"]),
+    )
+    env.force = options["--force"]
+
+
+def gc_generations(env, namespace=None, keep=None):
+    """remove the old generations of a namespace, or of every namespace"""
+    keep = generations.KEEP_GENERATIONS if keep is None else int(keep)
+    if namespace:
+        namespaces = [namespace]
+    elif os.path.isdir(os.path.join(env.root, generations.GENERATIONS_DIRECTORY)):
+        namespaces = sorted(
+            os.listdir(os.path.join(env.root, generations.GENERATIONS_DIRECTORY))
+        )
+    else:
+        namespaces = []
+    for namespace in namespaces:
+        removed = generations.Generations(os.path.join(env.root, namespace)).gc(
+            keep=keep
+        )
+        if removed:
+            env.logger.info(
+                "Removed %s generation(s) of %s." % (len(removed), namespace)
+            )
+
+
+def update_all(env, options, Environment=Environment):
+    """
+    update every namespace in the sprinter root, up to --jobs at once.
+
+    the namespaces share env's global config, logger, http session, a
+    download cache and the parent manifests they extend. injections into
+    the shell files are committed together, once every namespace has
+    finished.
+
+    as the namespaces share the process, the update is non-interactive:
+    an input without a default fails the namespace, which can then be
+    updated on it's own.
+    """
+    namespaces = [
+        n
+        for n in sorted(os.listdir(env.root))
+        if n not in (".global", generations.GENERATIONS_DIRECTORY)
+        and os.path.isdir(os.path.join(env.root, n))
+    ]
+    environments = {}
+    for namespace in namespaces:
+        namespace_env = Environment(
+            logger=env.logger,
+            root=env.root,
+            global_config=env.global_config,
+            ignore_errors=env.ignore_errors,
+        )
+        namespace_env.namespace = namespace
+        namespace_env.commit_injections = False
+        environments[namespace] = namespace_env
+
+    errors = {}
+
+    def update(namespace):
+        namespace_env = environments[namespace]
+        try:
+            prepare_update(namespace_env, namespace, options)
+            namespace_env.update(reconfigure=options["--reconfigure"])
+        except Exception as e:
+            env.logger.debug("", exc_info=sys.exc_info())
+            errors[namespace] = e
+            env.log_error("Unable to update %s: %s" % (namespace, e))
+
+    cache_dir = tempfile.mkdtemp()
+    try:
+        with lib.non_interactive(), manifest.shared_manifest_cache():
+            with lib.request.shared_session(), lib.request.download_cache(cache_dir):
+                DependencyScheduler(
+                    namespaces, {}, jobs=int(env.jobs or UPDATE_ALL_JOBS)
+                ).run(update)
+    finally:
+        shutil.rmtree(cache_dir)
+
+    updated = [n for n in namespaces if n not in errors]
+    if updated:
+        env.logger.info("Committing injections...")
+        # the global injections are the same for every namespace
+        commit_injections(
+            [environments[n].injections for n in updated]
+            + [environments[updated[0]].global_injections]
+        )
+
+    env.logger.info("Updated %s of %s namespaces." % (len(updated), len(namespaces)))
+    if errors:
+        raise SprinterException(
+            "Unable to update %s!" % ", ".join(sorted(errors.keys()))
+        )
+
+
+def lint_manifests(sources, schema_index, **kwargs):
+    """
+    return a list of each manifest in sources, and the problems with
+    it. a source that is a directory is searched for .cfg files.
+    """
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            for root, _, files in sorted(os.walk(source)):
+                paths += [
+                    os.path.join(root, f) for f in sorted(files) if f.endswith(".cfg")
+                ]
+        else:
+            paths.append(source)
+    results = []
+    with manifest.shared_manifest_cache():
+        for path in paths:
+            try:
+                raw_manifest = manifest.load_raw_manifest(path, **kwargs)
+                problems = analyzer.analyze_manifest(raw_manifest, schema_index)
+            except ManifestException:
+                problems = [
+                    analyzer.Problem(analyzer.ERROR, None, str(sys.exc_info()[1]))
+                ]
+            results.append((path, problems))
+    return results
+
+
+def print_lint(results):
+    """print the problems with each manifest, and a summary"""
+    counts = {analyzer.ERROR: 0, analyzer.WARNING: 0}
+    for source, problems in results:
+        for problem in problems:
+            print(
+                "{0}: {1}: {2}{3}".format(
+                    source,
+                    problem.level,
+                    "[%s] " % problem.feature if problem.feature else "",
+                    problem.message,
+                )
+            )
+            counts[problem.level] += 1
+    print(
+        "\n{0} error(s) and {1} warning(s) in {2} manifest(s).".format(
+            counts[analyzer.ERROR], counts[analyzer.WARNING], len(results)
+        )
+    )
+
+
+def print_plan(planned_actions):
+    """print the action each feature would take, and a summary"""
+    counts = {}
+    for planned in planned_actions:
+        print(
+            "{0:<8} {1} ({2}): {3}".format(
+                planned.action, planned.feature, planned.formula, planned.reason
+            )
+        )
+        counts[planned.action] = counts.get(planned.action, 0) + 1
+    print(
+        "\n{0} to install, {1} to update, {2} to remove, {3} to skip.".format(
+            *[counts.get(a, 0) for a in ("install", "update", "remove", "skip")]
+        )
+    )
+
+
+def print_stats(records):
+    """print the p50 and p95 durations of phases and feature actions across runs"""
+    if not records:
+        print("No timings have been recorded yet!")
+        return
+    print("Timings across {0} run(s):\n".format(len(records)))
+    print("{0:<30} {1:<26} {2:>8} {3:>8} {4:>8}".format("", "", "p50", "p95", "last"))
+    regressions = []
+    for name, action, durations in timings.summarize(records):
+        print(
+            "{0:<30} {1:<26} {2:>7.2f}s {3:>7.2f}s {4:>7.2f}s".format(
+                name,
+                action,
+                timings.percentile(durations, 50),
+                timings.percentile(durations, 95),
+                durations[-1],
+            )
+        )
+        if timings.is_regression(durations):
+            regressions.append((name, action, durations[-2], durations[-1]))
+    if regressions:
+        print("\nRegressions against the previous run:")
+        for name, action, previous, last in regressions:
+            print(
+                "  {0} {1}: {2:.2f}s -> {3:.2f}s".format(name, action, previous, last)
+            )
+
+
+def print_status(namespace_index):
+    """print the state of each namespace in the index"""
+    if not namespace_index:
+        print("No namespaces have been recorded yet!")
+        return
+    print(
+        "{0:<20} {1:<8} {2:<10} {3:>8} {4:<19} {5}".format(
+            "namespace", "status", "command", "features", "updated", "source"
+        )
+    )
+    for namespace, entry in sorted(namespace_index.items()):
+        updated = entry.get("updated")
+        print(
+            "{0:<20} {1:<8} {2:<10} {3:>8} {4:<19} {5}".format(
+                namespace,
+                entry.get("status", ""),
+                entry.get("command", ""),
+                entry.get("features", ""),
+                time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(updated))
+                if updated
+                else "",
+                entry.get("source") or "",
+            )
+        )
 
 
 def parse_domain(url):
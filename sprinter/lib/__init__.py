@@ -7,6 +7,7 @@ from __future__ import unicode_literals
 import logging
 import re
 
+from contextlib import contextmanager
 from getpass import getpass
 
 from six import string_types
@@ -22,11 +23,18 @@ BOOLEAN_DEFAULTS = {
     'y_n': { True: ' (Y|n): ', False: ' (y|N): ' },
     'yes_no': { True: ' (YES|no): ', False: ' (yes|NO): ' }
 }
+# prompts are answered with their default while this is false
+_interactive = True
+
+
+class NonInteractiveException(Exception):
+    """ Raised when a prompt without a default can not ask the user """
+
 
 from .extract import extract_dmg, extract_targz, extract_zip, remove_path, ExtractException
 from .command import call, whitespace_smart_split, which, is_executable, CommandMissingException
 from .module import get_subclass_from_module
-from .request import CertificateException, BadCredentialsException, authenticated_get, cleaned_request
+from .request import CertificateException, BadCredentialsException, OfflineException, authenticated_get, cleaned_request
 
 
 def prompt(prompt_string, default=None, secret=False, boolean=False, bool_type=None):
@@ -43,7 +51,11 @@ def prompt(prompt_string, default=None, secret=False, boolean=False, bool_type=N
     else:
         default_msg = " (default {val}): "
     prompt_string += (default_msg.format(val=default) if default else ": ")
-    if secret:
+    if not _interactive:
+        if default is None:
+            raise NonInteractiveException("Unable to ask %r, prompts are disabled!" % prompt_string)
+        val = None
+    elif secret:
         val = getpass(prompt_string)
     else:
         val = input(prompt_string)
@@ -53,6 +65,17 @@ def prompt(prompt_string, default=None, secret=False, boolean=False, bool_type=N
     return val
 
 
+@contextmanager
+def non_interactive():
+    """ Answer every prompt with it's default, failing if there is none """
+    global _interactive
+    interactive, _interactive = _interactive, False
+    try:
+        yield
+    finally:
+        _interactive = interactive
+
+
 def is_affirmative(phrase):
     """
     Determine if a phrase is in the affirmative
@@ -4,6 +4,8 @@ import logging
 import subprocess
 import sys
 
+from . import events
+
 COMMAND_WHITELIST = ["cd"]
 
 logger = logging.getLogger(__name__)
@@ -33,10 +35,16 @@ def call(command, stdin=None, stdout=subprocess.PIPE, env=os.environ, cwd=None,
             raise CommandMissingException(args[0])
         if shell:
             kw['shell'] = True
+        event_command = command if not sensitive_info else None
+        events.emit("subprocess_start", command=event_command, cwd=cwd)
+        start = events.monotonic()
         process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=stdout,
                                    stderr=subprocess.STDOUT, env=env, cwd=cwd,
                                    **kw)
         output = process.communicate(input=stdin)[0]
+        events.emit("subprocess_exit", command=event_command, cwd=cwd,
+                    returncode=process.returncode,
+                    duration=events.monotonic() - start)
         if output is not None:
             try:
                 logger.log(output_log_level, output.decode('utf-8'))
@@ -14,40 +14,127 @@ class DependencyTreeException(Exception):
 class DependencyTree(object):
     """
     DependencyTree takes a dictionary of nodes and their dependencies (also need to be included in the dependencies)
+
+    levels groups the nodes into waves: every node in a level only depends on nodes in earlier levels, so the nodes
+    of a level can run concurrently. order is the levels in sequence, with the nodes of a level in the order of the
+    node dictionary.
     """
 
     order = []  # a valid ordering of the dependency tree
+    levels = []  # the nodes, grouped into levels that only depend on earlier levels
+    dependencies = {}  # the dictionary of nodes and their dependencies
 
     def __init__(self, node_dict):
-        self.order = self.__calculate_order(node_dict)
+        self.dependencies = node_dict
+        self._dependants = self.__calculate_dependants(node_dict)
+        self.levels = self.__calculate_levels(node_dict)
+        self.order = [node for level in self.levels for node in level]
+
+    @classmethod
+    def from_order(cls, node_dict, order):
+        """
+        Create a DependencyTree from an order that has already been validated, e.g. one that was serialized
+        """
+        tree = cls.__new__(cls)
+        tree.dependencies = node_dict
+        tree._dependants = tree.__calculate_dependants(node_dict)
+        tree.order = list(order)
+        level_of = {}
+        tree.levels = []
+        for node in tree.order:
+            level = max([level_of[d] + 1 for d in node_dict[node] if d in level_of] or [0])
+            level_of[node] = level
+            if level == len(tree.levels):
+                tree.levels.append([])
+            tree.levels[level].append(node)
+        return tree
+
+    def dependants(self, node, recursive=False):
+        """
+        Return the nodes that depend on node, in the order of the tree. If recursive is true, the nodes that
+        depend on those nodes are included, and so on.
+        """
+        found = set(self._dependants[node])
+        stack = list(found) if recursive else []
+        while stack:
+            for dependant in self._dependants[stack.pop()]:
+                if dependant not in found:
+                    found.add(dependant)
+                    stack.append(dependant)
+        return [n for n in self.order if n in found]
 
-    def __calculate_order(self, node_dict):
+    def closure(self, nodes, with_dependants=False):
         """
-        Determine a valid ordering of the nodes in which a node is not called before all of it's dependencies.
+        Return the nodes, and every node they depend on, in order. If with_dependants is true, the nodes that
+        depend on them are included too, with the nodes they depend on.
+        """
+        found = set(nodes)
+        if with_dependants:
+            for node in nodes:
+                found.update(self.dependants(node, recursive=True))
+        stack = list(found)
+        while stack:
+            for dependency in self.dependencies[stack.pop()]:
+                if dependency not in found:
+                    found.add(dependency)
+                    stack.append(dependency)
+        return [n for n in self.order if n in found]
+
+    def __calculate_dependants(self, node_dict):
+        dependants = dict((node, []) for node in node_dict)
+        for node, dependencies in node_dict.items():
+            for dependency in set(dependencies):
+                if dependency in dependants:
+                    dependants[dependency].append(node)
+        return dependants
+
+    def __calculate_levels(self, node_dict):
+        """
+        Group the nodes into levels, in which a node is not in a level before all of it's dependencies, in
+        O(nodes + dependencies).
 
         Raise an error if there is a cycle, or nodes are missing.
         """
-        if len(node_dict.keys()) != len(set(node_dict.keys())):
-            raise DependencyTreeException("Duplicate Keys Exist in node dictionary!")
-        valid_order = [node for node, dependencies in node_dict.items() if len(dependencies) == 0]
-        remaining_nodes = [node for node in node_dict.keys() if node not in valid_order]
-        while len(remaining_nodes) > 0:
-            node_added = False
-            for node in remaining_nodes:
-                dependencies = [d for d in node_dict[node] if d not in valid_order]
-                if len(dependencies) == 0:
-                    valid_order.append(node)
-                    remaining_nodes.remove(node)
-                    node_added = True
-            if not node_added:
-                # the tree must be invalid, as it was not possible to remove a node.
-                # it's hard to find all the errors, so just spit out the first one you can find.
-                invalid_node = remaining_nodes[0]
-                invalid_dependency = ', '.join(node_dict[invalid_node])
-                if invalid_dependency not in remaining_nodes:
-                    raise DependencyTreeException(
-                        "Missing dependency! One or more of ({dependency}) are missing for {dependant}.".format(
-                            dependant=invalid_node, dependency=invalid_dependency))
-                else:
-                    raise DependencyTreeException("The dependency %s is cyclic or dependent on a cyclic dependency" % invalid_dependency)
-        return valid_order
+        for node, dependencies in node_dict.items():
+            missing = [d for d in dependencies if d not in node_dict]
+            if missing:
+                raise DependencyTreeException(
+                    "Missing dependency! {dependency} {verb} missing for {dependant}.".format(
+                        dependant=node, dependency=', '.join(missing), verb="is" if len(missing) == 1 else "are"))
+        remaining = dict((node, len(set(dependencies))) for node, dependencies in node_dict.items())
+        level_of = {}
+        wave = [node for node in node_dict if remaining[node] == 0]
+        level = 0
+        while wave:
+            next_wave = []
+            for node in wave:
+                level_of[node] = level
+                for dependant in self._dependants[node]:
+                    remaining[dependant] -= 1
+                    if remaining[dependant] == 0:
+                        next_wave.append(dependant)
+            wave = next_wave
+            level += 1
+        if len(level_of) < len(node_dict):
+            raise DependencyTreeException(
+                "Cyclic dependency! %s" % " -> ".join(self.__find_cycle(node_dict, level_of)))
+        # keep the nodes of each level in the order of the node dictionary
+        levels = [[] for _ in range(level)]
+        for node in node_dict:
+            levels[level_of[node]].append(node)
+        return levels
+
+    def __find_cycle(self, node_dict, ordered):
+        """
+        Return a cycle among the nodes that could not be ordered, as a list of the nodes in it, starting and
+        ending with the same node.
+        """
+        unordered = [node for node in node_dict if node not in ordered]
+        # every unordered node depends on another unordered node, so following dependencies must loop
+        path, position = [], {}
+        node = unordered[0]
+        while node not in position:
+            position[node] = len(path)
+            path.append(node)
+            node = next(d for d in node_dict[node] if d not in ordered)
+        return path[position[node]:] + [node]
@@ -0,0 +1,106 @@
+"""
+events.py emits a machine-readable stream of what sprinter is doing,
+as one json object per line:
+
+{"event": "feature_end", "time": 1400000000.0, "feature": "git", "action": "sync", "duration": 1.2, "status": "success"}
+
+events are handed to a background thread through a queue, so emitting
+an event never waits on the stream being written to. when no stream is
+open, emitting an event does nothing.
+"""
+from __future__ import unicode_literals
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from six.moves import queue
+
+logger = logging.getLogger(__name__)
+
+# python 2 does not have a monotonic clock
+monotonic = getattr(time, "monotonic", time.time)
+
+_stream = None  # the open EventStream, if any
+
+
+class EventStream(object):
+    """ Writes events to a file handle from a background thread """
+
+    def __init__(self, file_handle):
+        self._file_handle = file_handle
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._write_events)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def emit(self, event):
+        self._queue.put_nowait(event)
+
+    def close(self):
+        """ write any remaining events, and close the stream """
+        self._queue.put_nowait(None)
+        self._thread.join()
+        self._file_handle.close()
+
+    def _write_events(self):
+        while True:
+            event = self._queue.get()
+            try:
+                if event is None:
+                    self._file_handle.flush()
+                    return
+                self._file_handle.write(json.dumps(event, sort_keys=True) + "\n")
+                if self._queue.empty():
+                    self._file_handle.flush()
+            except (IOError, OSError, TypeError, ValueError):
+                logger.debug("Unable to write event %s" % event, exc_info=True)
+
+
+def open_stream(target):
+    """
+    Start emitting events to target: a file descriptor number, or a
+    path to append to
+    """
+    global _stream
+    if target.isdigit():
+        file_handle = os.fdopen(int(target), "w")
+    else:
+        file_handle = open(target, "a")
+    _stream = EventStream(file_handle)
+    return _stream
+
+
+def close_stream():
+    """ Stop emitting events, writing any that remain """
+    global _stream
+    if _stream is not None:
+        stream, _stream = _stream, None
+        stream.close()
+
+
+def emit(event, **fields):
+    """ Emit an event, if a stream is open """
+    if _stream is None:
+        return
+    fields["event"] = event
+    fields["time"] = time.time()
+    _stream.emit(fields)
+
+
+@contextmanager
+def span(kind, **fields):
+    """
+    Emit <kind>_start before the block and <kind>_end after it,
+    with the duration and whether the block raised
+    """
+    emit(kind + "_start", **fields)
+    start = monotonic()
+    status = "error"
+    try:
+        yield
+        status = "success"
+    finally:
+        emit(kind + "_end", duration=monotonic() - start, status=status, **fields)
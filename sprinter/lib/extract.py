@@ -5,9 +5,7 @@ from __future__ import unicode_literals
 import os
 import shutil
 import sys
-import tarfile
 import tempfile
-import zipfile
 
 from .command import call
 from .request import download_to_bytesio
@@ -22,6 +20,8 @@ def extract_targz(url, target_dir, remove_common_prefix=False, overwrite=False):
 
 def extract_tar(url, target_dir, additional_compression="", remove_common_prefix=False, overwrite=False):
     """ extract a targz and install to the target directory """
+    # imported when used, to keep commands that don't extract fast to start
+    import tarfile
     try:
         if not os.path.exists(target_dir):
             os.makedirs(target_dir)
@@ -51,6 +51,7 @@ def extract_tar(url, target_dir, additional_compression="", remove_common_prefix
 
 
 def extract_zip(url, target_dir, remove_common_prefix=False, overwrite=False):
+    import zipfile
     try:
         if not os.path.exists(target_dir):
             os.makedirs(target_dir)
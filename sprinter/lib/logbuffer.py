@@ -0,0 +1,80 @@
+"""
+logbuffer.py holds a bounded log, to be written out on failure.
+
+the log is held in memory until it grows past memory_size, after which
+it spills to a temporary file. once that file grows past file_size it
+is rotated, and the file before it is dropped, so at most memory_size +
+2 * file_size bytes are ever held.
+"""
+from __future__ import unicode_literals
+import tempfile
+
+CHUNK_SIZE = 64 * 1024
+
+
+class SpillingLogBuffer(object):
+    """A file-like object to write a log to, with bounded storage"""
+
+    memory_size = 1024 * 1024  # the number of bytes to hold in memory
+    file_size = 32 * 1024 * 1024  # the number of bytes to hold per spill file
+
+    def __init__(self, memory_size=None, file_size=None):
+        if memory_size is not None:
+            self.memory_size = memory_size
+        if file_size is not None:
+            self.file_size = file_size
+        self.dropped = 0  # the number of bytes dropped by rotation
+        self._memory = []
+        self._memory_length = 0
+        self._current_file = None
+        self._previous_file = None
+
+    def write(self, content):
+        if not isinstance(content, bytes):
+            content = content.encode("utf-8")
+        self._memory.append(content)
+        self._memory_length += len(content)
+        if self._memory_length > self.memory_size:
+            self._spill()
+
+    def flush(self):
+        pass
+
+    def copy_to(self, file_handle):
+        """write the whole log, oldest first, to a binary file handle"""
+        if self.dropped:
+            file_handle.write(
+                (
+                    "[%s bytes of the log were dropped to bound it's size]\n"
+                    % self.dropped
+                ).encode("utf-8")
+            )
+        for spill_file in (self._previous_file, self._current_file):
+            if spill_file is not None:
+                spill_file.seek(0)
+                chunk = spill_file.read(CHUNK_SIZE)
+                while chunk:
+                    file_handle.write(chunk)
+                    chunk = spill_file.read(CHUNK_SIZE)
+                spill_file.seek(0, 2)
+        for content in self._memory:
+            file_handle.write(content)
+
+    def close(self):
+        for spill_file in (self._previous_file, self._current_file):
+            if spill_file is not None:
+                spill_file.close()
+        self._previous_file = self._current_file = None
+        self._memory, self._memory_length = [], 0
+
+    def _spill(self):
+        """move the in-memory log to the spill file, rotating it if it is full"""
+        if self._current_file is not None and self._current_file.tell() > self.file_size:
+            if self._previous_file is not None:
+                self.dropped += self._previous_file.tell()
+                self._previous_file.close()
+            self._previous_file, self._current_file = self._current_file, None
+        if self._current_file is None:
+            self._current_file = tempfile.TemporaryFile(prefix="sprinter-log-")
+        self._current_file.write(b"".join(self._memory))
+        self._memory, self._memory_length = [], 0
@@ -1,6 +1,4 @@
 from __future__ import unicode_literals
-import inspect
-import imp
 import sys
 
 from sprinter.exceptions import SprinterException
@@ -13,6 +11,8 @@ def get_subclass_from_module(module, parent_class):
     get_subclass_from_module performs reflection to find the first class that
     extends the parent_class in the module path, and returns it.
     """
+    # imported when used, to keep commands that don't load formulas fast to start
+    import inspect
     try:
         r = __recursive_import(module)
         member_dict = dict(inspect.getmembers(r))
@@ -39,6 +39,7 @@ def __recursive_import(module_name):
 
     currently module with relative imports don't work.
     """
+    import imp
     names = module_name.split(".")
     path = None
     module = None
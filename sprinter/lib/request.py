@@ -1,12 +1,24 @@
 from __future__ import unicode_literals
 
+import hashlib
+import json
 import logging
-import requests
+import os
 import io
-from clint.textui import progress
+import threading
+from contextlib import contextmanager
+
+from . import events
 
 logger = logging.getLogger()
 
+_session = None  # a session shared by requests, see shared_session()
+_download_cache_dir = None  # a directory to cache downloads in, see download_cache()
+_download_locks = {}
+_download_locks_lock = threading.Lock()
+_http_cache_dir = None  # a directory to cache gets in, see enable_http_cache()
+_offline = False  # only use cached gets, see enable_http_cache()
+
 
 class BadCredentialsException(Exception):
     """ Returned if the credentials are incorrect """
@@ -16,10 +28,17 @@ class CertificateException(Exception):
     """ Returned if the certificates are incorrect """
 
 
+class OfflineException(Exception):
+    """ Returned if a url is not cached, and sprinter is offline """
+
+
 def authenticated_get(username, password, url, verify=True):
     """
     Perform an authorized query to the url, and return the result
     """
+    if _http_cache_dir is not None:
+        return cached_get(url, verify=verify, auth=(username, password))
+    import requests
     try:
         response = requests.get(url, auth=(username, password), verify=verify)
         if response.status_code == 401:
@@ -33,20 +52,180 @@ def authenticated_get(username, password, url, verify=True):
 
 def cleaned_request(request_type, *args, **kwargs):
     """ Perform a cleaned requests request """
-    s = requests.Session()
-    # this removes netrc checking
-    s.trust_env = False
+    s = _session or _cleaned_session()
     return s.request(request_type, *args, **kwargs)
 
 
+def enable_http_cache(cache_dir, offline=False):
+    """
+    Cache the bodies of gets made through cached_get and
+    authenticated_get in cache_dir, revalidating them with the server
+    before they are used. If offline, cached bodies are used without
+    touching the network.
+    """
+    global _http_cache_dir, _offline
+    _http_cache_dir, _offline = cache_dir, offline
+
+
+def disable_http_cache():
+    global _http_cache_dir, _offline
+    _http_cache_dir, _offline = None, False
+
+
+def http_cache_enabled():
+    return _http_cache_dir is not None
+
+
+def cached_get(url, verify=True, auth=None):
+    """
+    Return the body of the url, through the http cache.
+
+    A cached body is revalidated with If-None-Match / If-Modified-Since,
+    and only downloaded again if it changed. With auth, a (username,
+    password) tuple, the request is authenticated and cached per user.
+    """
+    import requests
+    username = auth[0] if auth else ''
+    body_path = os.path.join(
+        _http_cache_dir,
+        hashlib.sha1('{0}\n{1}'.format(username, url).encode('utf-8')).hexdigest())
+    cached = _read_http_cache(body_path)
+    if _offline:
+        if cached is None:
+            raise OfflineException(
+                "{0} has not been cached, and sprinter is offline!".format(url))
+        logger.debug("Using cached copy of {0}".format(url))
+        return cached[0]
+    headers = {}
+    if cached is not None:
+        if cached[1].get('etag'):
+            headers['If-None-Match'] = cached[1]['etag']
+        if cached[1].get('last_modified'):
+            headers['If-Modified-Since'] = cached[1]['last_modified']
+    if auth:
+        try:
+            response = requests.get(url, auth=auth, verify=verify, headers=headers)
+        except requests.exceptions.SSLError:
+            raise CertificateException("Unable to verify certificate at %s!" % url)
+        if response.status_code == 401:
+            raise BadCredentialsException(
+                "Unable to authenticate user %s to %s with password provided!"
+                % (username, url))
+    else:
+        response = cleaned_request('get', url, verify=verify, headers=headers)
+    if response.status_code == 304 and cached is not None:
+        logger.debug("Cached copy of {0} is up to date".format(url))
+        return cached[0]
+    if response.status_code == 200:
+        _write_http_cache(body_path, response.content, {
+            'url': url,
+            'username': username,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        })
+    return response.content
+
+
+def _read_http_cache(body_path):
+    """ return a tuple of the cached body and it's headers, or None """
+    if not os.path.exists(body_path) or not os.path.exists(body_path + '.json'):
+        return None
+    try:
+        with open(body_path + '.json') as fh:
+            headers = json.load(fh)
+        with open(body_path, 'rb') as fh:
+            return fh.read(), headers
+    except (IOError, ValueError):
+        logger.debug("Unable to read cache {0}".format(body_path), exc_info=True)
+        return None
+
+
+def _write_http_cache(body_path, body, headers):
+    if not os.path.exists(_http_cache_dir):
+        os.makedirs(_http_cache_dir)
+    # bodies may be authenticated, so only the user can read them
+    for path, content in ((body_path, body),
+                          (body_path + '.json', json.dumps(headers).encode('utf-8'))):
+        part_path = path + '.part'
+        fd = os.open(part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(content)
+        os.rename(part_path, path)
+
+
+@contextmanager
+def shared_session():
+    """
+    Share one cleaned session, and it's connection pool, between
+    the requests made within the block
+    """
+    global _session
+    _session = _cleaned_session()
+    try:
+        yield _session
+    finally:
+        _session.close()
+        _session = None
+
+
+@contextmanager
+def download_cache(cache_dir):
+    """
+    Cache downloads by url in cache_dir within the block, so a url
+    is only downloaded once
+    """
+    global _download_cache_dir
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+    _download_cache_dir = cache_dir
+    try:
+        yield cache_dir
+    finally:
+        _download_cache_dir = None
+
+
 def download_to_bytesio(url):
     """ Return a bytesio object with a download bar """
+    if _download_cache_dir is None:
+        return _download_to_bytesio(url)
+    cache_path = os.path.join(
+        _download_cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest())
+    with _download_locks_lock:
+        lock = _download_locks.setdefault(url, threading.Lock())
+    with lock:
+        if os.path.exists(cache_path):
+            logger.info("Using cached download of url: {0}".format(url))
+            with open(cache_path, 'rb') as fh:
+                stream = io.BytesIO(fh.read())
+            events.emit("download", url=url, bytes=len(stream.getvalue()),
+                        cached=True)
+            return stream
+        stream = _download_to_bytesio(url)
+        with open(cache_path + '.part', 'wb') as fh:
+            fh.write(stream.getvalue())
+        os.rename(cache_path + '.part', cache_path)
+        return stream
+
+
+def _cleaned_session():
+    import requests
+    s = requests.Session()
+    # this removes netrc checking
+    s.trust_env = False
+    return s
+
+
+def _download_to_bytesio(url):
+    from clint.textui import progress
     logger.info("Downloading url: {0}".format(url))
+    start = events.monotonic()
     r = cleaned_request('get', url, stream=True)
     stream = io.BytesIO()
     total_length = int(r.headers.get('content-length'))
     for chunk in progress.bar(r.iter_content(chunk_size=1024), expected_size=(total_length/1024) + 1):
         if chunk:
             stream.write(chunk)
+    events.emit("download", url=url, bytes=stream.tell(), cached=False,
+                duration=events.monotonic() - start)
     stream.seek(0)
     return stream
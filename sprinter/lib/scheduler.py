@@ -0,0 +1,166 @@
+"""
+scheduler.py runs an action over the nodes of a dependency tree, starting
+each node as soon as all of its dependencies have finished.
+
+when the durations of nodes can be estimated, the ready node with the
+longest path of durations through the nodes that depend on it (the
+critical path) starts first, so long chains aren't started last.
+"""
+from __future__ import unicode_literals
+import heapq
+import sys
+import threading
+import time
+
+from six import reraise
+
+# python 2 does not have a monotonic clock
+monotonic = getattr(time, "monotonic", time.time)
+
+
+class DependencyScheduler(object):
+    """
+    DependencyScheduler takes a valid ordering of nodes (such as
+    DependencyTree.order) and a dictionary of nodes and their
+    dependencies, and runs an action for every node on up to <jobs>
+    worker threads.
+
+    dependencies that are not part of the ordering are ignored.
+
+    durations is an optional dictionary of nodes and the seconds they
+    are expected to take. ready nodes start in order of their critical
+    path, and then in the order of the ordering.
+    """
+
+    order = []  # a valid ordering of the nodes
+    jobs = 1  # the maximum number of nodes to run at once
+    cancelled = []  # the nodes that were not started due to an error
+    makespan = None  # the seconds the last run took
+
+    def __init__(self, order, node_dict, jobs=1, durations=None):
+        self.order = list(order)
+        self.jobs = max(1, int(jobs))
+        self.cancelled = []
+        self._durations = durations or {}
+        self._index = dict((node, i) for i, node in enumerate(self.order))
+        self._dependencies = {}
+        self._dependants = dict((node, []) for node in self.order)
+        for node in self.order:
+            dependencies = set(
+                d for d in node_dict.get(node, []) if d in self._index and d != node
+            )
+            self._dependencies[node] = dependencies
+            for d in dependencies:
+                self._dependants[d].append(node)
+        self._critical_path = self.__calculate_critical_paths()
+
+    def critical_path(self, node):
+        """return the seconds from starting node to finishing the nodes that depend on it"""
+        return self._critical_path[node]
+
+    def predict(self):
+        """
+        return the seconds a run is expected to take, from the
+        durations of the nodes, scheduled as they would be run
+        """
+        remaining = dict((n, len(d)) for n, d in self._dependencies.items())
+        ready = sorted(
+            (n for n in self.order if remaining[n] == 0), key=self._ready_key
+        )
+        running = []  # a heap of the nodes running, by when they finish
+        clock = 0.0
+        while ready or running:
+            while ready and len(running) < self.jobs:
+                node = ready.pop(0)
+                finish = clock + self._durations.get(node, 0)
+                heapq.heappush(running, (finish, self._index[node], node))
+            clock, _, node = heapq.heappop(running)
+            for dependant in self._dependants[node]:
+                remaining[dependant] -= 1
+                if remaining[dependant] == 0:
+                    ready.append(dependant)
+            ready.sort(key=self._ready_key)
+        return clock
+
+    def run(self, action):
+        """
+        Call action(node) for every node. The first exception raised
+        by an action, including a SystemExit or KeyboardInterrupt,
+        stops any node that has not started yet from running, and is
+        re-raised once the running nodes have finished. So is an
+        interrupt of the calling thread while it waits on the workers.
+        """
+        condition = threading.Condition()
+        remaining = dict((n, len(d)) for n, d in self._dependencies.items())
+        ready = sorted(
+            (n for n in self.order if remaining[n] == 0), key=self._ready_key
+        )
+        state = {"running": 0, "error": None}
+        started = set()
+
+        def worker():
+            while True:
+                with condition:
+                    while not ready and state["running"] and state["error"] is None:
+                        condition.wait()
+                    if not ready or state["error"] is not None:
+                        return
+                    node = ready.pop(0)
+                    started.add(node)
+                    state["running"] += 1
+                try:
+                    action(node)
+                except BaseException:
+                    with condition:
+                        state["running"] -= 1
+                        if state["error"] is None:
+                            state["error"] = sys.exc_info()
+                        condition.notify_all()
+                    continue
+                with condition:
+                    state["running"] -= 1
+                    for dependant in self._dependants[node]:
+                        remaining[dependant] -= 1
+                        if remaining[dependant] == 0:
+                            ready.append(dependant)
+                    ready.sort(key=self._ready_key)
+                    condition.notify_all()
+
+        start = monotonic()
+        if self.jobs == 1:
+            worker()
+        else:
+            threads = [threading.Thread(target=worker) for _ in range(self.jobs)]
+            for t in threads:
+                t.daemon = True
+                t.start()
+            try:
+                for t in threads:
+                    t.join()
+            except BaseException:
+                # the caller may undo what the nodes did, so the running
+                # nodes finish before the interrupt is re-raised
+                interrupt = sys.exc_info()
+                with condition:
+                    if state["error"] is None:
+                        state["error"] = interrupt
+                    condition.notify_all()
+                for t in threads:
+                    t.join()
+                state["error"] = interrupt
+
+        self.makespan = monotonic() - start
+        self.cancelled = [n for n in self.order if n not in started]
+        if state["error"] is not None:
+            reraise(*state["error"])
+
+    def _ready_key(self, node):
+        return (-self._critical_path[node], self._index[node])
+
+    def __calculate_critical_paths(self):
+        critical_path = {}
+        for node in reversed(self.order):
+            critical_path[node] = self._durations.get(node, 0) + max(
+                [critical_path[d] for d in self._dependants[node]] or [0]
+            )
+        return critical_path
@@ -6,14 +6,25 @@ as:
 * debian, fedora, or os x based
 """
 from __future__ import unicode_literals
-import platform
+import os
 import re
 
 debian_match = re.compile(".*(ubuntu|debian).*", re.IGNORECASE)
 fedora_match = re.compile(".*(RHEL).*", re.IGNORECASE)
 
-SYSTEM, NODE, RELEASE, VERSION, ARCHITECTURE, PROCESSOR = platform.uname()
-LINUX_DISTRO, LINUX_VERSION, LINUX_VERSION_NAME = platform.dist()
+# os.uname, unlike platform.uname, doesn't run a subprocess on import
+SYSTEM, NODE, RELEASE, VERSION, ARCHITECTURE = os.uname()
+_linux_distribution = None  # see linux_distribution()
+
+
+def linux_distribution():
+    """ return the (distro, version, version name) of the system, read when first needed """
+    global _linux_distribution
+    if _linux_distribution is None:
+        import platform
+        _linux_distribution = platform.dist()
+    return _linux_distribution
+
 
 def get_system_info():
     """ return the system info as a string """
@@ -33,17 +44,17 @@ def is_arch():
 
 def is_debian():
     """ returns true if the system is debian based """
-    return LINUX_DISTRO.lower() in ['ubuntu', 'debian', 'linuxmint']
+    return linux_distribution()[0].lower() in ['ubuntu', 'debian', 'linuxmint']
 
 
 def is_fedora():
     """ returns true if the system is fedora based """
-    return LINUX_DISTRO.lower() in ['centos', 'redhat', 'fedora']
+    return linux_distribution()[0].lower() in ['centos', 'redhat', 'fedora']
 
 
 def is_suse():
     """ returns true if the system is suse based """
-    return LINUX_DISTRO.lower() in ['suse']
+    return linux_distribution()[0].lower() in ['suse']
 
 
 def is_osx():
@@ -58,9 +69,19 @@ def is_64_bit():
     return ARCHITECTURE == "x86_64"
 
 
+def is_in_systems(systems):
+    """
+    returns true if the system is one of the comma-separated systems
+    (osx or debian)
+    """
+    valid_systems = [s.strip().lower() for s in systems.split(",")]
+    return ("osx" in valid_systems and is_osx()) or (
+        "debian" in valid_systems and is_debian())
+
+
 def operating_system():
     """ return the name of the operating system """
-    return LINUX_DISTRO or SYSTEM
+    return linux_distribution()[0] or SYSTEM
 
 
 def is_officially_supported():
@@ -1,3 +1,5 @@
+from nose.tools import eq_
+
 from sprinter.lib.dependencytree import DependencyTree, DependencyTreeException
 
 LEGAL_TREE = {
@@ -52,3 +54,60 @@ class TestDependencyTree(object):
         except DependencyTreeException:
             return
         raise("Cyclic tree did not raise an error!")
+
+    def test_levels(self):
+        """ Test whether nodes are grouped into levels that only depend on earlier levels """
+        dt = DependencyTree(LEGAL_TREE)
+        eq_(dt.levels, [['d', 'c', 'e'], ['b'], ['a']])
+        eq_(dt.order, ['d', 'c', 'e', 'b', 'a'])
+
+    def test_dependants(self):
+        """ Test the reverse dependencies of a node """
+        dt = DependencyTree(LEGAL_TREE)
+        eq_(dt.dependants('d'), ['b', 'a'])
+        eq_(dt.dependants('d', recursive=True), ['b', 'a'])
+        eq_(dt.dependants('e'), [])
+
+    def test_dependants_diamond(self):
+        """ Test the dependants of a diamond are returned in the order of the tree """
+        dt = DependencyTree({
+            'top': ['left', 'right'],
+            'left': ['bottom'],
+            'right': ['bottom', 'middle'],
+            'middle': ['bottom'],
+            'bottom': []
+        })
+        # right depends on middle, so it comes after it in any order
+        eq_(dt.dependants('bottom'), [n for n in dt.order if n in ('left', 'middle', 'right')])
+        eq_(dt.dependants('bottom')[-1], 'right')
+        eq_(dt.dependants('bottom', recursive=True), dt.order[1:])
+        eq_(dt.dependants('middle'), ['right'])
+
+    def test_cycle_path(self):
+        """ Test the cycle is reported, without the nodes that depend on it """
+        try:
+            DependencyTree(CYCLIC_TREE)
+        except DependencyTreeException as e:
+            eq_(str(e), "Cyclic dependency! a -> d -> a")
+            return
+        raise AssertionError("Cyclic tree did not raise an error!")
+
+    def test_missing_dependencies_listed(self):
+        """ Test every missing dependency is reported """
+        try:
+            DependencyTree(MISSING_ENTRY_TREE)
+        except DependencyTreeException as e:
+            eq_(str(e), "Missing dependency! c, d are missing for a.")
+            return
+        raise AssertionError("Missing entry tree did not raise an error!")
+
+    def test_from_order(self):
+        """ Test a tree created from a serialized order has the same levels """
+        dt = DependencyTree(LEGAL_TREE)
+        eq_(DependencyTree.from_order(LEGAL_TREE, dt.order).levels, dt.levels)
+
+    def test_closure(self):
+        """ Test the closure of nodes includes what they depend on, and optionally what depends on them """
+        dt = DependencyTree(LEGAL_TREE)
+        eq_(dt.closure(['b']), ['d', 'b'])
+        eq_(dt.closure(['d'], with_dependants=True), ['d', 'c', 'b', 'a'])
@@ -0,0 +1,89 @@
+import json
+import os
+import shutil
+import tempfile
+
+from nose.tools import eq_, ok_, raises
+
+from sprinter.lib import events
+from sprinter.lib.command import call
+
+
+class TestEvents(object):
+
+    def setup(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "events.jsonl")
+
+    def teardown(self):
+        events.close_stream()
+        shutil.rmtree(self.temp_dir)
+
+    def _read_events(self):
+        with open(self.path) as fh:
+            return [json.loads(line) for line in fh]
+
+    def test_emit_without_stream(self):
+        """ Emitting an event without an open stream should do nothing """
+        events.emit("phase_start", phase="warmup")
+        ok_(not os.path.exists(self.path))
+
+    def test_emit(self):
+        """ Events should be written as json lines, in order, once the stream is closed """
+        events.open_stream(self.path)
+        for i in range(100):
+            events.emit("test", index=i)
+        events.close_stream()
+        written = self._read_events()
+        eq_([e["index"] for e in written], list(range(100)))
+        ok_(all(e["event"] == "test" and "time" in e for e in written))
+
+    def test_file_descriptor(self):
+        """ A file descriptor number should be written to directly """
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT)
+        events.open_stream(str(fd))
+        events.emit("test")
+        events.close_stream()
+        eq_([e["event"] for e in self._read_events()], ["test"])
+
+    def test_span(self):
+        """ A span should emit a start and end event, with the duration """
+        events.open_stream(self.path)
+        with events.span("phase", phase="warmup"):
+            pass
+        events.close_stream()
+        start, end = self._read_events()
+        eq_(start["event"], "phase_start")
+        eq_(end["event"], "phase_end")
+        eq_(end["status"], "success")
+        eq_(end["phase"], "warmup")
+        ok_(end["duration"] >= 0)
+
+    @raises(ValueError)
+    def test_span_error(self):
+        """ A span that raises should emit an end event with an error status """
+        events.open_stream(self.path)
+        try:
+            with events.span("feature", feature="git", action="sync"):
+                raise ValueError("failed")
+        finally:
+            events.close_stream()
+            eq_(self._read_events()[-1]["status"], "error")
+
+    def test_call(self):
+        """ Calling a command should emit it's start and exit """
+        events.open_stream(self.path)
+        call("echo hello")
+        events.close_stream()
+        start, exit = self._read_events()
+        eq_(start["event"], "subprocess_start")
+        eq_(exit["event"], "subprocess_exit")
+        eq_(exit["command"], "echo hello")
+        eq_(exit["returncode"], 0)
+
+    def test_call_sensitive(self):
+        """ Calling a command with sensitive info should not emit the command """
+        events.open_stream(self.path)
+        call("echo secret", sensitive_info=True)
+        events.close_stream()
+        ok_(all(e["command"] is None for e in self._read_events()))
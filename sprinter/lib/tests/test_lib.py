@@ -50,6 +50,14 @@ class TestLib(object):
             """ An ampersand and other variables in quotes should not split """
             tools.eq_(lib.whitespace_smart_split('"ae09ge&eai"'), ['\"ae09ge&eai\"'])
 
+        def test_prompt_non_interactive(self):
+            """ A prompt should answer it's default without asking the user when non-interactive """
+            with patch("sprinter.lib.input") as input, lib.non_interactive():
+                tools.eq_(lib.prompt("name", default="sprinter"), "sprinter")
+                tools.eq_(lib.prompt("continue", default="yes", boolean=True), True)
+                tools.assert_raises(lib.NonInteractiveException, lib.prompt, "name")
+            assert not input.called
+
         def test_call_no_output(self):
             """ A process that returns nothing back should not raise an exception """
             lib.call("echo")
@@ -206,6 +214,54 @@ class TestLib(object):
                                    body=CONTENT, status=401)
             lib.authenticated_get("username", "password", TEST_URI)
 
+        @httpretty.activate
+        def test_download_cache(self):
+            """ Within a download cache, a url should only be downloaded once """
+            TEST_URI = "http://testme.com/test.tar.gz"
+            CONTENT = b"hello world"
+            httpretty.register_uri(httpretty.GET, TEST_URI, body=CONTENT,
+                                   adding_headers={'content-length': str(len(CONTENT))})
+            cache_dir = tempfile.mkdtemp()
+            try:
+                with lib.request.shared_session(), lib.request.download_cache(cache_dir):
+                    tools.eq_(lib.request.download_to_bytesio(TEST_URI).read(), CONTENT)
+                    tools.eq_(lib.request.download_to_bytesio(TEST_URI).read(), CONTENT)
+                tools.eq_(len(httpretty.latest_requests()), 1)
+            finally:
+                shutil.rmtree(cache_dir)
+
+        @httpretty.activate
+        def test_http_cache(self):
+            """ A cached get should be revalidated, and used offline """
+            TEST_URI = "http://testme.com/test.cfg"
+            CONTENT = b"[config]"
+            cache_dir = tempfile.mkdtemp()
+
+            def respond(request, uri, headers):
+                if request.headers.get('If-None-Match') == '"v1"':
+                    return (304, headers, "")
+                headers['ETag'] = '"v1"'
+                return (200, headers, CONTENT)
+
+            httpretty.register_uri(httpretty.GET, TEST_URI, body=respond)
+            try:
+                lib.request.enable_http_cache(cache_dir)
+                tools.eq_(lib.request.cached_get(TEST_URI), CONTENT)
+                tools.eq_(lib.request.cached_get(TEST_URI), CONTENT)
+                tools.eq_(httpretty.last_request().headers.get('If-None-Match'), '"v1"')
+                # authenticated gets are cached per user
+                tools.eq_(lib.authenticated_get("user", "password", TEST_URI), CONTENT)
+                tools.ok_(httpretty.last_request().headers.get('If-None-Match') is None)
+                request_count = len(httpretty.latest_requests())
+                lib.request.enable_http_cache(cache_dir, offline=True)
+                tools.eq_(lib.request.cached_get(TEST_URI), CONTENT)
+                tools.eq_(len(httpretty.latest_requests()), request_count)
+                tools.assert_raises(lib.OfflineException, lib.request.cached_get,
+                                    "http://testme.com/other.cfg")
+            finally:
+                lib.request.disable_http_cache()
+                shutil.rmtree(cache_dir)
+
         @patch.object(lib, 'call')
         def test_insert_environment_osx(self, call):
             """ Insert environment gui should inject variables into the environment """
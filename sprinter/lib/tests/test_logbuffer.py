@@ -0,0 +1,48 @@
+from io import BytesIO
+
+from nose.tools import eq_, ok_
+
+from sprinter.lib.logbuffer import SpillingLogBuffer
+
+
+def _contents(log_buffer):
+    fh = BytesIO()
+    log_buffer.copy_to(fh)
+    return fh.getvalue()
+
+
+class TestSpillingLogBuffer(object):
+
+    def test_in_memory(self):
+        """ A small log should be held in memory, and copied in order """
+        log_buffer = SpillingLogBuffer()
+        log_buffer.write("hello ")
+        log_buffer.write(u"wörld\n")
+        eq_(_contents(log_buffer), u"hello wörld\n".encode("utf-8"))
+        ok_(log_buffer._current_file is None)
+
+    def test_spills_to_disk(self):
+        """ A log larger than the memory size should spill to a file, and keep it's order """
+        log_buffer = SpillingLogBuffer(memory_size=10)
+        lines = ["line %s\n" % i for i in range(20)]
+        for line in lines:
+            log_buffer.write(line)
+        ok_(log_buffer._current_file is not None)
+        ok_(log_buffer._memory_length <= 10)
+        eq_(_contents(log_buffer), "".join(lines).encode("utf-8"))
+        # copying should not disturb further writes
+        log_buffer.write("last\n")
+        eq_(_contents(log_buffer), ("".join(lines) + "last\n").encode("utf-8"))
+        log_buffer.close()
+
+    def test_rotation_bounds_size(self):
+        """ Once the spill files are full, the oldest log should be dropped """
+        log_buffer = SpillingLogBuffer(memory_size=10, file_size=100)
+        for i in range(1000):
+            log_buffer.write("line %s\n" % i)
+        contents = _contents(log_buffer)
+        ok_(log_buffer.dropped > 0)
+        ok_(len(contents) < 400)
+        ok_(contents.startswith(b"["))
+        ok_(contents.endswith(b"line 999\n"))
+        log_buffer.close()
@@ -0,0 +1,152 @@
+import signal
+import threading
+import time
+
+from nose.tools import eq_, ok_, raises
+
+from sprinter.lib.dependencytree import DependencyTree
+from sprinter.lib.scheduler import DependencyScheduler
+
+TREE = {"a": ["b", "c", "d"], "d": [], "c": [], "b": ["d"], "e": []}
+
+
+class TestDependencyScheduler(object):
+    def test_serial_run_follows_order(self):
+        """With one job, nodes should run exactly in the order given"""
+        order = DependencyTree(TREE).order
+        ran = []
+        DependencyScheduler(order, TREE, jobs=1).run(ran.append)
+        eq_(ran, order)
+
+    def test_dependencies_finish_first(self):
+        """A node should not start until all of its dependencies have finished"""
+        finished = []
+        lock = threading.Lock()
+
+        def action(node):
+            for dependency in TREE[node]:
+                assert dependency in finished, "%s started before %s" % (
+                    node,
+                    dependency,
+                )
+            time.sleep(0.01)
+            with lock:
+                finished.append(node)
+
+        DependencyScheduler(DependencyTree(TREE).order, TREE, jobs=4).run(action)
+        eq_(set(finished), set(TREE))
+
+    def test_independent_nodes_run_concurrently(self):
+        """Nodes without dependencies between them should run at the same time"""
+        tree = {"a": [], "b": [], "c": []}
+        barrier = threading.Barrier(3, timeout=5)
+        DependencyScheduler(["a", "b", "c"], tree, jobs=3).run(
+            lambda node: barrier.wait()
+        )
+
+    def test_failure_cancels_unstarted_nodes(self):
+        """The first failure should stop nodes that have not started"""
+        tree = {"a": [], "b": ["a"], "c": ["b"]}
+        ran = []
+
+        def action(node):
+            ran.append(node)
+            if node == "a":
+                raise ValueError("failed")
+
+        scheduler = DependencyScheduler(["a", "b", "c"], tree, jobs=2)
+        try:
+            scheduler.run(action)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("the failure was not re-raised!")
+        eq_(ran, ["a"])
+        eq_(scheduler.cancelled, ["b", "c"])
+
+    def test_interrupt_stops_run(self):
+        """A SystemExit in an action should end the run, and be re-raised"""
+        tree = {"a": [], "b": ["a"], "c": []}
+        outcome = []
+
+        def action(node):
+            if node == "a":
+                raise SystemExit(1)
+            time.sleep(0.01)
+
+        def run():
+            try:
+                DependencyScheduler(["a", "b", "c"], tree, jobs=2).run(action)
+            except SystemExit:
+                outcome.append("exited")
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        ok_(not thread.is_alive(), "the run did not finish!")
+        eq_(outcome, ["exited"])
+
+    def test_caller_interrupt_waits_for_running_nodes(self):
+        """An interrupt of the caller should stop the run once the running nodes finish"""
+        tree = {"a": [], "b": ["a"]}
+        finished = []
+        outcome = []
+
+        def action(node):
+            time.sleep(0.3)
+            finished.append(node)
+
+        def interrupt(signum, frame):
+            raise KeyboardInterrupt()
+
+        handler = signal.signal(signal.SIGALRM, interrupt)
+        signal.setitimer(signal.ITIMER_REAL, 0.1)
+        try:
+            DependencyScheduler(["a", "b"], tree, jobs=2).run(action)
+        except KeyboardInterrupt:
+            outcome.append("interrupted")
+        finally:
+            signal.signal(signal.SIGALRM, handler)
+        eq_(outcome, ["interrupted"])
+        eq_(finished, ["a"])
+
+    @raises(ValueError)
+    def test_serial_failure_raises(self):
+        """A failure with a single job should be re-raised"""
+
+        def action(node):
+            raise ValueError(node)
+
+        DependencyScheduler(["a"], {"a": []}).run(action)
+
+    def test_critical_path_starts_first(self):
+        """The ready node with the longest path of durations should start first"""
+        tree = {"short": [], "long": [], "after": ["long"]}
+        durations = {"short": 5, "long": 2, "after": 4}
+        scheduler = DependencyScheduler(
+            ["short", "long", "after"], tree, jobs=1, durations=durations
+        )
+        eq_(scheduler.critical_path("long"), 6)
+        ran = []
+        scheduler.run(ran.append)
+        eq_(ran, ["long", "short", "after"])
+        ok_(scheduler.makespan >= 0)
+
+    def test_predict(self):
+        """predict should simulate the run with the durations of the nodes"""
+        tree = {"short": [], "long": [], "after": ["long"]}
+        durations = {"short": 5, "long": 2, "after": 4}
+        eq_(DependencyScheduler(["short", "long", "after"], tree, jobs=2).predict(), 0)
+        eq_(
+            DependencyScheduler(
+                ["short", "long", "after"], tree, jobs=2, durations=durations
+            ).predict(),
+            6,
+        )
+        eq_(
+            DependencyScheduler(
+                ["short", "long", "after"], tree, jobs=1, durations=durations
+            ).predict(),
+            11,
+        )
@@ -24,3 +24,37 @@ else:
         if not isinstance(s, unicode):
             s = s.decode("utf8")
         return s
+
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+try:
+    from collections import ChainMap
+except ImportError:
+
+    class ChainMap(Mapping):
+        """
+        a read only backport of python 3's ChainMap: a view of several
+        mappings, where a key is looked up in each mapping in turn.
+        """
+
+        def __init__(self, *maps):
+            self.maps = list(maps) or [{}]
+
+        def __getitem__(self, key):
+            for mapping in self.maps:
+                if key in mapping:
+                    return mapping[key]
+            raise KeyError(key)
+
+        def __contains__(self, key):
+            return any(key in m for m in self.maps)
+
+        def __iter__(self):
+            return iter(set().union(*self.maps))
+
+        def __len__(self):
+            return len(set().union(*self.maps))
@@ -4,7 +4,8 @@ throughout files on the file system.
 
 These operations are batched and applied together with the commit
 command, or applied separately with the destructive_inject and
-destructive_clear..
+destructive_clear.. commit_injections applies the batches of several
+Injections together.
 """
 from __future__ import unicode_literals
 import codecs
@@ -67,13 +68,7 @@ class Injections(object):
         self.logger.debug(self.inject_dict)
         self.logger.debug("Clear list is:")
         self.logger.debug(self.clear_set)
-        for filename, content in self.inject_dict.items():
-            content = _unicode(content)
-            self.logger.debug("Injecting values into %s..." % filename)
-            self.destructive_inject(filename, content)
-        for filename in self.clear_set:
-            self.logger.debug("Clearing injection from %s..." % filename)
-            self.destructive_clear(filename)
+        commit_injections([self])
 
     def injected(self, filename):
         """Return true if the file has already been injected before."""
@@ -92,7 +87,7 @@ class Injections(object):
         """
         content = _unicode(content)
         backup_file(filename)
-        full_path = self.__generate_file(filename)
+        full_path = _generate_file(filename, self.logger)
         with codecs.open(full_path, "r", encoding="utf-8") as f:
             new_content = self.inject_content(f.read(), content)
         with codecs.open(full_path, "w+", encoding="utf-8") as f:
@@ -102,27 +97,12 @@ class Injections(object):
         backup_file(filename)
         if not os.path.exists(os.path.expanduser(filename)):
             return
-        full_path = self.__generate_file(filename)
+        full_path = _generate_file(filename, self.logger)
         with codecs.open(full_path, "r", encoding="utf-8") as f:
             new_content = self.clear_content(f.read())
         with codecs.open(full_path, "w+", encoding="utf-8") as f:
             f.write(new_content)
 
-    def __generate_file(self, file_path):
-        """
-        Generate the file at the file_path desired. Creates any needed
-        directories on the way. returns the absolute path of the file.
-        """
-        file_path = os.path.expanduser(file_path)
-        if not os.path.exists(os.path.dirname(file_path)):
-            self.logger.debug(
-                "Directories missing! Creating directories for %s..." % file_path
-            )
-            os.makedirs(os.path.dirname(file_path))
-        if not os.path.exists(file_path):
-            open(file_path, "w+").close()
-        return file_path
-
     def in_noninjected_file(self, file_path, content):
         """Checks if a string exists in the file, sans the injected"""
         if os.path.exists(file_path):
@@ -169,6 +149,51 @@ class Injections(object):
         return self.wrapper_match.sub("", content)
 
 
+def commit_injections(injections_list):
+    """
+    commit the injections of every Injections in injections_list,
+    reading and writing each file they touch once.
+    """
+    filenames = []
+    for injections in injections_list:
+        for filename in list(injections.inject_dict) + list(injections.clear_set):
+            if filename not in filenames:
+                filenames.append(filename)
+    for filename in filenames:
+        injecting = [i for i in injections_list if filename in i.inject_dict]
+        if not injecting and not os.path.exists(os.path.expanduser(filename)):
+            continue
+        logger = injections_list[0].logger
+        logger.debug("Updating injections in %s..." % filename)
+        backup_file(filename)
+        full_path = _generate_file(filename, logger)
+        with codecs.open(full_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        for injections in injections_list:
+            if filename in injections.inject_dict:
+                content = injections.inject_content(
+                    content, _unicode(injections.inject_dict[filename])
+                )
+            if filename in injections.clear_set:
+                content = injections.clear_content(content)
+        with codecs.open(full_path, "w+", encoding="utf-8") as f:
+            f.write(content)
+
+
+def _generate_file(file_path, logger):
+    """
+    Generate the file at the file_path desired. Creates any needed
+    directories on the way. returns the absolute path of the file.
+    """
+    file_path = os.path.expanduser(file_path)
+    if not os.path.exists(os.path.dirname(file_path)):
+        logger.debug("Directories missing! Creating directories for %s..." % file_path)
+        os.makedirs(os.path.dirname(file_path))
+    if not os.path.exists(file_path):
+        open(file_path, "w+").close()
+    return file_path
+
+
 def backup_file(filename):
     """create a backup of the file desired"""
     if not os.path.exists(filename):
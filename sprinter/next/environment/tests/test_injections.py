@@ -3,7 +3,7 @@ import shutil
 import tempfile
 import pytest
 
-from sprinter.next.environment.injections import Injections
+from sprinter.next.environment.injections import Injections, commit_injections
 
 TEST_CONTENT = """
 Testing abc.
@@ -168,3 +168,16 @@ def test_clear_nonexistent_file(tmpdir):
     i.clear(new_file)
     i.commit()
     assert not os.path.exists(new_file)
+
+
+def test_commit_injections(test_file, injections):
+    """commit_injections should apply several injections to a file together"""
+    other = Injections("otherinjection", override="OVERRIDE")
+    other.inject(test_file.strpath, "other injection")
+    other.commit()
+    injections.inject(test_file.strpath, TEST_INJECTION)
+    other.clear(test_file.strpath)
+    commit_injections([injections, other])
+    assert test_file.read().count(TEST_INJECTION) == 1
+    assert test_file.read().find("other injection") == -1
+    assert test_file.read().find(PERMANENT_STRING) != -1
@@ -1,7 +1,9 @@
 from __future__ import unicode_literals
+import json
 import os
 import shutil
 import tempfile
+from six import StringIO
 from mock import Mock, call, patch
 from nose import tools
 from nose.tools import eq_, raises, ok_
@@ -9,7 +11,15 @@ from sprinter.testtools import MockEnvironment, create_mock_formulabase
 from sprinter.exceptions import SprinterException, FormulaException
 from sprinter.environment import Environment
 from sprinter.core.templates import source_template
+from sprinter.core import PHASE
+from sprinter.core.generations import Generations
 from sprinter.core.globals import create_default_config
+from sprinter.core.fingerprints import load_fingerprints
+from sprinter.core.index import load_index
+from sprinter.core.manifest import load_manifest
+from sprinter.core.journal import Journal
+from sprinter.core.timings import feature_timings, load_history
+from sprinter.lib import events
 
 source_config = """
 [config]
@@ -354,6 +364,415 @@ env_source_rc = False
                 environment.directory.new = False
                 environment.remove()
 
+    def test_install_with_jobs(self):
+        """config:jobs should run features concurrently, honoring depends"""
+        with MockEnvironment(target_config=test_jobs_target) as environment:
+            environment.install()
+            eq_(environment._get_jobs(), 2)
+            eq_(
+                environment._get_feature_dependencies(),
+                {
+                    ("first", "sprinter.formula.base"): [],
+                    ("second", "sprinter.formula.base"): [
+                        ("first", "sprinter.formula.base")
+                    ],
+                },
+            )
+
+    def test_jobs_option_overrides_manifest(self):
+        """the jobs attribute should take precedence over config:jobs"""
+        with MockEnvironment(target_config=test_jobs_target) as environment:
+            environment.jobs = "4"
+            eq_(environment._get_jobs(), 4)
+
+    def test_unchanged_feature_is_skipped(self):
+        """An update should skip features whose fingerprint has not changed"""
+        key = ("testfeature", "sprinter.formula.base")
+        with MockEnvironment(test_source, test_target) as environment:
+            environment.phase = PHASE.UPDATE
+            environment.instantiate_features()
+            environment._fingerprints = environment._get_feature_fingerprints()
+            ok_(environment._is_unchanged(key))
+            with patch("sprinter.formula.base.FormulaBase.update") as update:
+                environment._sync_feature(key)
+                ok_(not update.called)
+            environment.force = True
+            ok_(not environment._is_unchanged(key))
+
+    def test_skipped_env_feature_keeps_exports(self):
+        """A skipped env feature should still write it's exports to the env script"""
+        key = ("myenv", "sprinter.formula.env")
+        with MockEnvironment(test_env_source, test_env_target) as environment:
+            environment.phase = PHASE.UPDATE
+            environment.instantiate_features()
+            environment._fingerprints = environment._get_feature_fingerprints()
+            ok_(environment._is_unchanged(key))
+            with patch("sprinter.formula.env.EnvFormula.update") as update:
+                environment._sync_feature(key)
+                ok_(not update.called)
+            ok_("export FOO=bar" in environment.directory.script_content(".env"))
+
+    def test_changed_feature_is_updated(self):
+        """Changed configuration or always_update should not skip the update"""
+        key = ("testfeature", "sprinter.formula.base")
+        with MockEnvironment(test_source, test_target) as environment:
+            environment.phase = PHASE.UPDATE
+            environment.instantiate_features()
+            environment._fingerprints = environment._get_feature_fingerprints()
+            target = environment.features[key].target
+            target.set("always_update", "true")
+            environment._fingerprints = environment._get_feature_fingerprints()
+            ok_(not environment._is_unchanged(key))
+            target.remove("always_update")
+            target.set("url", "http://example.com")
+            ok_(not environment._is_unchanged(key))
+
+    def test_changes_exposed_to_formulas(self):
+        """Formulas should see the changes between the source and target"""
+        key = ("testfeature", "sprinter.formula.base")
+        with MockEnvironment(test_source, test_target) as environment:
+            environment.instantiate_features()
+            environment.features[key].target.set("url", "http://example.com")
+            environment._specialize()
+            changes = environment.features[key].changes
+            ok_(changes is environment.changes["testfeature"])
+            ok_(changes.changed("url"))
+            ok_(not changes.changed("formula"))
+
+    def test_unchanged_target_skips_update(self):
+        """An update from the manifest last installed from should do nothing"""
+        with MockEnvironment(test_source, test_target) as environment:
+            environment.directory = Mock(spec=environment.directory)
+            environment.directory.new = False
+            environment.instantiate_features = Mock()
+            environment.source.target_digest = environment.target.digest()
+            environment.update()
+            ok_(not environment.instantiate_features.called)
+            environment.force = True
+            ok_(not environment._is_target_unchanged())
+
+    def test_update_only(self):
+        """An update with only should sync the features and their dependencies"""
+        with MockEnvironment(test_only_source, test_only_target) as environment:
+            environment.directory = Mock(spec=environment.directory)
+            environment.directory.root_dir = "/tmp/"
+            environment.directory.new = False
+            environment.directory.install_directory.return_value = "/tmp/"
+            environment.only = ["second"]
+            with patch("sprinter.formula.base.FormulaBase.update") as update:
+                environment.update()
+            eq_(update.call_count, 2)
+            eq_(
+                environment.features.run_order,
+                [
+                    ("first", "sprinter.formula.base"),
+                    ("third", "sprinter.formula.base"),
+                    ("second", "sprinter.formula.base"),
+                ],
+            )
+            # the skipped feature keeps it's installed configuration
+            eq_(environment.main_manifest.get("third", "rc"), "echo third")
+            ok_(not environment.main_manifest.has_section("fourth"))
+            environment.directory.add_to_rc.assert_any_call("echo third")
+            # and the dependency tree and changes are of the kept configuration
+            eq_(
+                sorted(environment.main_manifest.formula_sections()),
+                ["first", "second", "third"],
+            )
+            ok_("fourth" not in environment.changes.added)
+            ok_("third" not in environment.changes.changed)
+
+    def test_update_only_keeps_script_order(self):
+        """The lines of skipped features should keep their place in the rc"""
+        with MockEnvironment(test_only_source, test_only_target) as environment:
+            environment.directory.initialize()
+            for manifest in (environment.source, environment.target):
+                manifest.set("first", "rc", "echo first")
+                manifest.set("second", "rc", "echo second")
+            environment.only = ["second"]
+            environment.update()
+            with open(os.path.join(environment.directory.root_dir, ".rc")) as fh:
+                rc = fh.read()
+            # third runs between first and second, and is skipped
+            ok_(rc.index("echo first") < rc.index("echo third"))
+            ok_(rc.index("echo third") < rc.index("echo second"))
+
+    def test_update_only_with_dependents(self):
+        """with_dependents should also select the features that depend on only"""
+        with MockEnvironment(test_only_source, test_only_target) as environment:
+            environment.only = ["second"]
+            eq_(environment._select_features(), set(["first", "second"]))
+            environment.with_dependents = True
+            eq_(environment._select_features(), set(["first", "second", "fourth"]))
+
+    @raises(SprinterException)
+    def test_update_only_missing_feature(self):
+        """only should not accept features that are not in the environment"""
+        with MockEnvironment(test_only_source, test_only_target) as environment:
+            environment.only = ["missing"]
+            environment._select_features()
+
+    def test_update_in_new_generation(self):
+        """with generations, an update should switch to a new generation"""
+        with MockEnvironment(test_source, test_generations_target) as environment:
+            environment.directory.initialize()
+            environment.update()
+            eq_(Generations(environment.directory.root_dir).current(), 2)
+
+    def test_failed_update_reverts_generation(self):
+        """with generations, a failed update should switch back"""
+        with MockEnvironment(test_source, test_generations_target) as environment:
+            environment.directory.initialize()
+            with patch("sprinter.formula.base.FormulaBase.update") as update:
+                update.side_effect = Exception("failed")
+                try:
+                    environment.update()
+                except SprinterException:
+                    pass
+                else:
+                    raise AssertionError("the failure was not raised!")
+            generations = Generations(environment.directory.root_dir)
+            eq_(generations.current(), 1)
+            eq_(generations.list(), [1, 2])
+
+    def test_interrupted_update_reverts_generation(self):
+        """with generations, an interrupted update should switch back"""
+        with MockEnvironment(test_source, test_generations_target) as environment:
+            environment.directory.initialize()
+            with patch("sprinter.formula.base.FormulaBase.update") as update:
+                update.side_effect = SystemExit(0)
+                try:
+                    environment.update()
+                except SystemExit:
+                    pass
+                else:
+                    raise AssertionError("the interrupt was not raised!")
+            eq_(Generations(environment.directory.root_dir).current(), 1)
+
+    def test_timings_recorded(self):
+        """An install should append the timings of its phases and features"""
+        with MockEnvironment(target_config=test_target) as environment:
+            environment.install()
+            records = load_history(environment.timing_history_path)
+            eq_(len(records), 1)
+            eq_(records[0]["phase"], "install")
+            eq_(records[0]["status"], "success")
+            for phase in ("instantiate_features", "_specialize", "_finalize"):
+                ok_(phase in records[0]["phases"])
+            features = dict(feature_timings(records[0]))
+            ok_("sync" in features[("testfeature", "sprinter.formula.base")])
+
+    def test_index_updated(self):
+        """An install should record the namespace in the index"""
+        with MockEnvironment(target_config=test_target) as environment:
+            environment.install()
+            entry = load_index(environment.index_path)["test"]
+            eq_(entry["command"], "install")
+            eq_(entry["status"], "success")
+            eq_(entry["features"], 1)
+
+    def test_activate_keeps_fingerprints(self):
+        """An activate should keep the fingerprints and target digest of the install"""
+        with MockEnvironment(target_config=test_target) as environment:
+            del environment.write_manifest
+            environment.install()
+            manifest_path = environment.directory.manifest_path
+            fingerprints = load_fingerprints(environment._fingerprint_path())
+            digest = load_manifest(manifest_path, do_inherit=False).target_digest
+            ok_(fingerprints)
+            ok_(digest)
+            environment.source = load_manifest(manifest_path, do_inherit=False)
+            environment.target = None
+            environment.features = None
+            environment.activate()
+            eq_(load_fingerprints(environment._fingerprint_path()), fingerprints)
+            eq_(load_manifest(manifest_path, do_inherit=False).target_digest, digest)
+
+    def test_plan_skips_installed_features(self):
+        """A plan of the installed namespace should skip what an update would skip"""
+        with MockEnvironment(target_config=test_target) as environment:
+            del environment.write_manifest
+            environment.install()
+            environment.source = None
+            environment.target = load_manifest(StringIO(test_target))
+            eq_(
+                [(p.feature, p.action, p.reason) for p in environment.plan()],
+                [("testfeature", "skip", "unchanged since the last update")],
+            )
+
+    def test_debug_log_size(self):
+        """The debug log should spill to disk past the memory size it is given"""
+        temp_dir = tempfile.mkdtemp()
+        environment = Environment(root=temp_dir, debug_log_memory_size=100)
+        handlers = environment.logger.handlers[-2:]
+        try:
+            eq_(environment._debug_stream.memory_size, 100)
+            environment.logger.debug("spill" * 50)
+            ok_(environment._debug_stream._current_file is not None)
+            log_path = os.path.join(temp_dir, "sprinter.log")
+            environment.write_debug_log(log_path)
+            with open(log_path) as fh:
+                ok_("spill" * 50 in fh.read())
+        finally:
+            for handler in handlers:
+                environment.logger.removeHandler(handler)
+            shutil.rmtree(temp_dir)
+
+    def test_read_only_warmup(self):
+        """A read only warmup should not set up injections or modify the PATH"""
+        with MockEnvironment(target_config=test_target) as environment:
+            path = os.environ["PATH"]
+            environment.read_only = True
+            environment.injections = None
+            environment.warmup()
+            ok_(environment.warmed_up)
+            ok_(environment.injections is None)
+            eq_(os.environ["PATH"], path)
+
+    def test_uncommitted_warmup_keeps_path(self):
+        """An environment of update --all should not modify the shared PATH"""
+        with MockEnvironment(target_config=test_target) as environment:
+            path = os.environ["PATH"]
+            environment.warmed_up = False
+            environment.commit_injections = False
+            environment.warmup()
+            ok_(environment.warmed_up)
+            eq_(os.environ["PATH"], path)
+
+    def test_events_emitted(self):
+        """An install should emit events for its phases and feature actions"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "events.jsonl")
+            events.open_stream(path)
+            with MockEnvironment(target_config=test_target) as environment:
+                environment.install()
+            events.close_stream()
+            with open(path) as fh:
+                emitted = [json.loads(line) for line in fh]
+            names = [(e["event"], e.get("phase") or e.get("action")) for e in emitted]
+            ok_(("phase_start", "warmup") in names)
+            ok_(("phase_end", "_finalize") in names)
+            feature_end = emitted[names.index(("feature_end", "sync"))]
+            eq_(feature_end["feature"], "testfeature")
+            eq_(feature_end["status"], "success")
+        finally:
+            events.close_stream()
+            shutil.rmtree(temp_dir)
+
+    def test_resume_failed_install(self):
+        """A failed install should keep completed features, and resume from there"""
+        attempts = []
+
+        def install(formula):
+            attempts.append(formula.feature_name)
+            if formula.feature_name == "second" and attempts.count("second") == 1:
+                raise Exception("network error")
+
+        with patch(
+            "sprinter.formula.base.FormulaBase.install", autospec=True
+        ) as mock_install:
+            mock_install.side_effect = install
+            with MockEnvironment(target_config=test_resume_target) as environment:
+                try:
+                    environment.install()
+                except SprinterException:
+                    pass
+                ok_(os.path.exists(environment.directory.root_dir))
+                eq_(attempts, ["first", "second"])
+
+                resumed = Environment(
+                    root=environment.root,
+                    sprinter_namespace="test",
+                    global_config=create_default_config(),
+                )
+                resumed.namespace = "test"
+                resumed.target = environment.target
+                resumed.resume = True
+                resumed.warmup()
+                resumed.injections.commit = Mock()
+                resumed.global_injections.commit = Mock()
+                resumed.install()
+                eq_(attempts, ["first", "second", "second"])
+                ok_(not os.path.exists(resumed._journal.path))
+
+    def test_resume_redoes_changed_and_partial_features(self):
+        """
+        A resumed install should redo completed features whose
+        configuration changed, and remove what unfinished features left
+        """
+        attempts = []
+
+        def install(formula):
+            attempts.append(formula.feature_name)
+            if formula.feature_name == "second" and attempts.count("second") == 1:
+                with open(os.path.join(install_directory, "partial"), "w") as fh:
+                    fh.write("partial")
+                raise Exception("network error")
+            if formula.feature_name == "second":
+                ok_(not os.path.exists(os.path.join(install_directory, "partial")))
+
+        with patch(
+            "sprinter.formula.base.FormulaBase.install", autospec=True
+        ) as mock_install:
+            mock_install.side_effect = install
+            with MockEnvironment(target_config=test_resume_target) as environment:
+                install_directory = environment.directory.install_directory("second")
+                os.makedirs(install_directory)
+                try:
+                    environment.install()
+                except SprinterException:
+                    pass
+
+                resumed = Environment(
+                    root=environment.root,
+                    sprinter_namespace="test",
+                    global_config=create_default_config(),
+                )
+                resumed.namespace = "test"
+                resumed.target = environment.target
+                resumed.target.set("first", "version", "2")
+                resumed.resume = True
+                resumed.warmup()
+                resumed.injections.commit = Mock()
+                resumed.global_injections.commit = Mock()
+                resumed.install()
+                eq_(attempts, ["first", "second", "first", "second"])
+
+    def test_interrupted_install_keeps_completed_features(self):
+        """An interrupted install should keep the completed features to resume"""
+
+        def install(formula):
+            if formula.feature_name == "second":
+                # what the SIGINT handler of sprinter install does
+                environment.clear_failed_install()
+                raise SystemExit(0)
+
+        with patch(
+            "sprinter.formula.base.FormulaBase.install", autospec=True
+        ) as mock_install:
+            mock_install.side_effect = install
+            with MockEnvironment(target_config=test_resume_target) as environment:
+                try:
+                    environment.install()
+                except SystemExit:
+                    pass
+                eq_(
+                    list(environment._journal.completed()),
+                    [("first", "sprinter.formula.base")],
+                )
+
+    @raises(SprinterException)
+    def test_unfinished_install_requires_resume(self):
+        """An unfinished install should not be treated as an update"""
+        with MockEnvironment(target_config=test_resume_target) as environment:
+            environment.directory.initialize()
+            Journal(
+                os.path.join(environment.directory.root_dir, "install.journal")
+            ).record(("first", "sprinter.formula.base"))
+            environment.directory.new = False
+            environment.install()
+
 
 missing_formula_config = """
 [missingformula]
@@ -375,6 +794,21 @@ namespace = testsprinter
 formula = sprinter.formula.base
 """
 
+test_env_source = """
+[myenv]
+formula = sprinter.formula.env
+foo = bar
+"""
+
+test_env_target = """
+[config]
+namespace = testsprinter
+
+[myenv]
+formula = sprinter.formula.env
+foo = bar
+"""
+
 test_input_source = """
 [config]
 namespace = testsprinter
@@ -387,3 +821,72 @@ namespace = testsprinter
 my_custom_value = bar
 non_custom_value = baz
 """
+
+test_jobs_target = """
+[config]
+namespace = testsprinter
+jobs = 2
+
+[second]
+formula = sprinter.formula.base
+depends = first
+
+[first]
+formula = sprinter.formula.base
+"""
+
+test_resume_target = """
+[config]
+namespace = test
+
+[first]
+formula = sprinter.formula.base
+
+[second]
+formula = sprinter.formula.base
+"""
+
+test_only_source = """
+[config]
+namespace = test
+
+[first]
+formula = sprinter.formula.base
+
+[second]
+formula = sprinter.formula.base
+depends = first
+
+[third]
+formula = sprinter.formula.base
+rc = echo third
+"""
+
+test_only_target = """
+[config]
+namespace = test
+
+[first]
+formula = sprinter.formula.base
+
+[second]
+formula = sprinter.formula.base
+depends = first
+
+[third]
+formula = sprinter.formula.base
+rc = echo changed
+
+[fourth]
+formula = sprinter.formula.base
+depends = second
+"""
+
+test_generations_target = """
+[config]
+namespace = testsprinter
+generations = true
+
+[testfeature]
+formula = sprinter.formula.base
+"""
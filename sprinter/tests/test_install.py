@@ -8,8 +8,11 @@ import shutil
 import os
 from mock import call, patch, Mock
 
-from sprinter.install import parse_args, parse_domain
+from sprinter.install import parse_args, parse_domain, update_all
 from sprinter.core.manifest import Manifest
+from sprinter.core.generations import Generations
+from sprinter.core.index import update_index
+from sprinter.lib import events
 
 TEST_MANIFEST = """
 [config]
@@ -60,6 +63,19 @@ class TestInstall(unittest.TestCase):
             parse_args(args, Environment=environment)
             environment.assert_has_calls(calls)
 
+    @patch("sprinter.environment.Environment")
+    def test_events_closed(self, environment):
+        """The event stream should be written and closed when the command finishes"""
+        events_path = os.path.join(self.temp_dir, "events.jsonl")
+        with patch("sprinter.core.manifest.load_manifest") as load_manifest:
+            load_manifest.return_value = Mock(spec=Manifest)
+            parse_args(
+                ["install", "http://www.google.com", "--events", events_path],
+                Environment=environment,
+            )
+        self.assertTrue(events._stream is None)
+        self.assertTrue(os.path.exists(events_path))
+
     @patch("sprinter.environment.Environment")
     def test_install_environment_bad_certificate(self, environment):
         """Test if install calls the proper methods"""
@@ -89,6 +105,117 @@ class TestInstall(unittest.TestCase):
         parse_args(args, Environment=environment)
         environment.assert_has_calls(calls)
 
+    def test_update_all(self):
+        """update --all should update every namespace, and commit injections at the end"""
+        for namespace in ("one", "two"):
+            os.makedirs(os.path.join(self.temp_dir, namespace))
+            with open(
+                os.path.join(self.temp_dir, namespace, "manifest.cfg"), "w+"
+            ) as fh:
+                fh.write("[config]\nsource = %s\n" % self.temp_file_path)
+        os.makedirs(os.path.join(self.temp_dir, ".global"))
+        env = Mock(root=self.temp_dir, jobs=None, ignore_errors=False)
+        environment = Mock()
+        environment.return_value.root = self.temp_dir
+        environment.return_value.shell_util_path = None
+        options = {
+            "--username": None,
+            "--auth": False,
+            "--allow-bad-certificate": False,
+            "--force": False,
+            "--reconfigure": False,
+        }
+        with patch("sprinter.install.commit_injections") as commit_injections:
+            update_all(env, options, Environment=environment)
+        self.assertEqual(environment.call_count, 2)
+        instance = environment.return_value
+        self.assertEqual(instance.update.call_count, 2)
+        commit_injections.assert_called_once_with(
+            [instance.injections, instance.injections, instance.global_injections]
+        )
+        self.assertEqual(instance.commit_injections, False)
+
+    def test_update_only(self):
+        """update --only should limit the update to the comma separated features"""
+        environment = Mock()
+        with patch("sprinter.install.prepare_update"):
+            parse_args(
+                ["update", "myenv", "--only", "git, sub", "--with-dependents"],
+                Environment=environment,
+            )
+        instance = environment.return_value
+        self.assertEqual(instance.only, ["git", "sub"])
+        self.assertEqual(instance.with_dependents, True)
+        self.assertTrue(instance.update.called)
+
+    def test_rollback_and_gc(self):
+        """rollback should switch to the previous generation, and gc remove old ones"""
+        namespace_path = os.path.join(self.temp_dir, "myenv")
+        os.makedirs(namespace_path)
+        generations = Generations(namespace_path)
+        generations.adopt()
+        generations.switch(generations.create())
+        generations.switch(generations.create())
+        environment = Mock()
+        environment.return_value.root = self.temp_dir
+        environment.return_value.index_path = os.path.join(
+            self.temp_dir, ".global", "index.json"
+        )
+        parse_args(["rollback", "myenv"], Environment=environment)
+        self.assertEqual(generations.current(), 2)
+        # the generation rolled back from is kept
+        parse_args(["gc", "--keep", "0"], Environment=environment)
+        self.assertEqual(generations.list(), [2, 3])
+
+    def test_status(self):
+        """status should print the namespace index, without loading manifests"""
+        update_index(
+            os.path.join(self.temp_dir, ".global", "index.json"),
+            "myenv",
+            status="success",
+        )
+        environment = Mock()
+        environment.return_value.index_path = os.path.join(
+            self.temp_dir, ".global", "index.json"
+        )
+        with patch("sprinter.install.print_status") as print_status:
+            parse_args(["status"], Environment=environment)
+            self.assertEqual(list(print_status.call_args[0][0]), ["myenv"])
+            parse_args(["status", "otherenv"], Environment=environment)
+            self.assertEqual(print_status.call_args[0][0], {})
+        self.assertFalse(environment.return_value.warmup.called)
+
+    def test_lint(self):
+        """lint should analyze every manifest in a directory"""
+        manifest_dir = os.path.join(self.temp_dir, "manifests")
+        os.makedirs(manifest_dir)
+        for name, content in [
+            ("good.cfg", "[git]\nformula = sprinter.formula.package\napt-get = git\n"),
+            ("bad.cfg", "[git]\nformula = sprinter.formula.package\ndepends = hg\n"),
+            ("README", "not a manifest"),
+        ]:
+            with open(os.path.join(manifest_dir, name), "w") as fh:
+                fh.write(content)
+        environment = Mock()
+        environment.return_value.formula_schema_path = os.path.join(
+            self.temp_dir, "formula_schemas.json"
+        )
+        with patch("sprinter.install.print_lint") as print_lint:
+            parse_args(["lint", manifest_dir], Environment=environment)
+            results = dict(print_lint.call_args[0][0])
+        self.assertEqual(
+            sorted(results),
+            sorted(
+                [
+                    os.path.join(manifest_dir, "good.cfg"),
+                    os.path.join(manifest_dir, "bad.cfg"),
+                ]
+            ),
+        )
+        self.assertEqual(results[os.path.join(manifest_dir, "good.cfg")], [])
+        self.assertEqual(len(results[os.path.join(manifest_dir, "bad.cfg")]), 1)
+        self.assertFalse(environment.return_value.warmup.called)
+
     def test_parse_domain(self):
         """Test if domains are properly parsed"""
         match_tuples = [
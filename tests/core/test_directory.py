@@ -8,7 +8,7 @@ import tempfile
 
 from nose import tools
 from mock import Mock, patch
-from sprinter.core.directory import Directory, DirectoryException
+from sprinter.core.directory import Directory, DirectoryException, feature_scope
 
 
 class TestDirectory(object):
@@ -187,16 +187,110 @@ class TestDirectory(object):
             "File contents are different for symlinked files!",
         )
 
+    def test_link_index(self):
+        """links should be recorded with the feature that owns them"""
+        test_file = self._feature_file("woops", "test_file")
+        self.directory.symlink_to_bin("test_file", test_file)
+        tools.eq_(self.directory.feature_links("woops"), ["bin/test_file"])
+        directory = Directory(self.directory.root_dir)
+        tools.eq_(directory.feature_links("woops"), ["bin/test_file"])
+
+    def test_correct_link_is_kept(self):
+        """a link to the same path should not be recreated"""
+        test_file = self._feature_file("woops", "test_file")
+        self.directory.symlink_to_bin("test_file", test_file)
+        with patch("os.symlink") as symlink:
+            self.directory.symlink_to_bin("test_file", test_file)
+            assert not symlink.called
+
+    def test_sync_links(self):
+        """sync_links should only create, retarget and remove links that differ"""
+        first = self._feature_file("woops", "first")
+        second = self._feature_file("woops", "second")
+        self.directory.sync_links("woops", "bin", {"a": first, "b": first})
+        self.directory.sync_links("woops", "bin", {"b": second, "c": second})
+        bin_path = self.directory.bin_path()
+        assert not os.path.lexists(os.path.join(bin_path, "a"))
+        tools.eq_(os.readlink(os.path.join(bin_path, "b")), second)
+        tools.eq_(os.readlink(os.path.join(bin_path, "c")), second)
+        tools.eq_(self.directory.feature_links("woops"), ["bin/b", "bin/c"])
+
+    def test_link_collision_warns(self):
+        """linking a name owned by another feature should warn"""
+        self.directory.sync_links("one", "bin", {"a": self._feature_file("one", "a")})
+        with patch("sprinter.core.directory.logger") as logger:
+            self.directory.sync_links(
+                "two", "bin", {"a": self._feature_file("two", "a")}
+            )
+            assert logger.warn.called
+        tools.eq_(self.directory.feature_links("one"), [])
+        tools.eq_(self.directory.feature_links("two"), ["bin/a"])
+
+    def test_existing_links_are_indexed(self):
+        """links made before the index existed should be indexed by feature"""
+        test_file = self._feature_file("woops", "test_file")
+        os.symlink(test_file, os.path.join(self.directory.bin_path(), "test_file"))
+        directory = Directory(self.directory.root_dir)
+        tools.eq_(directory.feature_links("woops"), ["bin/test_file"])
+        directory.clear_feature_symlinks("woops")
+        assert not os.path.lexists(os.path.join(self.directory.bin_path(), "test_file"))
+
+    def _feature_file(self, feature, name):
+        feature_path = self.directory.install_directory(feature)
+        if not os.path.exists(feature_path):
+            os.makedirs(feature_path)
+        path = os.path.join(feature_path, name)
+        with open(path, "w+") as fh:
+            fh.write("hobo")
+        return path
+
     def test_add_to_rc(self):
         """Test if the add_to_rc method adds to the rc"""
         test_content = "THIS IS AN OOOGA BOOGA TEST "
         self.directory.add_to_rc(test_content)
         rc_file_path = os.path.join(self.directory.root_dir, ".rc")
-        del self.directory
+        self.directory.finalize()
         assert (
             open(rc_file_path).read().find(test_content) != -1
         ), "test content was not found!"
 
+    def test_scripts_written_on_finalize(self):
+        """the scripts should only be written on finalize"""
+        rc_file_path = os.path.join(self.directory.root_dir, ".rc")
+        self.directory.add_to_rc("echo hi")
+        assert not os.path.exists(rc_file_path)
+        self.directory.finalize()
+        assert "echo hi" in open(rc_file_path).read()
+
+    def test_unchanged_scripts_not_written(self):
+        """scripts whose content is unchanged should not be rewritten"""
+        self.directory.add_to_rc("echo hi")
+        self.directory.finalize()
+        self.directory.add_to_rc("echo hi")
+        with patch("os.rename") as rename:
+            self.directory.finalize()
+            assert not rename.called
+        self.directory.add_to_rc("echo bye")
+        self.directory.finalize()
+        rc_file_path = os.path.join(self.directory.root_dir, ".rc")
+        assert "echo hi" not in open(rc_file_path).read()
+
+    def test_script_lines_in_feature_order(self):
+        """the lines of each feature should be written in the order given to finalize"""
+        self.directory.add_to_rc("echo start")
+        with feature_scope("second"):
+            self.directory.add_to_rc("echo second")
+        with feature_scope("first"):
+            self.directory.add_to_rc("echo first")
+        self.directory.add_to_rc("echo end")
+        self.directory.finalize(order=["first", "second"])
+        rc_file_path = os.path.join(self.directory.root_dir, ".rc")
+        content = open(rc_file_path).read()
+        positions = [
+            content.index("echo %s" % n) for n in ("start", "first", "second", "end")
+        ]
+        tools.eq_(positions, sorted(positions))
+
     @tools.raises(DirectoryException)
     def test_add_to_rc_norc_rewrite(self):
         """
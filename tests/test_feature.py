@@ -13,5 +13,4 @@ def test_feature_executes_rc_env(directory, feature):
         {"foo": {"rc": "bar"}}
     ).get_feature_config("foo")
     feature.sync()
-    directory.rc_file.seek(0)
-    assert "bar" in directory.rc_file.read()
+    assert "bar" in directory.script_content(".rc")